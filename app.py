@@ -5,7 +5,11 @@ import os
 # Ensure we can import from src/
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
 
-from src.rag_system import RAGSystem
+from src.llm_client import LLMOverloadedError
+from src.rag_system import GenerationTimings, RAGSystem
+from src.search_filters import SearchFilters
+from src.telemetry import make_sinks
+from scripts.constants import Metadata_Columns
 
 # Page Configuration
 st.set_page_config(page_title="Financial Support AI", layout="wide")
@@ -23,7 +27,16 @@ based on thousands of real financial complaints.
 # We use cache_resource because the object is complex/heavy (database connection)
 @st.cache_resource
 def load_rag():
-    return RAGSystem()
+    # The disk cache tier is shared by every Streamlit worker on the host.
+    # RAG_TELEMETRY lists sinks for per-stage timings, e.g. "log,prometheus"
+    return RAGSystem(
+        disk_cache=True,
+        telemetry_sinks=make_sinks(
+            os.getenv("RAG_TELEMETRY", ""),
+            int(os.getenv("RAG_METRICS_PORT", "9464")),
+            os.getenv("RAG_METRICS_HOST", "127.0.0.1"),
+        ),
+    )
 
 
 try:
@@ -35,6 +48,34 @@ except Exception as e:
     st.stop()
 
 
+# Sidebar filters, applied inside the vector search
+with st.sidebar:
+    st.header("Filters")
+    filter_index = rag.filter_index
+    products = st.multiselect(
+        "Product", filter_index.values(Metadata_Columns.PRODUCT.value)
+    )
+    sub_products = st.multiselect(
+        "Sub-product", filter_index.values(Metadata_Columns.SUB_PRODUCT.value)
+    )
+    companies = st.multiselect(
+        "Company", filter_index.values(Metadata_Columns.COMPANY.value)
+    )
+    states = st.multiselect("State", filter_index.values(Metadata_Columns.STATE.value))
+    date_range = st.date_input("Date received", value=())
+
+    with st.expander("Query cache"):
+        st.json(rag.cache_stats())
+
+search_filters = SearchFilters(
+    products=products,
+    sub_products=sub_products,
+    companies=companies,
+    states=states,
+    date_from=date_range[0] if len(date_range) > 0 else None,
+    date_to=date_range[1] if len(date_range) > 1 else None,
+)
+
 # Initialize chat history in session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -52,23 +93,65 @@ if prompt := st.chat_input("Ask about overdrafts, credit reporting, etc..."):
 
     # B. Generate AI Response
     with st.chat_message("assistant"):
-        with st.spinner("Searching documents & Generating answer..."):
-
-            # 1. Retrieve
-            retrieved_docs = rag.search_vector_db(prompt)
-
-            # 2. Generate (Calls your LLM)
-            response_text = rag.agument_result(prompt, retrieved_docs)
-
-            st.markdown(response_text)
-
-            # Optional: Show Evidence (Collapsible)
+        # Always traced, for the debug panel; sinks only get it when configured
+        trace = rag.telemetry.start("chat", force=True)
+        # Failed requests are exported too, marked with the error type
+        try:
+            with st.spinner("Searching documents..."):
+
+                # 1. Retrieve, on the shared search thread pool
+                retrieved_docs = rag.run_async(
+                    rag.asearch(prompt, filters=search_filters, trace=trace)
+                )
+
+            # Optional: Show Evidence (Collapsible), available before generation starts
             with st.expander("View Retrieved Source Context"):
                 for i, doc in enumerate(retrieved_docs):
                     st.markdown(
                         f"**Source {i+1}** (Product: {doc.metadata.get('product', 'Unknown')})"
                     )
-                    st.caption(doc.page_content)
+                    full_complaint = rag.full_complaint(doc)
+                    if full_complaint is None:
+                        st.caption(doc.page_content)
+                        continue
+                    chunk_tab, full_tab = st.tabs(["Chunk", "Full complaint"])
+                    chunk_tab.caption(doc.page_content)
+                    full_tab.caption(full_complaint)
+
+            # 2. Generate (Calls your LLM), rendering tokens as they arrive.
+            # All sessions share one connection pool and concurrency limit
+            timings = GenerationTimings()
+            try:
+                response_text = st.write_stream(
+                    rag.iter_async(
+                        rag.astream_result(prompt, retrieved_docs, timings, trace)
+                    )
+                )
+                st.caption(
+                    f"First token in {timings.ttft_ms:.0f} ms · "
+                    f"total {timings.total_ms:.0f} ms"
+                    + (" · cached answer" if timings.cached else "")
+                )
+            except LLMOverloadedError:
+                response_text = (
+                    "The assistant is busy right now, please try again shortly."
+                )
+                st.warning(response_text)
+        except Exception as e:
+            trace.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            rag.telemetry.finish(trace)
+
+        with st.expander("Debug: timings"):
+            st.table(
+                [
+                    {"stage": name, "ms": round(ms, 1)}
+                    for name, ms in trace.stage_ms().items()
+                ]
+                + [{"stage": "total", "ms": round(trace.total_ms, 1)}]
+            )
+            st.json(trace.counters)
 
     # C. Save AI Message to History
     st.session_state.messages.append({"role": "assistant", "content": response_text})
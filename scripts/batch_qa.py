@@ -0,0 +1,180 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.search_filters import SearchFilters
+
+QUESTION_COLUMN = "question"
+
+# Parquet results are flushed as a row group every this many answers
+PARQUET_ROW_GROUP_SIZE = 1000
+
+RESULT_SCHEMA = pa.schema(
+    [
+        ("index", pa.int64()),
+        ("question", pa.string()),
+        ("answer", pa.string()),
+        ("sources", pa.list_(pa.string())),
+        ("retrieval_ms", pa.float64()),
+        ("generation_ms", pa.float64()),
+        ("error", pa.string()),
+    ]
+)
+
+
+def read_questions(path: str) -> list:
+    """
+    Reads questions from a text file (one per line), a JSONL file, or a
+    CSV/Parquet file with a `question` column.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".parquet":
+        return pd.read_parquet(path, columns=[QUESTION_COLUMN])[
+            QUESTION_COLUMN
+        ].tolist()
+    if suffix == ".csv":
+        return pd.read_csv(path, usecols=[QUESTION_COLUMN])[QUESTION_COLUMN].tolist()
+
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if suffix == ".jsonl":
+        return [json.loads(line)[QUESTION_COLUMN] for line in lines]
+    return lines
+
+
+class ResultWriter:
+    """
+    Streams result records to JSONL (one line per answer, flushed as it
+    arrives) or Parquet (one row group per PARQUET_ROW_GROUP_SIZE answers),
+    chosen by the output file suffix.
+    """
+
+    def __init__(self, path: str, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.row_group_size = row_group_size
+        self.is_parquet = Path(path).suffix.lower() == ".parquet"
+        self._buffer = []
+        if self.is_parquet:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, RESULT_SCHEMA)
+        else:
+            self._file = open(path, "w")
+
+    def write(self, record: dict):
+        if self.is_parquet:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+        else:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def _flush(self):
+        if self._buffer:
+            table = pa.Table.from_pylist(self._buffer, schema=RESULT_SCHEMA)
+            self._writer.write_table(table)
+            self._buffer = []
+
+    def close(self):
+        if self.is_parquet:
+            self._flush()
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def run_batch(
+    rag,
+    questions: list,
+    output_path: str,
+    k: int = 5,
+    filters: SearchFilters = None,
+    concurrency: int = None,
+) -> dict:
+    """
+    Answers every question with rag.abatch_answer, writing each result as
+    soon as it completes.
+    Returns:
+        dict: Summary with counts, wall time, throughput and generation latency percentiles.
+    """
+    start = time.perf_counter()
+    generation_ms = []
+    errors = 0
+
+    with ResultWriter(output_path) as writer:
+        async for record in rag.abatch_answer(questions, k, filters, concurrency):
+            writer.write(record)
+            generation_ms.append(record["generation_ms"])
+            errors += record["error"] is not None
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "questions": len(questions),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "questions_per_second": round(len(questions) / elapsed, 3) if elapsed else 0.0,
+    }
+    if generation_ms:
+        p50, p95 = np.percentile(generation_ms, [50, 95])
+        summary["generation_p50_ms"] = round(float(p50), 1)
+        summary["generation_p95_ms"] = round(float(p95), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a file of questions with the RAG system."
+    )
+    parser.add_argument("input", help="Questions: .txt, .jsonl, .csv or .parquet")
+    parser.add_argument("output", help="Results: .jsonl or .parquet")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument(
+        "--concurrency", type=int, help="LLM requests in flight at once"
+    )
+    parser.add_argument("--product", action="append", default=[])
+    parser.add_argument("--company", action="append", default=[])
+    parser.add_argument("--state", action="append", default=[])
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: File not found at {args.input}")
+        return
+
+    from src.rag_system import RAGSystem
+
+    questions = read_questions(args.input)
+    filters = SearchFilters(
+        products=args.product, companies=args.company, states=args.state
+    )
+    rag = RAGSystem(max_concurrent_llm=args.concurrency or 8)
+
+    print(f"Answering {len(questions)} questions")
+    summary = asyncio.run(
+        run_batch(rag, questions, args.output, args.k, filters, args.concurrency)
+    )
+    print(json.dumps(summary, indent=2))
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
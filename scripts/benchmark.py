@@ -0,0 +1,428 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+import platform
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from tabulate import tabulate
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import (
+    FAISS_INDEX_FILE_NAME,
+    METADATA_STORE_FILE_NAME,
+    NARRATIVE_STORE_FILE_NAME,
+    Columns,
+    Index_Types,
+    Vector_Dtypes,
+)
+from src.index_builder import (
+    IndexConfig,
+    build_index,
+    evaluate_index,
+    load_rerank_vectors,
+    read_index,
+    write_index,
+)
+from src.metadata_store import MetadataStore
+from src.synthetic_corpus import (
+    SYNTHETIC_DIM,
+    generate_complaints,
+    synthetic_embeddings,
+    synthetic_queries,
+)
+
+# Corpus sizes in chunks; every synthetic complaint is one chunk
+BENCHMARK_SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+THREAD_SWEEP = [1, 2, 4, 8]
+
+STUB_ANSWER = "The main issues are unexpected fees and unauthorized charges."
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process so far, in MB. It never goes down,
+    so compare sizes with run_isolated, which gives each its own process.
+    """
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentiles(latencies_ms: list) -> dict:
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def stub_llm_client(delay_ms: float = 0.0, max_concurrency: int = 8):
+    """
+    AsyncLLMClient answering locally through an httpx mock transport, so the
+    full request path runs without network access or an API token.
+    """
+    import httpx
+    from src.llm_client import AsyncLLMClient
+
+    async def handler(request):
+        await asyncio.sleep(delay_ms / 1000)
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": STUB_ANSWER}}]}
+        )
+
+    return AsyncLLMClient(
+        "stub",
+        api_token="stub",
+        max_concurrency=max_concurrency,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+class StubEmbeddings:
+    """Returns precomputed vectors for the benchmark's query strings."""
+
+    def __init__(self, vectors: dict):
+        self.vectors = vectors
+
+    def embed_query(self, text: str) -> list:
+        return self.vectors[text].tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self.embed_query(text) for text in texts]
+
+
+def write_store(df, vectors: np.ndarray, folder: str, config: IndexConfig) -> dict:
+    """Builds the index and offset-layout metadata store, timing each step."""
+    start = time.perf_counter()
+    index = build_index(vectors, config)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_index(index, folder, config, vectors)
+    MetadataStore.from_offsets(
+        np.arange(len(df)),
+        np.zeros(len(df), dtype=np.int64),
+        df[Columns.COMPLAINT.value].str.len().to_numpy(),
+        df,
+    ).write(folder)
+    write_seconds = time.perf_counter() - start
+
+    return {
+        "build_seconds": round(build_seconds, 3),
+        "write_seconds": round(write_seconds, 3),
+        "index_mb": round(
+            os.path.getsize(os.path.join(folder, FAISS_INDEX_FILE_NAME)) / 2**20, 1
+        ),
+        "metadata_mb": round(
+            sum(
+                os.path.getsize(os.path.join(folder, name))
+                for name in (METADATA_STORE_FILE_NAME, NARRATIVE_STORE_FILE_NAME)
+            )
+            / 2**20,
+            1,
+        ),
+    }
+
+
+def measure_load(folder: str, mmap: bool = True) -> tuple:
+    """
+    Returns:
+        tuple: (faiss.Index, load seconds)
+    """
+    start = time.perf_counter()
+    index, _ = read_index(folder, mmap=mmap)
+    MetadataStore.open(folder)
+    return index, round(time.perf_counter() - start, 3)
+
+
+def measure_qps(index, queries: np.ndarray, k: int, threads: int) -> dict:
+    """
+    Single-query searches spread over a thread pool. FAISS is limited to one
+    OpenMP thread meanwhile, so the threads measure request-level parallelism.
+    """
+    import faiss
+
+    omp_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1)
+    try:
+        latencies = []
+
+        def run(shard):
+            for query in shard:
+                start = time.perf_counter()
+                index.search(query.reshape(1, -1), k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(run, [queries[i::threads] for i in range(threads)]))
+        elapsed = time.perf_counter() - start
+    finally:
+        faiss.omp_set_num_threads(omp_threads)
+
+    return {
+        "threads": threads,
+        "qps": round(len(queries) / elapsed, 1),
+        **percentiles(latencies),
+    }
+
+
+def open_rag(folder: str, embeddings, llm_client, concurrency: int):
+    """
+    Builds a RAGSystem from benchmark parts. RAGSystem() itself loads the
+    HuggingFace model and endpoint, which the benchmark replaces with stubs.
+    """
+    from src.rag_system import RAGSystem
+
+    return RAGSystem.from_parts(
+        folder,
+        embeddings,
+        llm_client,
+        # A threshold above 1 never reuses an answer
+        answer_cache_threshold=1.1,
+        search_workers=concurrency,
+        max_concurrent_llm=concurrency,
+        hybrid=False,
+    )
+
+
+def measure_rag(
+    folder: str,
+    queries: np.ndarray,
+    k: int,
+    concurrency: int = 8,
+    llm_delay_ms: float = 0.0,
+) -> dict:
+    """End-to-end aanswer latency and throughput with the stub LLM."""
+    texts = [f"benchmark question {i}" for i in range(len(queries))]
+    rag = open_rag(
+        folder,
+        StubEmbeddings(dict(zip(texts, queries))),
+        stub_llm_client(llm_delay_ms, concurrency),
+        concurrency,
+    )
+
+    async def run():
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def answer(text):
+            async with semaphore:
+                start = time.perf_counter()
+                await rag.aanswer(text, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(answer(text) for text in texts))
+        elapsed = time.perf_counter() - start
+        await rag.llm_client.aclose()
+        return latencies, elapsed
+
+    latencies, elapsed = asyncio.run(run())
+    return {
+        "concurrency": concurrency,
+        "llm_delay_ms": llm_delay_ms,
+        "questions_per_second": round(len(texts) / elapsed, 1),
+        **percentiles(latencies),
+    }
+
+
+def run_benchmark(
+    n_chunks: int,
+    config: IndexConfig,
+    dim: int = SYNTHETIC_DIM,
+    n_queries: int = 1000,
+    k: int = 5,
+    threads: list = THREAD_SWEEP,
+    rag_concurrency: int = 8,
+    llm_delay_ms: float = 0.0,
+    workdir: str = None,
+) -> dict:
+    """
+    Benchmarks one corpus size: synthetic corpus and vectors, index build and
+    write, load, single-thread latency percentiles and recall@k against exact
+    search, QPS per thread count, and end-to-end RAG answers with a stub LLM.
+    Returns:
+        dict: JSON-serializable results.
+    """
+    print(f"Benchmarking {config.index_type} on {n_chunks} chunks")
+    start = time.perf_counter()
+    df = generate_complaints(n_chunks)
+    vectors = synthetic_embeddings(df, dim)
+    queries = synthetic_queries(vectors, n_queries)
+    result = {
+        "chunks": n_chunks,
+        "dim": dim,
+        "index_type": config.index_type,
+        "vector_dtype": config.vector_dtype,
+        "rerank_factor": config.rerank_factor,
+        "k": k,
+        "corpus_seconds": round(time.perf_counter() - start, 3),
+    }
+
+    with tempfile.TemporaryDirectory(dir=workdir) as folder:
+        result.update(write_store(df, vectors, folder, config))
+        del df
+
+        index, result["load_seconds"] = measure_load(folder)
+        if (
+            config.index_type == Index_Types.FLAT.value
+            and config.vector_dtype == Vector_Dtypes.FLOAT32.value
+        ):
+            baseline = index
+        else:
+            baseline = build_index(vectors, IndexConfig())
+        del vectors
+
+        search = evaluate_index(
+            index,
+            baseline,
+            queries,
+            k,
+            load_rerank_vectors(folder, index.ntotal),
+            config.rerank_factor,
+        )
+        result["recall_at_k"] = round(search.pop("recall_at_k"), 4)
+        result["search"] = {name: round(value, 3) for name, value in search.items()}
+        del baseline
+
+        result["throughput"] = [
+            measure_qps(index, queries, k, n_threads) for n_threads in threads
+        ]
+        result["rag"] = measure_rag(
+            folder, queries[:200], k, rag_concurrency, llm_delay_ms
+        )
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_isolated(*args, **kwargs) -> dict:
+    """
+    Runs run_benchmark in a fresh process, so peak_rss_mb is the peak of
+    that corpus size alone rather than of every size benchmarked before it.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_benchmark, *args, **kwargs).result()
+
+
+def summary_rows(results: list) -> list:
+    return [
+        {
+            "chunks": result["chunks"],
+            "build_s": result["build_seconds"],
+            "load_s": result["load_seconds"],
+            "p50_ms": result["search"]["p50_ms"],
+            "p95_ms": result["search"]["p95_ms"],
+            "p99_ms": result["search"]["p99_ms"],
+            "max_qps": max(row["qps"] for row in result["throughput"]),
+            f"recall@{result['k']}": result["recall_at_k"],
+            "rag_p95_ms": result["rag"]["p95_ms"],
+            "peak_rss_mb": result["peak_rss_mb"],
+        }
+        for result in results
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark index build, load, search latency, throughput, "
+        "recall and end-to-end RAG latency on a synthetic complaint corpus."
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", default=list(BENCHMARK_SIZES), choices=BENCHMARK_SIZES
+    )
+    parser.add_argument(
+        "--index-type",
+        default=Index_Types.IVF_FLAT.value,
+        choices=[t.value for t in Index_Types],
+    )
+    parser.add_argument("--nprobe", type=int, default=IndexConfig.nprobe)
+    parser.add_argument("--ef-search", type=int, default=IndexConfig.ef_search)
+    parser.add_argument(
+        "--vector-dtype",
+        choices=[d.value for d in Vector_Dtypes],
+        default=IndexConfig.vector_dtype,
+    )
+    parser.add_argument("--rerank-factor", type=int, default=IndexConfig.rerank_factor)
+    parser.add_argument("--dim", type=int, default=SYNTHETIC_DIM)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threads", type=int, nargs="+", default=THREAD_SWEEP)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--llm-delay-ms", type=float, default=0.0, help="Stub LLM response time"
+    )
+    parser.add_argument("--output", default="reports/benchmark.json")
+    args = parser.parse_args()
+
+    config = IndexConfig(
+        index_type=args.index_type,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search,
+        vector_dtype=args.vector_dtype,
+        rerank_factor=args.rerank_factor,
+    )
+    results = [
+        run_isolated(
+            BENCHMARK_SIZES[size],
+            config,
+            args.dim,
+            args.queries,
+            args.k,
+            args.threads,
+            args.concurrency,
+            args.llm_delay_ms,
+        )
+        for size in args.sizes
+    ]
+
+    print(tabulate(summary_rows(results), headers="keys", tablefmt="psql"))
+
+    import faiss
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "faiss": faiss.__version__,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved benchmark to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
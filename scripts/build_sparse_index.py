@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import EMBEDDED_VECTOR_STORE_PATH, Columns, Processed_Columns
+from src.data.loader import DataLoader
+from src.sparse_index import SparseIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the BM25 index used for hybrid retrieval from the cleaned complaints."
+    )
+    parser.add_argument("--path", default=EMBEDDED_VECTOR_STORE_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"Error: No vector store at {args.path}. Run prepare_parquet.py first")
+        return
+
+    start = time.perf_counter()
+    chunks = DataLoader().stream_from_parquet(
+        columns=[
+            Columns.COMPLAINT_ID.value,
+            Processed_Columns.NORMALIZED_COMPLAINT.value,
+        ],
+    )
+    sparse_index = SparseIndex.build(
+        (
+            chunk[Columns.COMPLAINT_ID.value].tolist(),
+            chunk[Processed_Columns.NORMALIZED_COMPLAINT.value].tolist(),
+        )
+        for chunk in chunks
+    )
+    sparse_index.write(args.path)
+    print(
+        f"Indexed {len(sparse_index)} complaints and {len(sparse_index.vocabulary)} terms "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
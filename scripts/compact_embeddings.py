@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import (
+    EMBEDDED_COMPLAINTS_FILE_PATH,
+    Vector_Dtypes,
+)
+from src.embedding_store import load_embeddings, save_embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rewrite the pre-computed embeddings with fixed-size float16 or int8 vectors."
+    )
+    parser.add_argument("--input", default=EMBEDDED_COMPLAINTS_FILE_PATH)
+    parser.add_argument("--output", default=None, help="Defaults to the input file")
+    parser.add_argument(
+        "--dtype",
+        choices=[d.value for d in Vector_Dtypes],
+        default=Vector_Dtypes.FLOAT16.value,
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: File not found at {args.input}")
+        return
+
+    start = time.perf_counter()
+    before = os.path.getsize(args.input)
+    df, vectors = load_embeddings(args.input)
+    output = args.output or args.input
+    save_embeddings(df, output, args.dtype, vectors)
+    print(
+        f"Wrote {len(df)} {args.dtype} embeddings to {output}: "
+        f"{before / 2**20:.1f} MB -> {os.path.getsize(output) / 2**20:.1f} MB "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,37 @@ PROCESSED_FILE_DIR = "../data/processed/"
 
 RAW_COMPLAINTS_DATA_FILE_NAME = "complaints.csv"
 CLENAED_COMPLAINTS_DATA_FILE_NAME = "complaints_clean.csv"
+CLEANED_COMPLAINTS_DATASET_DIR_NAME = "complaints_clean"
 
 VECTOR_STORE_PATH = "../vector_store"
 EMBEDDED_VECTOR_STORE_PATH = "../vector_store/embedded"
 EMBEDDED_COMPLAINTS_FILE_PATH = "../data/raw/complaint_embeddings.parquet"
+EMBEDDING_CACHE_PATH = "../vector_store/cache/embeddings.db"
+PIPELINE_ARTIFACTS_PATH = "../data/pipeline"
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Answer model, served by the HF Inference API the sync path's HuggingFaceEndpoint
+# calls; the async client posts to the same backend's chat completions route
+LLM_REPO_ID = "HuggingFaceH4/zephyr-7b-beta"
+LLM_API_URL = (
+    f"https://router.huggingface.co/hf-inference/models/{LLM_REPO_ID}"
+    "/v1/chat/completions"
+)
+LLM_TEMPERATURE = 0.5
+LLM_MAX_TOKENS = 512
+
+FAISS_INDEX_FILE_NAME = "index.faiss"
+INDEX_CONFIG_FILE_NAME = "index_config.json"
+METADATA_STORE_FILE_NAME = "metadata.arrow"
+MANIFEST_FILE_NAME = "manifest.json"
+TOMBSTONES_FILE_NAME = "tombstones.npy"
+COMPLAINT_HASHES_FILE_NAME = "complaint_hashes.parquet"
+SPARSE_INDEX_DIR_NAME = "bm25"
+NARRATIVE_STORE_FILE_NAME = "narratives.arrow"
+SHARDS_DIR_NAME = "shards"
+SHARD_MANIFEST_FILE_NAME = "shards.json"
+RERANK_VECTORS_FILE_NAME = "vectors.npy"
 
 
 class Columns(Enum):
@@ -36,17 +63,103 @@ class Processed_Columns(Enum):
     WORD_COUNT = "Word Count"
     NORMALIZED_COMPLAINT = "Normalized Complaint"
     CLEANED_COMPLAINT = "Cleaned Complaint"
+    RECEIVED_YEAR = "Received year"
 
 
 class Embedding_Columns(Enum):
     ID = "id"
     DOCUMENT = "document"
     EMBEDDING = "embedding"
+    EMBEDDING_SCALE = "embedding_scale"
     METADATA = "metadata"
 
 
+class Metadata_Columns(Enum):
+    ID = "id"
+    PRODUCT = "product"
+    SUB_PRODUCT = "sub_product"
+    ISSUE = "issue"
+    COMPANY = "company"
+    STATE = "state"
+    DATE_RECEIVED = "date_received"
+
+
+# Raw complaint column each chunk metadata field is taken from
+metadata_source_columns = {
+    Metadata_Columns.ID.value: Columns.COMPLAINT_ID.value,
+    Metadata_Columns.PRODUCT.value: Columns.PRODUCT.value,
+    Metadata_Columns.SUB_PRODUCT.value: Columns.SUB_PRODUCT.value,
+    Metadata_Columns.ISSUE.value: Columns.ISSUE.value,
+    Metadata_Columns.COMPANY.value: Columns.COMPANY.value,
+    Metadata_Columns.STATE.value: Columns.STATE.value,
+    Metadata_Columns.DATE_RECEIVED.value: Columns.DATE_RECEIVED.value,
+}
+
+
+class Index_Types(Enum):
+    FLAT = "flat"
+    IVF_FLAT = "ivf_flat"
+    IVF_PQ = "ivf_pq"
+    HNSW = "hnsw"
+
+
+# Element type of stored embeddings and of scalar-quantized index codes
+class Vector_Dtypes(Enum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+
+
+# Metadata field a sharded vector store is partitioned by
+class Shard_Keys(Enum):
+    PRODUCT = "product"
+    YEAR = "year"
+
+
+# Stages of the ingestion-to-index pipeline, in order
+class Pipeline_Stages(Enum):
+    LOAD = "load"
+    FILTER = "filter"
+    CLEAN = "clean"
+    CHUNK = "chunk"
+    EMBED = "embed"
+    INDEX = "index"
+
+
+# What an LLM request does when every concurrent slot is busy
+class Backpressure_Policies(Enum):
+    WAIT = "wait"
+    REJECT = "reject"
+    TIMEOUT = "timeout"
+
+
 date_columns = [Columns.DATE_RECEIVED.value, Columns.DATE_SENT_TO_COMPANY.value]
 
+# Columns read by the streaming ingestion path; everything else in the raw dump is dropped
+ingestion_columns = [
+    Columns.COMPLAINT_ID.value,
+    Columns.DATE_RECEIVED.value,
+    Columns.PRODUCT.value,
+    Columns.SUB_PRODUCT.value,
+    Columns.ISSUE.value,
+    Columns.COMPANY.value,
+    Columns.STATE.value,
+    Columns.COMPLAINT.value,
+]
+
+# Low-cardinality columns stored as categoricals to keep chunks small
+categorical_columns = [
+    Columns.PRODUCT.value,
+    Columns.ISSUE.value,
+    Columns.STATE.value,
+    Columns.COMPANY.value,
+]
+
+ingestion_dtypes = {col: "category" for col in categorical_columns}
+
+# Hive partition keys of the processed Parquet dataset, outermost first
+partition_columns = [Columns.PRODUCT.value, Processed_Columns.RECEIVED_YEAR.value]
+
 product_categories = [
     "Credit card",
     "Payday loan, title loan, or personal loan",
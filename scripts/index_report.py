@@ -0,0 +1,126 @@
+import sys
+import os
+import json
+import argparse
+from dataclasses import replace
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import (
+    EMBEDDED_COMPLAINTS_FILE_PATH,
+    Index_Types,
+    Vector_Dtypes,
+)
+from src.embedding_store import load_embedding_matrix
+from src.index_builder import (
+    IndexConfig,
+    apply_search_params,
+    build_index,
+    embeddings_to_matrix,
+    evaluate_index,
+    sample_training_matrix,
+)
+
+NPROBE_SWEEP = [1, 4, 16, 64]
+EF_SEARCH_SWEEP = [16, 32, 64, 128]
+
+# Candidates per neighbour re-ranked with float32 vectors in the quantized rows
+REPORT_RERANK_FACTOR = 4
+
+
+def build_report(embeddings: pd.Series, n_queries: int = 200, k: int = 5) -> list:
+    """
+    Builds every index type over the same vectors and measures recall@k and
+    latency against the exact flat index, sweeping nprobe / efSearch, and
+    the float16 / int8 scalar-quantized flat indexes with and without
+    float32 re-ranking.
+    Args:
+        embeddings (pd.Series or np.ndarray): Column holding one vector per row,
+            or an (n, dim) matrix.
+        n_queries (int): Number of stored vectors reused as queries.
+        k (int): Number of neighbours compared.
+    Returns:
+        list: One dict per (index type, search parameter) combination.
+    """
+    queries = sample_training_matrix(embeddings, n_queries, seed=7)
+    baseline = build_index(embeddings, IndexConfig())
+
+    rows = [
+        {
+            "index_type": Index_Types.FLAT.value,
+            "param": "-",
+            **evaluate_index(baseline, baseline, queries, k),
+        }
+    ]
+
+    sweeps = {
+        Index_Types.IVF_FLAT.value: ("nprobe", NPROBE_SWEEP),
+        Index_Types.IVF_PQ.value: ("nprobe", NPROBE_SWEEP),
+        Index_Types.HNSW.value: ("ef_search", EF_SEARCH_SWEEP),
+    }
+    for index_type, (param, values) in sweeps.items():
+        config = IndexConfig(index_type=index_type)
+        index = build_index(embeddings, config)
+        for value in values:
+            apply_search_params(index, replace(config, **{param: value}))
+            rows.append(
+                {
+                    "index_type": index_type,
+                    "param": f"{param}={value}",
+                    **evaluate_index(index, baseline, queries, k),
+                }
+            )
+
+    vectors = (
+        embeddings
+        if isinstance(embeddings, np.ndarray)
+        else embeddings_to_matrix(embeddings)
+    )
+    for dtype in (Vector_Dtypes.FLOAT16.value, Vector_Dtypes.INT8.value):
+        index = build_index(embeddings, IndexConfig(vector_dtype=dtype))
+        for factor in (0, REPORT_RERANK_FACTOR):
+            rows.append(
+                {
+                    "index_type": Index_Types.FLAT.value,
+                    "param": f"{dtype}, rerank x{factor}" if factor else dtype,
+                    **evaluate_index(index, baseline, queries, k, vectors, factor),
+                }
+            )
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report recall vs latency of each index type against the flat index."
+    )
+    parser.add_argument("--path", default=EMBEDDED_COMPLAINTS_FILE_PATH)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", help="Optional JSON file for the report rows")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"Error: File not found at {args.path}")
+        return
+
+    rows = build_report(load_embedding_matrix(args.path), args.queries, args.k)
+
+    print(tabulate(rows, headers="keys", tablefmt="psql", floatfmt=".3f"))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
 import sys
 import os
+import argparse
 from pathlib import Path
-import pandas as pd
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 
 current_file_path = Path(__file__).resolve()
 project_root = current_file_path.parent.parent
@@ -15,63 +13,113 @@ if str(project_root) not in sys.path:
 from scripts.constants import (
     EMBEDDED_COMPLAINTS_FILE_PATH,
     VECTOR_STORE_PATH,
-    Embedding_Columns,
+    Index_Types,
+    Shard_Keys,
+    Vector_Dtypes,
 )
+from src.embedding_store import load_embeddings
+from src.incremental_index import reset_incremental_state
+from src.index_builder import IndexConfig, build_index, write_index
+from src.metadata_store import MetadataStore
+from src.sharded_index import clear_shards, write_shards
 
 OUTPUT_PATH = os.path.join(VECTOR_STORE_PATH, "embedded")
 
 
-def main():
+def parse_args() -> tuple:
+    defaults = IndexConfig()
+    parser = argparse.ArgumentParser(
+        description="Build the complaint FAISS index from pre-computed embeddings."
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=[t.value for t in Index_Types],
+        default=defaults.index_type,
+    )
+    parser.add_argument("--nlist", type=int, default=defaults.nlist)
+    parser.add_argument("--pq-m", type=int, default=defaults.pq_m)
+    parser.add_argument("--pq-nbits", type=int, default=defaults.pq_nbits)
+    parser.add_argument("--hnsw-m", type=int, default=defaults.hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=defaults.ef_construction)
+    parser.add_argument("--nprobe", type=int, default=defaults.nprobe)
+    parser.add_argument("--ef-search", type=int, default=defaults.ef_search)
+    parser.add_argument(
+        "--vector-dtype",
+        choices=[d.value for d in Vector_Dtypes],
+        default=defaults.vector_dtype,
+        help="Scalar-quantize index vectors to float16 or int8",
+    )
+    parser.add_argument(
+        "--rerank-factor",
+        type=int,
+        default=defaults.rerank_factor,
+        help="Re-rank k * factor quantized hits with exact float32 vectors",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=[k.value for k in Shard_Keys],
+        default=None,
+        help="Build one index per product or year instead of a single index",
+    )
+    parser.add_argument(
+        "--shards",
+        nargs="+",
+        default=None,
+        help="Rebuild only these shards (names or key values), keeping the rest",
+    )
+    args = vars(parser.parse_args())
+    shard_by, shards = args.pop("shard_by"), args.pop("shards")
+    if shards and not shard_by:
+        parser.error("--shards requires --shard-by")
+    return IndexConfig(**args), shard_by, shards
+
+
+def main(config: IndexConfig = None, shard_by: str = None, shards: list = None):
+    config = config or IndexConfig()
     print(f"Loading data from {EMBEDDED_COMPLAINTS_FILE_PATH}...")
 
     if not os.path.exists(EMBEDDED_COMPLAINTS_FILE_PATH):
         print(f"Error: File not found at {EMBEDDED_COMPLAINTS_FILE_PATH}")
         return
 
-    df = pd.read_parquet(EMBEDDED_COMPLAINTS_FILE_PATH)
-
-    # --- 1. Prepare Data for FAISS ---
-    text_embeddings = []
-    metadatas = []
-
-    doc_col = Embedding_Columns.DOCUMENT.value
-
-    for index, row in df.iterrows():
-        text = row[doc_col]
-        vector = row[Embedding_Columns.EMBEDDING.value]
-
-        # Ensure metadata is a dict
-        metadata = (
-            row[Embedding_Columns.METADATA.value]
-            if Embedding_Columns.METADATA.value in df.columns
-            else {}
+    # Fixed-size embedding columns are viewed in place, not unpacked row by row
+    df, vectors = load_embeddings(EMBEDDED_COMPLAINTS_FILE_PATH)
+
+    # Chunk text and metadata go to a columnar file addressed by vector row id,
+    # replacing the pickled langchain docstore
+    metadata_store = MetadataStore.from_frame(df)
+
+    if shard_by:
+        # One index per shard, each built, loaded and rebuilt on its own
+        print(f"Building {config.index_type} FAISS shards by {shard_by}...")
+        write_shards(
+            vectors,
+            metadata_store,
+            OUTPUT_PATH,
+            config,
+            shard_by,
+            only=shards,
         )
-        if not isinstance(metadata, dict):
-            metadata = {}
-
-        text_embeddings.append((text, vector))
-        metadatas.append(metadata)
-        complaint_id = row.get(Embedding_Columns.ID.value, str(index))
-        metadata[Embedding_Columns.ID.value] = complaint_id
-
-    # --- 2. Initialize the Embedding Object ---
-    print(" Loading embedding model wrapper...")
-    embedding_model = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
+        print("Done! You can now run your RAG system.")
+        return
 
-    # --- 3. Build the Index ---
-    print(f"Building FAISS index from {len(text_embeddings)} pre-computed vectors...")
-    vector_store = FAISS.from_embeddings(
-        text_embeddings=text_embeddings, embedding=embedding_model, metadatas=metadatas
+    # --- 1. Build the Index ---
+    # Vectors are converted to float32 batch by batch and added directly,
+    # instead of converting every row into Python tuples first
+    print(
+        f"Building {config.index_type} FAISS index from {len(df)} pre-computed vectors..."
     )
+    index = build_index(vectors, config)
 
-    # --- 4. Save to Disk ---
+    # --- 2. Save to Disk ---
     print(f"Saving index to '{OUTPUT_PATH}'...")
-    vector_store.save_local(OUTPUT_PATH)
+    write_index(index, OUTPUT_PATH, config, vectors)
+    metadata_store.write(OUTPUT_PATH)
+    reset_incremental_state(OUTPUT_PATH, index.ntotal)
+    clear_shards(OUTPUT_PATH)
 
     print("Done! You can now run your RAG system.")
 
 
 if __name__ == "__main__":
-    main()
+    main(*parse_args())
@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import argparse
+from pathlib import Path
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import (
+    EMBEDDED_VECTOR_STORE_PATH,
+    EMBEDDING_CACHE_PATH,
+    PIPELINE_ARTIFACTS_PATH,
+    RAW_COMPLAINTS_DATA_FILE_NAME,
+    RAW_FILE_DIR,
+    Index_Types,
+    Vector_Dtypes,
+)
+from src.index_builder import IndexConfig
+from src.pipeline import IngestionPipeline
+
+
+def main():
+    defaults = IndexConfig()
+    parser = argparse.ArgumentParser(
+        description="Build the vector store from the raw complaint dump: load, filter, "
+        "clean, chunk, embed and index, resuming from checkpointed stages."
+    )
+    parser.add_argument("--input", default=RAW_FILE_DIR + RAW_COMPLAINTS_DATA_FILE_NAME)
+    parser.add_argument("--artifacts", default=PIPELINE_ARTIFACTS_PATH)
+    parser.add_argument("--output", default=EMBEDDED_VECTOR_STORE_PATH)
+    parser.add_argument(
+        "--chunk-rows", type=int, default=10000, help="Complaints per part"
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument(
+        "--clean-jobs", type=int, default=1, help="Processes for text cleaning"
+    )
+    parser.add_argument(
+        "--embed-workers", type=int, default=1, help="Processes for embedding"
+    )
+    parser.add_argument("--embedding-cache", default=EMBEDDING_CACHE_PATH)
+    parser.add_argument(
+        "--queue-size", type=int, default=4, help="Parts buffered between stages"
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=[t.value for t in Index_Types],
+        default=defaults.index_type,
+    )
+    parser.add_argument("--nlist", type=int, default=defaults.nlist)
+    parser.add_argument("--nprobe", type=int, default=defaults.nprobe)
+    parser.add_argument(
+        "--vector-dtype",
+        choices=[d.value for d in Vector_Dtypes],
+        default=defaults.vector_dtype,
+    )
+    parser.add_argument("--rerank-factor", type=int, default=defaults.rerank_factor)
+    parser.add_argument("--report", help="Write the stage report as JSON here")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: File not found at {args.input}")
+        return
+
+    from src.embedding_engine import EmbeddingEngine
+    from src.text_processor import TextProcessor
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.embedding_cache)), exist_ok=True)
+    pipeline = IngestionPipeline(
+        args.input,
+        artifacts_path=args.artifacts,
+        output_path=args.output,
+        chunk_rows=args.chunk_rows,
+        text_processor=TextProcessor(args.chunk_size, args.chunk_overlap),
+        engine=EmbeddingEngine(
+            n_workers=args.embed_workers, cache_path=args.embedding_cache
+        ),
+        index_config=IndexConfig(
+            index_type=args.index_type,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            vector_dtype=args.vector_dtype,
+            rerank_factor=args.rerank_factor,
+        ),
+        n_jobs=args.clean_jobs,
+        queue_size=args.queue_size,
+    )
+    report = pipeline.run()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import json
+import argparse
+from pathlib import Path
+
+current_file_path = Path(__file__).resolve()
+project_root = current_file_path.parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.constants import EMBEDDED_VECTOR_STORE_PATH, ingestion_columns
+from src.data.loader import DataLoader
+from src.incremental_index import DEFAULT_COMPACT_RATIO, IncrementalIndexer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply the complaint feed to the vector store without rebuilding it."
+    )
+    parser.add_argument("--path", default=EMBEDDED_VECTOR_STORE_PATH)
+    parser.add_argument(
+        "--load-clean",
+        action="store_true",
+        help="Read the cleaned complaints dataset instead of the raw dump",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="The feed only holds new or edited complaints; do not delete missing ones",
+    )
+    parser.add_argument(
+        "--delete", action="append", default=[], help="Complaint ID to delete"
+    )
+    parser.add_argument("--compact-ratio", type=float, default=DEFAULT_COMPACT_RATIO)
+    parser.add_argument("--compact", action="store_true", help="Compact now")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"Error: No vector store at {args.path}. Run prepare_parquet.py first")
+        return
+
+    loader = DataLoader()
+    if args.load_clean:
+        chunks = loader.stream_from_parquet(columns=ingestion_columns)
+    else:
+        chunks = loader.stream_from_csv()
+    report = IncrementalIndexer(args.path, compact_ratio=args.compact_ratio).update(
+        chunks,
+        snapshot=not args.delta,
+        deleted_ids=args.delete,
+        force_compact=args.compact,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
 import re
 import string
-import nltk
+from functools import lru_cache
 
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
+# NLTK data packages used by tokenize_and_lemmatize, keyed by their path in nltk_data
+NLTK_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "wordnet": "corpora/wordnet",
+    "stopwords": "corpora/stopwords",
+}
 
-nltk.download("punkt_tab")
-nltk.download("wordnet")
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+HTML_TAG_PATTERN = re.compile(r"<.*?>")
+
+# Common narrative "fluff" removed by clean_text, in the order it is applied
+BOILERPLATE_PHRASES = [
+    r"i am writing to file a complaint regarding",
+    r"to whom it may concern",
+    r"please find attached",
+    r"thank you for your time",
+    r"i want to start out this complaint by stating",
+    r"i had a friend help me write this complaint",
+    r"i m writing to complain about",
+]
+BOILERPLATE_PATTERNS = [re.compile(pattern) for pattern in BOILERPLATE_PHRASES]
+# Single merged pattern used to skip the per-phrase passes when nothing matches
+ANY_BOILERPLATE_PATTERN = re.compile("|".join(BOILERPLATE_PHRASES))
+
+PUNCTUATION_TABLE = str.maketrans(string.punctuation, " " * len(string.punctuation))
 
 
 def clean_text(text: str) -> str:
@@ -24,28 +43,21 @@ def clean_text(text: str) -> str:
     text = str(text).lower()
 
     # 2. Remove URLs/Hyperlinks
-    text = re.sub(r"https?://\S+|www\.\S+", "", text)
+    text = URL_PATTERN.sub("", text)
 
     # 3. Remove HTML tags (common in scraped narratives)
-    text = re.sub(r"<.*?>", "", text)
+    text = HTML_TAG_PATTERN.sub("", text)
 
     # 4. Remove boilerplate phrases
-    # Add common narrative "fluff" to this list
-    boilerplate = [
-        r"i am writing to file a complaint regarding",
-        r"to whom it may concern",
-        r"please find attached",
-        r"thank you for your time",
-        r"i want to start out this complaint by stating",
-        r"i had a friend help me write this complaint",
-        r"i m writing to complain about",
-    ]
-    for pattern in boilerplate:
-        text = re.sub(pattern, "", text)
+    # Phrases are still removed one after another so the output matches the
+    # sequential substitution; most narratives contain none and skip the loop
+    if ANY_BOILERPLATE_PATTERN.search(text):
+        for pattern in BOILERPLATE_PATTERNS:
+            text = pattern.sub("", text)
 
     # 5. Remove special characters and punctuation
     # We keep spaces and alphanumeric characters
-    text = re.sub(f"[{re.escape(string.punctuation)}]", " ", text)
+    text = text.translate(PUNCTUATION_TABLE)
 
     # 6. Normalize Whitespace
     # Removes extra spaces, tabs, and newlines resulting from previous steps
@@ -54,6 +66,63 @@ def clean_text(text: str) -> str:
     return text
 
 
+@lru_cache(maxsize=1)
+def ensure_nltk_resources() -> None:
+    """
+    Makes sure the NLTK data packages are available, downloading only the
+    ones that are missing. When everything is already installed this only
+    checks the local nltk_data paths and never touches the network.
+    Runs once per process.
+    """
+    import nltk
+
+    for package, resource_path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource_path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+
+
+@lru_cache(maxsize=1)
+def get_lemmatizer():
+    """Returns a process-wide WordNetLemmatizer instance."""
+    from nltk.stem import WordNetLemmatizer
+
+    ensure_nltk_resources()
+    return WordNetLemmatizer()
+
+
+@lru_cache(maxsize=1)
+def get_stop_words() -> frozenset:
+    """Returns the English stopword set, loaded once per process."""
+    from nltk.corpus import stopwords
+
+    ensure_nltk_resources()
+    return frozenset(stopwords.words("english"))
+
+
+def preload_nltk() -> None:
+    """
+    Loads everything tokenize_and_lemmatize needs, downloading missing NLTK
+    data, so a service pays for it at startup rather than on a request.
+    """
+    from nltk.tokenize import word_tokenize
+
+    get_stop_words()
+    # WordNet and the punkt tokenizer are only read on first use
+    get_lemmatizer().lemmatize("fees")
+    word_tokenize("fees")
+
+
+@lru_cache(maxsize=2**18)
+def lemmatize_token(token: str) -> str:
+    """
+    Lemmatizes a single token, caching the result since narratives share
+    a small vocabulary.
+    """
+    return get_lemmatizer().lemmatize(token)
+
+
 def tokenize_and_lemmatize(text: str) -> str:
     """
     Tokenizes and lemmatizes the input text.
@@ -62,15 +131,16 @@ def tokenize_and_lemmatize(text: str) -> str:
     Returns:
         str: The processed text after tokenization and lemmatization.
     """
-    lemmatizer = WordNetLemmatizer()
-    stop_words = set(stopwords.words("english"))
+    from nltk.tokenize import word_tokenize
+
+    stop_words = get_stop_words()
 
     # Tokenize the text
     tokens = word_tokenize(text)
 
     # Lemmatize and remove stop words
     processed_tokens = [
-        lemmatizer.lemmatize(token) for token in tokens if token not in stop_words
+        lemmatize_token(token) for token in tokens if token not in stop_words
     ]
 
     return " ".join(processed_tokens)
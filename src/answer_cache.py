@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+from scripts.constants import Metadata_Columns
+
+
+def context_key(documents: list) -> str:
+    """
+    Identifies a retrieved-context set by the ids and text of its chunks,
+    independent of their order.
+    """
+    parts = sorted(
+        f"{doc.metadata.get(Metadata_Columns.ID.value)}:"
+        f"{hashlib.sha1(doc.page_content.encode()).hexdigest()}"
+        for doc in documents
+    )
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CachedAnswer:
+    """
+    A generated answer with the provenance needed to decide whether it may
+    be reused: which index build and model produced it, from which context.
+    """
+
+    entry_id: str
+    vector: np.ndarray
+    context_key: str
+    answer: str
+    sources: list
+    index_version: str
+    model: str
+    created: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+
+class SemanticAnswerCache:
+    """
+    Cache of LLM answers looked up by query-embedding similarity.
+    An entry is reused only when the new query is at least `threshold`
+    cosine-similar to the cached one, the retrieved context set is the same,
+    and it was produced for the current index version and model, so a
+    paraphrased repeat question skips the LLM call.
+    Entries are evicted least-recently-used beyond `max_entries` and expire
+    after `ttl_seconds`. With a path, entries persist in SQLite across restarts,
+    and those of the current index version are loaded back.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 5000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        path: Optional[str] = None,
+        index_version: Optional[str] = None,
+    ):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity of a reused answer's query.
+            max_entries (int): Answers kept in memory.
+            ttl_seconds (float): Age after which an answer is dropped.
+            path (str, optional): SQLite file persisting answers.
+            index_version (str, optional): Index version whose persisted answers are
+                loaded. Defaults to loading them once `invalidate` sets it.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._by_context = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.index_version = index_version
+
+        self._conn = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "entry_id TEXT PRIMARY KEY, vector BLOB, context_key TEXT, "
+                "answer TEXT, sources TEXT, index_version TEXT, model TEXT, "
+                "created REAL, last_used REAL)"
+            )
+            self._conn.commit()
+            if index_version is not None:
+                self._load()
+
+    def _load(self):
+        """Loads the most recently used persisted answers of index_version."""
+        self._conn.execute(
+            "DELETE FROM answers WHERE created < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT * FROM answers WHERE index_version = ? "
+            "ORDER BY last_used DESC LIMIT ?",
+            (self.index_version, self.max_entries),
+        ).fetchall()
+        # Oldest first, so the most recently used end up at the LRU tail
+        for row in reversed(rows):
+            entry_id, vector, key, answer, sources, version, model, created, used = row
+            if entry_id in self._entries:
+                continue
+            self._add(
+                CachedAnswer(
+                    entry_id=entry_id,
+                    vector=np.frombuffer(vector, dtype=np.float32),
+                    context_key=key,
+                    answer=answer,
+                    sources=json.loads(sources),
+                    index_version=version,
+                    model=model,
+                    created=created,
+                    last_used=used,
+                )
+            )
+
+    def _add(self, entry: CachedAnswer):
+        self._entries[entry.entry_id] = entry
+        self._by_context.setdefault(entry.context_key, set()).add(entry.entry_id)
+
+    def _forget(self, entry_id: str):
+        entry = self._entries.pop(entry_id)
+        ids = self._by_context.get(entry.context_key)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_context[entry.context_key]
+
+    def _remove(self, entry_id: str):
+        self._forget(entry_id)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM answers WHERE entry_id = ?", (entry_id,))
+
+    def lookup(
+        self, query_vector: np.ndarray, key: str, index_version: str, model: str
+    ) -> Optional[CachedAnswer]:
+        """
+        Returns the most similar reusable answer, or None.
+        Args:
+            query_vector (np.ndarray): The query embedding.
+            key (str): context_key of the retrieved documents.
+            index_version (str): Version of the index the context came from.
+            model (str): Identifier of the LLM that would answer.
+        """
+        query = _unit(query_vector)
+        now = time.time()
+
+        with self._lock:
+            candidates = [
+                self._entries[entry_id]
+                for entry_id in self._by_context.get(key, ())
+                if self._entries[entry_id].index_version == index_version
+                and self._entries[entry_id].model == model
+                and now - self._entries[entry_id].created <= self.ttl_seconds
+            ]
+            if candidates:
+                similarities = np.stack([c.vector for c in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry = candidates[best]
+                    entry.last_used = now
+                    self._entries.move_to_end(entry.entry_id)
+                    self.hits += 1
+                    if self._conn is not None:
+                        self._conn.execute(
+                            "UPDATE answers SET last_used = ? WHERE entry_id = ?",
+                            (now, entry.entry_id),
+                        )
+                        self._conn.commit()
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query_vector: np.ndarray,
+        key: str,
+        index_version: str,
+        model: str,
+        answer: str,
+        sources: list,
+    ) -> CachedAnswer:
+        """Caches a freshly generated answer with its provenance."""
+        entry = CachedAnswer(
+            entry_id=uuid.uuid4().hex,
+            vector=_unit(query_vector),
+            context_key=key,
+            answer=answer,
+            sources=list(sources),
+            index_version=index_version,
+            model=model,
+        )
+
+        with self._lock:
+            self._add(entry)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.entry_id,
+                        entry.vector.tobytes(),
+                        entry.context_key,
+                        entry.answer,
+                        json.dumps(entry.sources),
+                        entry.index_version,
+                        entry.model,
+                        entry.created,
+                        entry.last_used,
+                    ),
+                )
+                self._conn.commit()
+
+        return entry
+
+    def invalidate(self, index_version: str):
+        """
+        Switches to an index version: drops every in-memory answer produced
+        from another version and loads the persisted answers of this one.
+        Rows in the SQLite file are left alone, since workers sharing it may
+        still serve another version during a rolling update; they expire
+        after `ttl_seconds` and are never returned for another version.
+        """
+        with self._lock:
+            stale = [
+                entry_id
+                for entry_id, entry in self._entries.items()
+                if entry.index_version != index_version
+            ]
+            for entry_id in stale:
+                self._forget(entry_id)
+            if index_version != self.index_version:
+                self.index_version = index_version
+                if self._conn is not None:
+                    self._load()
+                while len(self._entries) > self.max_entries:
+                    self._forget(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
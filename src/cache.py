@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import date
+from typing import Callable, Optional
+import numpy as np
+
+# Disk entries beyond this count are pruned, oldest first
+DEFAULT_MAX_DISK_ENTRIES = 100000
+
+# How many writes between disk pruning passes
+DISK_PRUNE_INTERVAL = 500
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases and collapses whitespace so trivially different repeats share a key."""
+    return " ".join(query.lower().split())
+
+
+def hash_vector(vector: np.ndarray) -> str:
+    """Stable hash of a float32 vector's bytes."""
+    return hashlib.sha1(
+        np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+    ).hexdigest()
+
+
+def make_key(*parts) -> str:
+    """
+    Builds a cache key from JSON-serializable parts. Dataclasses (such as
+    SearchFilters) and dates are converted so equal values give equal keys.
+    """
+
+    def default(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        if hasattr(value, "__dataclass_fields__"):
+            return asdict(value)
+        raise TypeError(f"Cannot build a cache key from {type(value)}")
+
+    payload = json.dumps(parts, default=default, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    SQLite-backed cache tier shared by every process that opens the same
+    file, such as several Streamlit workers on one host.
+    """
+
+    def __init__(
+        self, path: str, ttl_seconds: float, max_entries=DEFAULT_MAX_DISK_ENTRIES
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT, key TEXT, value BLOB, created REAL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if time.time() - created > self.ttl_seconds:
+            return None
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % DISK_PRUNE_INTERVAL == 0:
+                self._prune()
+
+    def _prune(self):
+        self._conn.execute(
+            "DELETE FROM cache WHERE created < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            "SELECT rowid FROM cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def clear(self, namespace: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries also expire after a
+    time-to-live. An optional DiskCache acts as a second, shared tier:
+    memory misses are looked up on disk and every write goes to both.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600,
+        disk: Optional[DiskCache] = None,
+        encode: Callable = None,
+        decode: Callable = None,
+    ):
+        """
+        Args:
+            namespace (str): Separates this cache's entries in a shared DiskCache.
+            max_size (int): Maximum number of entries kept in memory.
+            ttl_seconds (float): Age after which an entry is treated as missing.
+            disk (DiskCache, optional): Shared on-disk tier.
+            encode (Callable): value -> bytes, for the disk tier. Defaults to JSON.
+            decode (Callable): bytes -> value, for the disk tier. Defaults to JSON.
+        """
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.disk = disk
+        self.encode = encode or (lambda value: json.dumps(value).encode())
+        self.decode = decode or (lambda raw: json.loads(raw))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Returns the cached value, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.disk is not None:
+            raw = self.disk.get(self.namespace, key)
+            if raw is not None:
+                value = self.decode(raw)
+                self._store(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value):
+        self._store(key, value)
+        if self.disk is not None:
+            self.disk.set(self.namespace, key, self.encode(value))
+
+    def _store(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, include_disk: bool = True):
+        """
+        Drops every entry in memory and, unless include_disk is False, in the
+        shared disk tier.
+        """
+        with self._lock:
+            self._entries.clear()
+        if include_disk and self.disk is not None:
+            self.disk.clear(self.namespace)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
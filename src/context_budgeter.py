@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from scripts.constants import Metadata_Columns
+from src.metadata_store import END_COLUMN, START_COLUMN
+from src.telemetry import CHARS_PER_TOKEN, estimate_tokens
+
+# Retrieved candidates per context passage, giving MMR something to choose from
+DEFAULT_CANDIDATE_FACTOR = 2
+
+# Shortest suffix/prefix match treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+# The top 5 chunks of up to 500 characters that the prompt received before budgeting
+DEFAULT_TOKEN_BUDGET = 5 * 500 // CHARS_PER_TOKEN
+
+# Joins non-adjacent chunks of the same complaint within one passage
+GAP_SEPARATOR = "\n...\n"
+
+
+def merge_overlap(first: str, second: str, min_overlap: int = MIN_OVERLAP_CHARS):
+    """
+    Joins two chunks when the end of `first` repeats the start of `second`,
+    as consecutive chunks of one narrative do.
+    Returns:
+        str: The merged text, or None if they do not overlap.
+    """
+    if second in first:
+        return first
+    for size in range(min(len(first), len(second)) - 1, min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+
+@dataclass
+class Passage:
+    """Chunks of one complaint collapsed into a single prompt passage."""
+
+    segments: list
+    metadata: dict
+    members: list
+    best_rank: int
+
+    @property
+    def text(self) -> str:
+        return GAP_SEPARATOR.join(self.segments)
+
+    def add(self, text: str, member: int, metadata: dict = None):
+        self.members.append(member)
+        # Offset-layout chunks: the passage spans from the first start to the last end
+        if metadata and START_COLUMN in metadata and START_COLUMN in self.metadata:
+            self.metadata[START_COLUMN] = min(
+                self.metadata[START_COLUMN], metadata[START_COLUMN]
+            )
+            self.metadata[END_COLUMN] = max(
+                self.metadata[END_COLUMN], metadata[END_COLUMN]
+            )
+        for i, segment in enumerate(self.segments):
+            merged = merge_overlap(segment, text) or merge_overlap(text, segment)
+            if merged is not None:
+                self.segments[i] = merged
+                return
+        self.segments.append(text)
+
+
+def collapse_by_parent(documents: list) -> list:
+    """
+    Groups chunks by complaint id in rank order, merging chunks that overlap.
+    Chunks without an id stay on their own.
+    Returns:
+        list: Passages ordered by their best-ranked chunk.
+    """
+    passages, by_id = [], {}
+    for rank, doc in enumerate(documents):
+        parent = doc.metadata.get(Metadata_Columns.ID.value)
+        passage = by_id.get(parent) if parent is not None else None
+        if passage is None:
+            passage = Passage([doc.page_content], dict(doc.metadata), [rank], rank)
+            passages.append(passage)
+            if parent is not None:
+                by_id[parent] = passage
+        else:
+            passage.add(doc.page_content, rank, doc.metadata)
+    return passages
+
+
+def mmr_order(
+    relevance: np.ndarray, vectors: Optional[np.ndarray], mmr_lambda: float
+) -> list:
+    """
+    Maximal marginal relevance: repeatedly picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * max similarity to those already
+    picked. Without vectors this is plain relevance order.
+    Returns:
+        list: Candidate positions in selection order.
+    """
+    n = len(relevance)
+    if vectors is None or n < 2:
+        return list(np.argsort(-relevance, kind="stable"))
+
+    similarity = vectors @ vectors.T
+    redundancy = np.full(n, -np.inf)
+    remaining = np.ones(n, dtype=bool)
+    order = []
+    for _ in range(n):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * penalty
+        scores[~remaining] = -np.inf
+        pick = int(np.argmax(scores))
+        order.append(pick)
+        remaining[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+    return order
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class ContextBudgeter:
+    """
+    Turns retrieved chunks into prompt context: chunks of the same complaint
+    are collapsed into one passage with overlapping text merged, passages
+    are ordered by MMR over their vectors, and as many as fit in the token
+    budget are kept. The budget never exceeds what the top-k chunks alone
+    would have put in the prompt.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        mmr_lambda: float = 0.7,
+        candidate_factor: int = DEFAULT_CANDIDATE_FACTOR,
+    ):
+        """
+        Args:
+            token_budget (int): Maximum estimated tokens of context in the prompt.
+            mmr_lambda (float): 1 ranks by relevance only, 0 by diversity only.
+            candidate_factor (int): Chunks retrieved per passage requested.
+        """
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.candidate_factor = candidate_factor
+
+    def candidates(self, k: int) -> int:
+        return k * self.candidate_factor
+
+    def assemble(
+        self,
+        documents: list,
+        vectors: Optional[np.ndarray],
+        k: int,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> tuple:
+        """
+        Args:
+            documents (list): Retrieved chunks, best first.
+            vectors (np.ndarray, optional): One vector per document, or None to skip MMR.
+            k (int): Maximum number of passages.
+            query_vector (np.ndarray, optional): Relevance is cosine similarity to it;
+                without it, relevance falls with retrieval rank.
+        Returns:
+            tuple: (passage Documents, report dict with token counts before and after)
+        """
+        from langchain_core.documents import Document
+
+        passages = collapse_by_parent(documents)
+        # Savings are measured against the top-k chunks sent as they are
+        tokens_before = sum(estimate_tokens(doc.page_content) for doc in documents[:k])
+        budget = min(self.token_budget, tokens_before)
+
+        passage_vectors = None
+        if vectors is not None and len(passages):
+            unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+            passage_vectors = _unit_rows(
+                np.stack([unit[p.members].mean(axis=0) for p in passages])
+            )
+
+        if passage_vectors is not None and query_vector is not None:
+            query = _unit_rows(np.asarray(query_vector, np.float32).reshape(1, -1))
+            relevance = passage_vectors @ query[0]
+        else:
+            ranks = np.asarray([p.best_rank for p in passages], dtype=np.float32)
+            relevance = 1 - ranks / max(len(documents), 1)
+
+        packed, used = [], 0
+        for i in mmr_order(relevance, passage_vectors, self.mmr_lambda):
+            if len(packed) == k:
+                break
+            passage = passages[i]
+            text = passage.text
+            tokens = estimate_tokens(text)
+            if used + tokens > budget:
+                if packed:
+                    continue
+                # The best passage alone is over budget: keep its start
+                text = text[: budget * CHARS_PER_TOKEN]
+                tokens = estimate_tokens(text)
+            metadata = {**passage.metadata, "chunks": len(passage.members)}
+            packed.append(Document(page_content=text, metadata=metadata))
+            used += tokens
+
+        report = {
+            "chunks": len(documents),
+            "passages": len(packed),
+            "context_tokens_before": tokens_before,
+            "context_tokens": used,
+            "context_tokens_saved": tokens_before - used,
+        }
+        return packed, report
@@ -1,27 +1,105 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from scripts.constants import (
     RAW_COMPLAINTS_DATA_FILE_NAME,
     CLENAED_COMPLAINTS_DATA_FILE_NAME,
+    CLEANED_COMPLAINTS_DATASET_DIR_NAME,
     PROCESSED_FILE_DIR,
     RAW_FILE_DIR,
+    categorical_columns,
     date_columns,
+    ingestion_columns,
+    ingestion_dtypes,
+    partition_columns,
     Columns,
+    Processed_Columns,
 )
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+from typing import Iterator
 import math
 
+# Rows per Parquet row group; each group carries min/max statistics for pruning
+PARQUET_ROW_GROUP_ROWS = 64 * 1024
+
+PARTITION_SCHEMA = pa.schema(
+    [
+        pa.field(Columns.PRODUCT.value, pa.string()),
+        pa.field(Processed_Columns.RECEIVED_YEAR.value, pa.int16()),
+    ]
+)
+
+
+def typed_complaints(df: pd.DataFrame) -> pa.Table:
+    """
+    Converts cleaned complaints to the typed Arrow table the processed
+    Parquet dataset stores: dates as timestamps, ids and counts as integers,
+    low-cardinality columns dictionary-encoded, the received year added as a
+    partition key, and any saved index column dropped.
+    Args:
+        df (pd.DataFrame): Cleaned complaints with raw and processed column names.
+    Returns:
+        pa.Table: The table, sorted by received date so row-group date ranges are narrow.
+    """
+    df = df.drop(columns=[col for col in df.columns if col.startswith("Unnamed:")])
+    converted = {
+        col: pd.to_datetime(df[col], errors="coerce")
+        for col in date_columns
+        if col in df.columns
+    }
+    if Columns.COMPLAINT_ID.value in df.columns:
+        converted[Columns.COMPLAINT_ID.value] = pd.to_numeric(
+            df[Columns.COMPLAINT_ID.value], errors="coerce"
+        ).astype("Int64")
+    if Processed_Columns.WORD_COUNT.value in df.columns:
+        converted[Processed_Columns.WORD_COUNT.value] = pd.to_numeric(
+            df[Processed_Columns.WORD_COUNT.value], errors="coerce"
+        ).astype("Int32")
+    for col in categorical_columns:
+        if col in df.columns and col not in partition_columns:
+            converted[col] = df[col].astype("category")
+    df = df.assign(**converted)
+
+    received = pd.to_datetime(df[Columns.DATE_RECEIVED.value], errors="coerce")
+    df[Processed_Columns.RECEIVED_YEAR.value] = received.dt.year.astype("Int16")
+    df = df.sort_values(Columns.DATE_RECEIVED.value, kind="stable")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for field in PARTITION_SCHEMA:
+        index = table.schema.get_field_index(field.name)
+        table = table.set_column(index, field, table.column(index).cast(field.type))
+    return table
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    # Partition keys come back as plain strings; keep Product categorical
+    if Columns.PRODUCT.value in table.column_names:
+        index = table.schema.get_field_index(Columns.PRODUCT.value)
+        column = table.column(index)
+        if not pa.types.is_dictionary(column.type):
+            table = table.set_column(
+                index, Columns.PRODUCT.value, pc.dictionary_encode(column)
+            )
+    return table.to_pandas()
+
 
 class DataLoader:
-    """Class to load and save complaint data from/to CSV files."""
+    """
+    Class to load and save complaint data: the raw dump as CSV, cleaned
+    complaints as a partitioned Parquet dataset.
+    """
 
     def __init__(self):
         self.raw_complaints_file_path = RAW_FILE_DIR + RAW_COMPLAINTS_DATA_FILE_NAME
         self.cleaned_complaints_file_path = (
             PROCESSED_FILE_DIR + CLENAED_COMPLAINTS_DATA_FILE_NAME
         )
+        self.cleaned_complaints_dataset_path = (
+            PROCESSED_FILE_DIR + CLEANED_COMPLAINTS_DATASET_DIR_NAME
+        )
         self.chunk_size = 10000
-        self.chunks = []
 
     def load_from_csv(
         self,
@@ -46,15 +124,16 @@ class DataLoader:
         )
         parse_dates = date_columns if parse_dates else None
 
-        if not Path(file_to_read).exists:
+        if not Path(file_to_read).exists():
             raise FileNotFoundError(f"File {file_to_read} not found")
 
+        chunks = []
         for chunk in pd.read_csv(
             file_to_read, chunksize=self.chunk_size, parse_dates=parse_dates
         ):
-            self.chunks.append(chunk)
+            chunks.append(chunk)
 
-        df = pd.concat(self.chunks)
+        df = pd.concat(chunks)
         print(f"Loaded {file_to_read} to Dataframe!")
 
         if df.empty:
@@ -62,6 +141,75 @@ class DataLoader:
 
         return df
 
+    def stream_from_csv(
+        self,
+        parse_dates: bool = False,
+        load_clean: bool = False,
+        filter_complaints: bool = True,
+        columns: list = ingestion_columns,
+        dtypes: dict = ingestion_dtypes,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streams complaint data from a CSV file one chunk at a time, so the
+        whole file never has to be held in memory.
+        Only the requested columns are read, low-cardinality columns are loaded
+        as categoricals, and each chunk can be filtered to the configured
+        product categories with null/empty narratives dropped.
+        Args:
+            parse_dates (bool): Whether to parse date columns.
+            load_clean (bool): Whether to load cleaned data or raw data.
+            filter_complaints (bool): Whether to apply the DataPreprocessor filters per chunk.
+            columns (list): Columns to read from the file. Missing columns are ignored.
+            dtypes (dict): Column to dtype mapping applied while parsing.
+        Yields:
+            pd.DataFrame: A filtered chunk of at most `chunk_size` rows.
+        Raises:
+            FileNotFoundError: If the specified file does not exist.
+        """
+        # Imported here since the preprocessor pulls in the NLTK helpers
+        from src.data.preprocessor import DataPreprocessor
+
+        file_to_read = (
+            self.cleaned_complaints_file_path
+            if load_clean
+            else self.raw_complaints_file_path
+        )
+
+        if not Path(file_to_read).exists():
+            raise FileNotFoundError(f"File {file_to_read} not found")
+
+        wanted = set(columns) if columns else None
+        usecols = (lambda col: col in wanted) if wanted else None
+        parse_dates = (
+            [col for col in date_columns if wanted is None or col in wanted]
+            if parse_dates
+            else None
+        )
+
+        for chunk in pd.read_csv(
+            file_to_read,
+            chunksize=self.chunk_size,
+            usecols=usecols,
+            dtype=dtypes,
+            parse_dates=parse_dates,
+        ):
+            if filter_complaints:
+                chunk = DataPreprocessor(chunk).filter_chunk()
+
+            if chunk.empty:
+                continue
+
+            # Drop categories filtered out of this chunk so they are not carried along
+            category_cols = chunk.select_dtypes("category").columns
+            chunk = chunk.assign(
+                **{
+                    col: chunk[col].cat.remove_unused_categories()
+                    for col in category_cols
+                }
+            )
+
+            yield chunk
+
     def save_to_csv(
         self, df: pd.DataFrame, default_cleaned: bool = True, path: str = ""
     ):
@@ -78,39 +226,136 @@ class DataLoader:
         df.to_csv(file_path_to_save)
         print(f"Saved dataframe to {file_path_to_save}")
 
-    def load_stratified_sample(
-        self, sample_size=0.2, stratify_col=Columns.PRODUCT.value
-    ):
-        df = pd.read_csv(
-            self.cleaned_complaints_file_path,
+    def save_to_parquet(self, df: pd.DataFrame, path: str = ""):
+        """
+        Saves cleaned complaints as a Parquet dataset partitioned by Product
+        and received year, replacing the partitions df covers.
+        Files are zstd-compressed with row-group statistics, so loaders skip
+        partitions and row groups a filter rules out.
+        Args:
+            df (pd.DataFrame): Cleaned complaints.
+            path (str): Dataset directory. Defaults to the processed dataset.
+        """
+        path = path or self.cleaned_complaints_dataset_path
+        ds.write_dataset(
+            typed_complaints(df),
+            path,
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            existing_data_behavior="delete_matching",
+            max_rows_per_group=PARQUET_ROW_GROUP_ROWS,
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression="zstd", write_statistics=True
+            ),
         )
+        print(f"Saved dataframe to {path}")
 
-        stratify = df[stratify_col]
-        stratified_sample, _ = train_test_split(
-            df,
-            test_size=sample_size,
-            stratify=stratify,
-            random_state=42,
+    def _open_dataset(self, path: str) -> ds.Dataset:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"File {path} not found")
+        # Partition keys are only encoded in a dataset directory's paths
+        partitioning = (
+            ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+            if Path(path).is_dir()
+            else None
         )
+        return ds.dataset(path, format="parquet", partitioning=partitioning)
 
-        return stratified_sample
+    def load_stratified_sample(
+        self,
+        sample_size=0.2,
+        stratify_col=Columns.PRODUCT.value,
+        columns: list = None,
+        n_samples: int = None,
+        quotas: dict = None,
+        filters=None,
+        random_state: int = 42,
+    ) -> pd.DataFrame:
+        """
+        Samples the cleaned complaints per stratum in one streaming pass, so
+        only the sample is ever held in memory.
+        Args:
+            sample_size (float): Share of each stratum to keep, used unless
+                n_samples or quotas is given.
+            stratify_col (str): Column defining the strata.
+            columns (list, optional): Columns to read. Defaults to all.
+            n_samples (int, optional): Total rows, split in proportion to stratum sizes.
+            quotas (dict, optional): Exact rows per stratum value.
+            filters (optional): Pushed down to the Parquet scan, as in load_from_parquet.
+            random_state (int): Seed of the sample.
+        Returns:
+            pd.DataFrame: The sample, in dataset order.
+        Raises:
+            FileNotFoundError: If the cleaned dataset does not exist.
+        """
+        from src.data.sampler import StratifiedSampler
+
+        if columns is not None and stratify_col not in columns:
+            columns = [*columns, stratify_col]
+        sampler = StratifiedSampler(
+            stratify_col,
+            fraction=sample_size if n_samples is None and quotas is None else None,
+            n_samples=n_samples,
+            quotas=quotas,
+            random_state=random_state,
+        )
+        sample = sampler.sample(
+            self.stream_from_parquet(columns=columns, filters=filters)
+        )
+        print(f"Sampled {len(sample)} of {sampler.seen} complaints")
+        return sample
 
-    def load_from_parquet(self, path) -> pd.DataFrame:
+    def load_from_parquet(
+        self, path: str = "", columns: list = None, filters=None
+    ) -> pd.DataFrame:
         """
-        Loads complaint data from a parquet file into a Pandas DataFrame.
+        Loads complaint data from a parquet file or dataset directory into a Pandas DataFrame.
+        Only the requested columns are read, and filters are pushed down to
+        skip partitions and row groups whose statistics rule them out.
         Args:
+            path (str): Parquet file or dataset directory. Defaults to the processed dataset.
+            columns (list, optional): Columns to read. Defaults to all.
+            filters (optional): A pyarrow expression, or DNF tuples as in pd.read_parquet,
+                e.g. [("Product", "=", "Credit card"), ("Received year", ">=", 2022)].
         Returns:
             pd.DataFrame: DataFrame containing the complaint data.
         Raises:
             FileNotFoundError: If the specified file does not exist.
             ValueError: If the loaded DataFrame is empty.
         """
-
-        if not Path(path).exists:
-            raise FileNotFoundError(f"File {path} not found")
-        df = pd.read_parquet(path)
+        path = path or self.cleaned_complaints_dataset_path
+        table = self._open_dataset(path).to_table(
+            columns=columns, filter=_filter_expression(filters)
+        )
+        df = _to_frame(table)
         print(f"Loaded {path} to Dataframe!")
         if df.empty:
             raise ValueError("Dataframe is empty. Please select another file")
 
         return df
+
+    def stream_from_parquet(
+        self, path: str = "", columns: list = None, filters=None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streams a parquet file or dataset one batch of at most `chunk_size`
+        rows at a time, with the same projection and pushdown as load_from_parquet.
+        Yields:
+            pd.DataFrame: A non-empty batch.
+        Raises:
+            FileNotFoundError: If the specified file does not exist.
+        """
+        path = path or self.cleaned_complaints_dataset_path
+        for batch in self._open_dataset(path).to_batches(
+            columns=columns,
+            filter=_filter_expression(filters),
+            batch_size=self.chunk_size,
+        ):
+            if batch.num_rows:
+                yield _to_frame(pa.Table.from_batches([batch]))
+
+
+def _filter_expression(filters):
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
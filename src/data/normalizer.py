@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import pandas as pd
+from scripts.utils import clean_text, tokenize_and_lemmatize
+
+
+def _normalize_shard(texts: Sequence) -> tuple:
+    """
+    Cleans and normalizes one shard of narratives inside a worker process.
+    The per-process lemmatizer, stopword set and lemma cache are reused
+    across every row of the shard.
+    """
+    cleaned = [clean_text(text) for text in texts]
+    normalized = [tokenize_and_lemmatize(text) for text in texts]
+    return cleaned, normalized
+
+
+class TextNormalizer:
+    """
+    Batch text normalization engine.
+    Produces the same output as applying clean_text and tokenize_and_lemmatize
+    row by row, but shards the rows across a process pool.
+    """
+
+    def __init__(self, n_jobs: Optional[int] = None, shard_size: int = 5000):
+        """
+        Args:
+            n_jobs (int, optional): Number of worker processes. Defaults to the CPU count,
+                1 runs in the current process.
+            shard_size (int): Number of rows sent to a worker at a time.
+        """
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.shard_size = shard_size
+
+    def _shards(self, texts: list):
+        for start in range(0, len(texts), self.shard_size):
+            yield texts[start : start + self.shard_size]
+
+    @staticmethod
+    def _collect(shard_results) -> tuple:
+        cleaned, normalized = [], []
+        for shard_cleaned, shard_normalized in shard_results:
+            cleaned.extend(shard_cleaned)
+            normalized.extend(shard_normalized)
+        return cleaned, normalized
+
+    def normalize(self, texts: Sequence) -> tuple:
+        """
+        Cleans and normalizes a batch of narratives.
+        Args:
+            texts (Sequence): The raw narratives.
+        Returns:
+            tuple: (cleaned texts, normalized texts), both lists in input order.
+        """
+        texts = list(texts)
+
+        if self.n_jobs == 1 or len(texts) <= self.shard_size:
+            return self._collect(map(_normalize_shard, self._shards(texts)))
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            # map keeps shard order, so the output lines up with the input rows
+            return self._collect(executor.map(_normalize_shard, self._shards(texts)))
+
+    def normalize_column(
+        self, df: pd.DataFrame, col: str, cleaned_col: str, normalized_col: str
+    ) -> pd.DataFrame:
+        """
+        Adds cleaned and normalized versions of a text column to the DataFrame.
+        Args:
+            df (pd.DataFrame): The input DataFrame.
+            col (str): The name of the raw text column.
+            cleaned_col (str): The name of the column to hold the cleaned text.
+            normalized_col (str): The name of the column to hold the normalized text.
+        Returns:
+            pd.DataFrame: The DataFrame with the two new columns.
+        """
+        cleaned, normalized = self.normalize(df[col].tolist())
+        df[cleaned_col] = pd.Series(cleaned, index=df.index, dtype=object)
+        df[normalized_col] = pd.Series(normalized, index=df.index, dtype=object)
+        return df
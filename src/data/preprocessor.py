@@ -1,6 +1,6 @@
 import pandas as pd
 from scripts.constants import Columns, product_categories
-from scripts.utils import clean_text, tokenize_and_lemmatize
+from src.data.normalizer import TextNormalizer
 
 
 class DataPreprocessor:
@@ -23,14 +23,19 @@ class DataPreprocessor:
         """
         return df[self.df[Columns.PRODUCT.value].isin(product_categories)]
 
-    def drop_missing_values(self):
+    def drop_missing_values(self, verbose: bool = True):
         """
         Drops rows with missing values in the complaint narrative column.
+        Args:
+            verbose (bool): Whether to print the number of dropped rows and the new shape.
         """
         initial_shape = self.df.shape
 
         self.df = self.df.dropna(subset=[Columns.COMPLAINT.value])
 
+        if not verbose:
+            return
+
         dropped_count = initial_shape[0] - self.df.shape[0]
         if dropped_count > 0:
             print(f"Dropped {dropped_count} rows containing null narratives.")
@@ -44,20 +49,28 @@ class DataPreprocessor:
         self.df = self.df[self.df[Columns.COMPLAINT.value].str.strip().str.len() > 0]
 
     def clean_and_normalize_customer_feedback(
-        self, df: pd.DataFrame, col: str, cleaned_col: str, normalized_col: str
+        self,
+        df: pd.DataFrame,
+        col: str,
+        cleaned_col: str,
+        normalized_col: str,
+        n_jobs: int = 1,
     ) -> pd.DataFrame:
         """
-        Cleans the specified text column in the DataFrame using the clean_text function.
+        Cleans the specified text column in the DataFrame using the clean_text function
+        and adds a tokenized, lemmatized version of it.
         Args:
             df (pd.DataFrame): The input DataFrame containing the text column to clean.
             col (str): The name of the column to clean.
+            cleaned_col (str): The name of the column to hold the cleaned text.
+            normalized_col (str): The name of the column to hold the normalized text.
+            n_jobs (int): Number of worker processes used by the TextNormalizer.
         Returns:
             pd.DataFrame: DataFrame with the cleaned text column.
         """
-        df[cleaned_col] = df[col].apply(clean_text)
-        df[normalized_col] = df[col].apply(tokenize_and_lemmatize)
-
-        return df
+        return TextNormalizer(n_jobs=n_jobs).normalize_column(
+            df, col, cleaned_col, normalized_col
+        )
 
     def normalize_text_column(self, col: str):
         """
@@ -67,6 +80,19 @@ class DataPreprocessor:
         """
         self.df = self.clean_customer_feedback(self.df, col)
 
+    def filter_chunk(self) -> pd.DataFrame:
+        """
+        Applies the product category subset and the null/empty narrative drops
+        to the wrapped DataFrame without logging, so it can run once per chunk
+        of a streamed file.
+        Returns:
+            pd.DataFrame: The filtered DataFrame.
+        """
+        self.df = self.subset_product_categories(self.df)
+        self.drop_missing_values(verbose=False)
+        self.remove_empty_feedbacks()
+        return self.df
+
     def get_processed_data(self):
         """
         Executes the preprocessing steps and returns the processed DataFrame.
@@ -0,0 +1,156 @@
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+# Slack, in standard deviations of the sample fraction, kept above the fraction
+# while streaming, so every stratum's exact quota is met with near certainty
+FRACTION_SLACK_SIGMAS = 6
+
+KEY_COLUMN = "__sample_key"
+ORDER_COLUMN = "__sample_order"
+
+
+def allocate_quotas(counts: dict, n: int) -> dict:
+    """
+    Splits n rows across strata in proportion to their counts, rounding
+    by largest remainder so the quotas sum to exactly min(n, total).
+    """
+    total = sum(counts.values())
+    if total == 0:
+        return {stratum: 0 for stratum in counts}
+    n = min(n, total)
+    exact = {stratum: n * count / total for stratum, count in counts.items()}
+    quotas = {stratum: int(share) for stratum, share in exact.items()}
+    by_remainder = sorted(counts, key=lambda s: exact[s] - quotas[s], reverse=True)
+    for stratum in by_remainder[: n - sum(quotas.values())]:
+        quotas[stratum] += 1
+    return quotas
+
+
+class StratifiedSampler:
+    """
+    One-pass stratified sampler over a stream of DataFrame chunks.
+    Every row gets a seeded uniform key, and each stratum keeps the rows
+    with the smallest keys, so the result is a uniform sample per stratum
+    with exact quotas:
+    - fraction: round(fraction * stratum size) rows per stratum. Rows whose
+      key is clearly above the fraction are dropped as they stream by.
+    - n_samples: n rows overall, split in proportion to stratum sizes.
+      Each stratum holds at most n rows while streaming.
+    - quotas: a fixed number of rows per stratum value.
+    Memory is bounded by the sample, not the input. Rows with a missing
+    stratum value are never sampled.
+    """
+
+    def __init__(
+        self,
+        stratify_col: str,
+        fraction: Optional[float] = None,
+        n_samples: Optional[int] = None,
+        quotas: Optional[dict] = None,
+        random_state: int = 42,
+    ):
+        """
+        Args:
+            stratify_col (str): Column whose values define the strata.
+            fraction (float, optional): Share of each stratum to keep.
+            n_samples (int, optional): Total rows to keep.
+            quotas (dict, optional): Stratum value -> rows to keep.
+            random_state (int): Seed; the same input in the same order gives the same sample.
+        Raises:
+            ValueError: If not exactly one of fraction, n_samples and quotas is given.
+        """
+        if sum(option is not None for option in (fraction, n_samples, quotas)) != 1:
+            raise ValueError("Give exactly one of fraction, n_samples or quotas")
+        if fraction is not None and not 0 <= fraction <= 1:
+            raise ValueError(f"fraction must be between 0 and 1, got {fraction}")
+
+        self.stratify_col = stratify_col
+        self.fraction = fraction
+        self.n_samples = n_samples
+        self.quotas = quotas
+        self.rng = np.random.default_rng(random_state)
+        self.counts = {}
+        self.pools = {}
+        self.categorical = set()
+        self.seen = 0
+
+    def _capacity(self, stratum) -> int:
+        if self.n_samples is not None:
+            return self.n_samples
+        return self.quotas.get(stratum, 0)
+
+    def update(self, chunk: pd.DataFrame):
+        """Adds one chunk of the input stream."""
+        self.categorical.update(chunk.select_dtypes("category").columns)
+        chunk = chunk.assign(
+            **{
+                KEY_COLUMN: self.rng.random(len(chunk)),
+                ORDER_COLUMN: np.arange(self.seen, self.seen + len(chunk)),
+            }
+        )
+        self.seen += len(chunk)
+
+        for stratum, rows in chunk.groupby(
+            self.stratify_col, observed=True, sort=False
+        ):
+            before = self.counts.get(stratum, 0)
+            self.counts[stratum] = before + len(rows)
+            pool = self.pools.setdefault(stratum, [])
+
+            if self.fraction is not None:
+                # The final cut-off key lies within a few sigma of the fraction,
+                # and the margin only narrows as the stratum grows
+                positions = before + np.arange(1, len(rows) + 1)
+                limit = (
+                    self.fraction
+                    + FRACTION_SLACK_SIGMAS
+                    * np.sqrt(self.fraction * (1 - self.fraction) / positions)
+                    + 1 / positions
+                )
+                pool.append(rows[rows[KEY_COLUMN].to_numpy() < limit])
+                continue
+
+            capacity = self._capacity(stratum)
+            if capacity == 0:
+                continue
+            kept = pd.concat(pool + [rows]) if pool else rows
+            pool[:] = [kept.nsmallest(capacity, KEY_COLUMN)]
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: The sampled rows in input order, with a fresh index.
+        """
+        if self.fraction is not None:
+            quotas = {
+                stratum: int(round(self.fraction * count))
+                for stratum, count in self.counts.items()
+            }
+        elif self.n_samples is not None:
+            quotas = allocate_quotas(self.counts, self.n_samples)
+        else:
+            quotas = self.quotas
+
+        parts = [
+            pd.concat(pool).nsmallest(quotas.get(stratum, 0), KEY_COLUMN)
+            for stratum, pool in self.pools.items()
+            if pool
+        ]
+        if not parts:
+            return pd.DataFrame()
+
+        sample = (
+            pd.concat(parts)
+            .sort_values(ORDER_COLUMN)
+            .drop(columns=[KEY_COLUMN, ORDER_COLUMN])
+            .reset_index(drop=True)
+        )
+        # Chunks with different categories concatenate to object columns
+        return sample.astype({col: "category" for col in self.categorical})
+
+    def sample(self, chunks: Iterable) -> pd.DataFrame:
+        """Streams every chunk through the sampler and returns the result."""
+        for chunk in chunks:
+            self.update(chunk)
+        return self.result()
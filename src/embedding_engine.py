@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, Optional
+import numpy as np
+from scripts.constants import EMBEDDING_MODEL_NAME
+
+DEFAULT_BATCH_SIZE = 64
+
+# SQLite limits the number of bound parameters per statement
+CACHE_LOOKUP_BATCH = 900
+
+
+@lru_cache(maxsize=None)
+def _load_model(model_name: str):
+    """Loads the sentence-transformers model once per process."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def encode_texts(model_name: str, texts: list, batch_size: int) -> np.ndarray:
+    """
+    Encodes texts with the sentence-transformers model behind
+    HuggingFaceEmbeddings, so vectors match the ones RAGSystem queries with.
+    """
+    vectors = _load_model(model_name).encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _init_worker(threads: int):
+    # Split the cores between workers instead of every worker using all of them
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def text_key(model_name: str, text: str) -> str:
+    """Content hash identifying a text's embedding under a given model."""
+    return hashlib.sha1(f"{model_name}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by content hash. Entries never expire:
+    a text always embeds to the same vector under the same model.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: list) -> dict:
+        """Returns key -> float32 vector for the keys that are cached."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), CACHE_LOOKUP_BATCH):
+                batch = keys[start : start + CACHE_LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                (
+                    (key, np.asarray(vector, dtype=np.float32).tobytes())
+                    for key, vector in items.items()
+                ),
+            )
+            self._conn.commit()
+
+
+class EmbeddingEngine:
+    """
+    CPU embedding pipeline for chunk texts.
+    Identical texts are encoded once, previously seen texts come from the
+    on-disk cache, and the rest are sorted by length so each batch pads to
+    similar lengths before being encoded in-process or across a worker pool.
+    Implements embed_documents/embed_query, so it can stand in for
+    HuggingFaceEmbeddings.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        n_workers: int = 1,
+        cache_path: Optional[str] = None,
+        encode_fn: Callable = encode_texts,
+        report_every: int = 10000,
+    ):
+        """
+        Args:
+            model_name (str): sentence-transformers model id.
+            batch_size (int): Texts per encoder batch.
+            n_workers (int): Encoder processes. 1 encodes in this process.
+            cache_path (str, optional): SQLite file caching embeddings by content hash.
+            encode_fn (Callable): (model_name, texts, batch_size) -> float32 matrix.
+                Must be picklable when n_workers > 1.
+            report_every (int): Print throughput after this many newly encoded texts,
+                and a summary after embed calls of at least this many texts.
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_workers = n_workers
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.encode_fn = encode_fn
+        self.report_every = report_every
+        self.last_report = {}
+        self._dim = None
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension, probed with one encoder call if nothing was embedded yet."""
+        if self._dim is None:
+            self._dim = int(
+                np.asarray(self.encode_fn(self.model_name, ["dimension"], 1)).shape[1]
+            )
+        return self._dim
+
+    def _batches(self, texts: list) -> list:
+        """Orders texts by length and splits them into encoder batches."""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        return [
+            order[start : start + self.batch_size]
+            for start in range(0, len(order), self.batch_size)
+        ]
+
+    def _encode(self, texts: list) -> np.ndarray:
+        batches = self._batches(texts)
+        encode = partial(self.encode_fn, self.model_name, batch_size=self.batch_size)
+        batch_texts = ([texts[i] for i in batch] for batch in batches)
+
+        vectors = [None] * len(texts)
+        start, done, next_report = time.perf_counter(), 0, self.report_every
+
+        def collect(results):
+            nonlocal done, next_report
+            for batch, encoded in zip(batches, results):
+                for i, vector in zip(batch, encoded):
+                    vectors[i] = vector
+                done += len(batch)
+                if done >= next_report:
+                    rate = done / (time.perf_counter() - start)
+                    print(f"Embedded {done}/{len(texts)} chunks ({rate:.0f} chunks/s)")
+                    next_report += self.report_every
+
+        if self.n_workers > 1 and len(batches) > 1:
+            threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+            with ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(threads,),
+            ) as executor:
+                collect(executor.map(encode, batch_texts))
+        else:
+            collect(map(encode, batch_texts))
+
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Embeds texts into an (n, dim) float32 matrix in input order.
+        Throughput and cache hit counts are kept in `last_report`.
+        """
+        start = time.perf_counter()
+        keys = [text_key(self.model_name, text) for text in texts]
+
+        # Each distinct text is looked up and encoded once
+        unique = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+
+        found = self.cache.get_many(list(unique)) if self.cache is not None else {}
+        missing = [key for key in unique if key not in found]
+
+        if missing:
+            encoded = self._encode([unique[key] for key in missing])
+            new = dict(zip(missing, encoded))
+            if self.cache is not None:
+                self.cache.put_many(new)
+            found.update(new)
+
+        elapsed = time.perf_counter() - start
+        self.last_report = {
+            "chunks": len(texts),
+            "unique": len(unique),
+            "cache_hits": len(unique) - len(missing),
+            "encoded": len(missing),
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(len(texts) / elapsed, 1) if elapsed else 0.0,
+        }
+        if len(texts) >= self.report_every:
+            print(
+                f"Embedded {len(texts)} chunks: {len(missing)} encoded, "
+                f"{self.last_report['cache_hits']} cached, "
+                f"{len(texts) - len(unique)} duplicates "
+                f"({self.last_report['chunks_per_second']:.0f} chunks/s)"
+            )
+
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        vectors = np.stack([found[key] for key in keys])
+        self._dim = vectors.shape[1]
+        return vectors
+
+    def embed_documents(self, texts: list) -> list:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.embed([text])[0].tolist()
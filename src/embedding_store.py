@@ -0,0 +1,159 @@
+import os
+from typing import Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from scripts.constants import Embedding_Columns, Vector_Dtypes
+from src.index_builder import embeddings_to_matrix
+
+EMBEDDING_COLUMN = Embedding_Columns.EMBEDDING.value
+SCALE_COLUMN = Embedding_Columns.EMBEDDING_SCALE.value
+
+# Largest int8 code; each vector is scaled so its largest component maps to it
+INT8_MAX = 127
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple:
+    """
+    Symmetric per-vector int8 quantization: vector ~= codes * scale.
+    Returns:
+        tuple: ((n, dim) int8 codes, (n,) float32 scales)
+    """
+    scales = np.abs(matrix).max(axis=1) / INT8_MAX
+    scales[scales == 0] = 1
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def encode_embeddings(matrix: np.ndarray, dtype: str) -> dict:
+    """
+    Converts an embedding matrix to fixed-size Arrow list columns.
+    Args:
+        matrix (np.ndarray): (n, dim) vectors.
+        dtype (str): One of Vector_Dtypes values.
+    Returns:
+        dict: Column name -> Arrow array; int8 adds a per-vector scale column.
+    Raises:
+        ValueError: If dtype is not a Vector_Dtypes value.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    columns = {}
+    if dtype == Vector_Dtypes.INT8.value:
+        values, scales = quantize_int8(matrix)
+        columns[SCALE_COLUMN] = pa.array(scales)
+    elif dtype in (Vector_Dtypes.FLOAT32.value, Vector_Dtypes.FLOAT16.value):
+        values = matrix.astype(dtype, copy=False)
+    else:
+        raise ValueError(
+            f"Unknown vector dtype {dtype}. "
+            f"Choose one of {[d.value for d in Vector_Dtypes]}"
+        )
+    columns[EMBEDDING_COLUMN] = pa.FixedSizeListArray.from_arrays(
+        pa.array(values.ravel()), matrix.shape[1]
+    )
+    return columns
+
+
+def embedding_matrix(column, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Views an Arrow embedding column as an (n, dim) NumPy matrix without
+    going through Python lists. float32 and float16 vectors are returned
+    as a read-only view of the Arrow buffer; int8 codes are scaled back to
+    float32.
+    Args:
+        column (pa.Array or pa.ChunkedArray): Fixed-size or regular list column.
+        scales (np.ndarray, optional): Per-vector scales of int8 codes.
+    Returns:
+        np.ndarray: The embedding matrix.
+    Raises:
+        ValueError: If vectors differ in length, or int8 codes come without scales.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        # A single chunk is not copied
+        column = column.combine_chunks()
+
+    if pa.types.is_fixed_size_list(column.type):
+        dim = column.type.list_size
+    else:
+        lengths = pc.list_value_length(column)
+        dim = pc.min(lengths).as_py() or 0
+        if pc.max(lengths).as_py() != dim:
+            raise ValueError("Embeddings differ in length")
+
+    values = column.flatten().to_numpy(zero_copy_only=True)
+    matrix = values.reshape(len(column), dim)
+    if matrix.dtype == np.int8:
+        if scales is None:
+            raise ValueError(f"int8 embeddings need a {SCALE_COLUMN} column")
+        return matrix.astype(np.float32) * np.asarray(scales, np.float32)[:, None]
+    return matrix
+
+
+def save_embeddings(
+    df: pd.DataFrame,
+    path: str,
+    dtype: str = Vector_Dtypes.FLOAT16.value,
+    vectors: Optional[np.ndarray] = None,
+):
+    """
+    Writes a pre-computed embeddings DataFrame to Parquet with the
+    embedding column as a fixed-size list of `dtype`, written aside and
+    renamed into place.
+    Args:
+        df (pd.DataFrame): DataFrame with an embedding column, or the other columns.
+        path (str): The Parquet file to write.
+        dtype (str): One of Vector_Dtypes values.
+        vectors (np.ndarray, optional): (n, dim) embeddings to use instead of df's column.
+    """
+    matrix = embeddings_to_matrix(df[EMBEDDING_COLUMN]) if vectors is None else vectors
+    encoded = encode_embeddings(matrix, dtype)
+    others = df.drop(columns=[EMBEDDING_COLUMN, SCALE_COLUMN], errors="ignore")
+    if len(others.columns):
+        table = pa.Table.from_pandas(others, preserve_index=False)
+        for name, array in encoded.items():
+            table = table.append_column(name, array)
+    else:
+        table = pa.table(encoded)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def _table_matrix(table: pa.Table) -> np.ndarray:
+    scales = (
+        table.column(SCALE_COLUMN).to_numpy()
+        if SCALE_COLUMN in table.column_names
+        else None
+    )
+    return embedding_matrix(table.column(EMBEDDING_COLUMN), scales)
+
+
+def load_embedding_matrix(path: str) -> np.ndarray:
+    """Reads only the embedding column of a pre-computed embeddings Parquet file."""
+    columns = [
+        name
+        for name in pq.read_schema(path).names
+        if name in (EMBEDDING_COLUMN, SCALE_COLUMN)
+    ]
+    return _table_matrix(pq.read_table(path, columns=columns, memory_map=True))
+
+
+def load_embeddings(path: str) -> tuple:
+    """
+    Reads a pre-computed embeddings Parquet file, in the compact layout
+    written by save_embeddings or with list columns.
+    Args:
+        path (str): The Parquet file.
+    Returns:
+        tuple: (DataFrame of the other columns, (n, dim) embedding matrix)
+    """
+    table = pq.read_table(path, memory_map=True)
+    others = [
+        name
+        for name in table.column_names
+        if name not in (EMBEDDING_COLUMN, SCALE_COLUMN)
+    ]
+    return table.select(others).to_pandas(), _table_matrix(table)
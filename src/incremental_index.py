@@ -0,0 +1,419 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Callable, Iterable, Union
+from scripts.constants import (
+    COMPLAINT_HASHES_FILE_NAME,
+    MANIFEST_FILE_NAME,
+    RERANK_VECTORS_FILE_NAME,
+    SHARD_MANIFEST_FILE_NAME,
+    SPARSE_INDEX_DIR_NAME,
+    TOMBSTONES_FILE_NAME,
+    Columns,
+    Metadata_Columns,
+    date_columns,
+    metadata_source_columns,
+)
+from src.index_builder import (
+    DEFAULT_ADD_BATCH_SIZE,
+    apply_search_params,
+    enable_reconstruct,
+    load_rerank_vectors,
+    read_index,
+    write_index,
+)
+from src.metadata_store import MetadataStore
+from src.text_processor import ChunkBatch
+
+# Compact once this fraction of the index rows are tombstones
+DEFAULT_COMPACT_RATIO = 0.2
+
+HASH_COLUMN = "content_hash"
+ID_COLUMN = Metadata_Columns.ID.value
+
+
+def _hashable_text(values: pd.Series) -> pd.Series:
+    """
+    Renders a column as text that does not depend on the source format:
+    dates as ISO days whether or not they were parsed, and every kind of
+    missing value as "".
+    """
+    if values.name in date_columns or pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce").dt.strftime("%Y-%m-%d")
+    values = values.astype(object)
+    return values.where(values.notna(), "").astype(str)
+
+
+def content_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Stable 64-bit hash per complaint over its narrative and the metadata
+    fields copied onto its chunks, so edits to either are picked up. The
+    same complaint hashes the same whether it was read from CSV or Parquet.
+    """
+    columns = [Columns.COMPLAINT.value] + [
+        col
+        for col in metadata_source_columns.values()
+        if col in df.columns and col != Columns.COMPLAINT_ID.value
+    ]
+    text = pd.DataFrame({col: _hashable_text(df[col]) for col in columns})
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+
+def read_manifest(folder_path: str) -> dict:
+    """Returns the folder's manifest, or an empty dict if it has none."""
+    path = os.path.join(folder_path, MANIFEST_FILE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(folder_path: str, **fields) -> dict:
+    """
+    Records a new index version in the manifest, together with the given
+    fields. Versions increase by one on every build, update or compaction.
+    """
+    previous = read_manifest(folder_path)
+    manifest = {
+        **previous,
+        **fields,
+        "version": previous.get("version", 0) + 1,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    path = os.path.join(folder_path, MANIFEST_FILE_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def load_tombstones(folder_path: str) -> np.ndarray:
+    """Sorted row ids of deleted chunks still present in the index."""
+    path = os.path.join(folder_path, TOMBSTONES_FILE_NAME)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64)
+    return np.load(path)
+
+
+def save_tombstones(folder_path: str, tombstones: np.ndarray):
+    path = os.path.join(folder_path, TOMBSTONES_FILE_NAME)
+    if len(tombstones) == 0:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, tombstones.astype(np.int64))
+    os.replace(path + ".tmp", path)
+
+
+def reset_incremental_state(folder_path: str, rows: int):
+    """
+    Marks a folder as freshly rebuilt: no tombstones, and no complaint
+    hashes, so the next incremental update re-checks every complaint.
+    """
+    save_tombstones(folder_path, np.empty(0, dtype=np.int64))
+    hashes_path = os.path.join(folder_path, COMPLAINT_HASHES_FILE_NAME)
+    if os.path.exists(hashes_path):
+        os.remove(hashes_path)
+    write_manifest(folder_path, rows=rows, live_rows=rows, tombstones=0)
+
+
+def compact(index, metadata_store: MetadataStore, tombstones: np.ndarray, config):
+    """
+    Rebuilds the index and metadata store without tombstoned rows.
+    Live vectors are reconstructed from the index and re-added to an empty
+    copy of it, so IVF quantizers are reused rather than retrained. IVF-PQ
+    vectors are re-encoded from their decoded approximations.
+    Returns:
+        tuple: (compacted faiss.Index, compacted MetadataStore)
+    """
+    import faiss
+
+    live = np.setdiff1d(np.arange(index.ntotal, dtype=np.int64), tombstones)
+
+    enable_reconstruct(index, config)
+    compacted = faiss.clone_index(index)
+    compacted.reset()
+    for start in range(0, len(live), DEFAULT_ADD_BATCH_SIZE):
+        compacted.add(
+            index.reconstruct_batch(live[start : start + DEFAULT_ADD_BATCH_SIZE])
+        )
+
+    return apply_search_params(compacted, config), metadata_store.take(live)
+
+
+class IncrementalIndexer:
+    """
+    Applies a complaint feed to an existing vector store folder without
+    rebuilding it. Complaints are diffed against the indexed set by
+    Complaint ID and content hash: only new or changed complaints are
+    chunked and embedded, and chunks of changed or deleted complaints are
+    tombstoned so searches skip them. Once tombstones exceed
+    `compact_ratio` of the index the folder is compacted.
+    The BM25 index of hybrid retrieval is not updated: complaints added here
+    are only keyword-searchable after scripts/build_sparse_index.py reruns.
+    """
+
+    def __init__(
+        self,
+        folder_path: str,
+        embed_documents: Callable = None,
+        text_processor=None,
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+    ):
+        """
+        Args:
+            folder_path (str): Vector store folder written by prepare_parquet.
+            embed_documents (Callable): list of texts -> list of vectors.
+                Defaults to VectorManager's cached embedding engine.
+            text_processor (TextProcessor, optional): Chunker for new complaints.
+            compact_ratio (float): Tombstone fraction that triggers compaction.
+        """
+        self.folder_path = folder_path
+        self.compact_ratio = compact_ratio
+        self._embed_documents = embed_documents
+        self._text_processor = text_processor
+
+    @property
+    def embed_documents(self) -> Callable:
+        if self._embed_documents is None:
+            from src.vector_manager import VectorManager
+
+            self._embed_documents = VectorManager().engine.embed
+        return self._embed_documents
+
+    @property
+    def text_processor(self):
+        if self._text_processor is None:
+            from src.text_processor import TextProcessor
+
+            self._text_processor = TextProcessor()
+        return self._text_processor
+
+    def _read_hashes(self, metadata_store: MetadataStore) -> pd.Series:
+        path = os.path.join(self.folder_path, COMPLAINT_HASHES_FILE_NAME)
+        if os.path.exists(path):
+            df = pd.read_parquet(path)
+            return pd.Series(df[HASH_COLUMN].to_numpy(), index=df[ID_COLUMN])
+
+        # A store built by prepare_parquet has no hashes yet. A zero hash never
+        # matches, so every complaint already indexed is re-embedded once
+        ids = pd.unique(metadata_store.column(ID_COLUMN).to_pandas().dropna())
+        return pd.Series(np.zeros(len(ids), dtype=np.uint64), index=ids)
+
+    def _write_hashes(self, hashes: pd.Series):
+        path = os.path.join(self.folder_path, COMPLAINT_HASHES_FILE_NAME)
+        pd.DataFrame(
+            {ID_COLUMN: hashes.index.astype(str), HASH_COLUMN: hashes.to_numpy()}
+        ).to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+    def _check_consistent(self, index, metadata_store: MetadataStore, tombstones):
+        """
+        Refuses a folder whose files disagree with its manifest. The manifest
+        is written last, so an update interrupted after writing the index,
+        re-ranking vectors, metadata store or tombstones leaves them ahead of it.
+        Raises:
+            RuntimeError: If any of them does not match the manifest.
+        """
+        manifest = read_manifest(self.folder_path)
+        rows = manifest.get("rows", index.ntotal)
+        found = {
+            "index rows": (index.ntotal, rows),
+            "metadata rows": (len(metadata_store), rows),
+            "tombstones": (
+                len(tombstones),
+                manifest.get("tombstones", len(tombstones)),
+            ),
+        }
+        vectors_path = os.path.join(self.folder_path, RERANK_VECTORS_FILE_NAME)
+        if os.path.exists(vectors_path):
+            found["re-ranking vectors"] = (
+                len(np.load(vectors_path, mmap_mode="r")),
+                rows,
+            )
+
+        mismatched = [
+            f"{name} {actual} != {expected}"
+            for name, (actual, expected) in found.items()
+            if actual != expected
+        ]
+        if mismatched:
+            raise RuntimeError(
+                f"{self.folder_path} was left mid-update ({', '.join(mismatched)}). "
+                "Rebuild it with scripts/prepare_parquet.py"
+            )
+
+    def update(
+        self,
+        chunks: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        snapshot: bool = True,
+        deleted_ids: list = None,
+        force_compact: bool = False,
+    ) -> dict:
+        """
+        Applies complaints to the index, one DataFrame chunk at a time.
+        Args:
+            chunks (pd.DataFrame or iterable): Complaints with Complaint ID, narrative
+                and metadata columns, e.g. from DataLoader.stream_from_csv.
+            snapshot (bool): Whether the input is the full current feed, so indexed
+                complaints missing from it are deleted. False for daily deltas.
+            deleted_ids (list, optional): Complaint IDs to delete explicitly.
+            force_compact (bool): Compact even below the tombstone threshold.
+        Returns:
+            dict: Counts of added/changed/deleted complaints and chunks, and the new manifest.
+        Raises:
+            RuntimeError: If a previous update was interrupted part way, or the
+                folder is sharded.
+        """
+        start = time.perf_counter()
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+
+        if os.path.exists(os.path.join(self.folder_path, SHARD_MANIFEST_FILE_NAME)):
+            raise RuntimeError(
+                f"{self.folder_path} is sharded. "
+                "Rebuild changed shards with scripts/prepare_parquet.py --shards"
+            )
+        index, config = read_index(self.folder_path, mmap=False)
+        metadata_store = MetadataStore.open(self.folder_path)
+        tombstones = load_tombstones(self.folder_path)
+        self._check_consistent(index, metadata_store, tombstones)
+
+        # Re-ranking vectors follow the index rows through appends and compaction
+        rerank_vectors = (
+            load_rerank_vectors(self.folder_path, index.ntotal)
+            if config.rerank_factor
+            else None
+        )
+
+        indexed = self._read_hashes(metadata_store)
+        seen, added, changed = [], 0, []
+        new_parts, new_vectors = [], []
+        # Complaints embedded by this update: their hash and appended rows.
+        # A complaint repeated in a later chunk replaces its earlier version
+        applied, applied_rows, superseded = {}, {}, []
+
+        for chunk in chunks:
+            chunk = chunk.drop_duplicates(Columns.COMPLAINT_ID.value, keep="last")
+            ids = chunk[Columns.COMPLAINT_ID.value].astype(str).to_numpy()
+            hashes = content_hashes(chunk)
+            seen.append(ids)
+
+            repeated = np.isin(ids, list(applied))
+            known = np.isin(ids, indexed.index) & ~repeated
+            is_changed = np.zeros(len(ids), dtype=bool)
+            is_changed[known] = indexed.loc[ids[known]].to_numpy() != hashes[known]
+            is_replaced = np.zeros(len(ids), dtype=bool)
+            is_replaced[repeated] = [
+                applied[key] != value
+                for key, value in zip(ids[repeated], hashes[repeated])
+            ]
+            pending = ~(known | repeated) | is_changed | is_replaced
+            if not pending.any():
+                continue
+
+            added += int((~(known | repeated)).sum())
+            changed.extend(ids[is_changed])
+            for key in ids[is_replaced]:
+                superseded.append(applied_rows.pop(key, np.empty(0, np.int64)))
+            applied.update(zip(ids[pending], hashes[pending]))
+
+            complaints = chunk[pending]
+            first_row = index.ntotal
+            batches = []
+            for batch in self.text_processor.iter_chunk_batches(
+                complaints[Columns.COMPLAINT.value]
+            ):
+                vectors = np.asarray(self.embed_documents(batch.texts), np.float32)
+                index.add(vectors)
+                if rerank_vectors is not None:
+                    new_vectors.append(vectors)
+                batches.append(batch)
+            batch = ChunkBatch.concat(batches)
+            if not len(batch):
+                continue
+            parents = complaints[Columns.COMPLAINT_ID.value].astype(str).to_numpy()
+            rows = first_row + np.arange(len(batch))
+            for parent in np.unique(batch.parent_rows):
+                applied_rows[parents[parent]] = rows[batch.parent_rows == parent]
+            # New chunks follow the layout of the store they are appended to
+            if metadata_store.has_offsets:
+                new_parts.append(
+                    MetadataStore.from_offsets(
+                        batch.parent_rows, batch.starts, batch.ends, complaints
+                    )
+                )
+            else:
+                new_parts.append(
+                    MetadataStore.from_chunks(
+                        batch.texts, batch.parent_rows, complaints
+                    )
+                )
+
+        # Chunks of changed and deleted complaints are tombstoned
+        removed = set(changed) | set(str(i) for i in deleted_ids or [])
+        if snapshot:
+            all_seen = np.concatenate(seen) if seen else np.empty(0, dtype=object)
+            removed |= set(indexed.index[~np.isin(indexed.index, all_seen)])
+
+        if removed:
+            stale = pc.is_in(
+                metadata_store.column(ID_COLUMN).cast(pa.string()),
+                value_set=pa.array(sorted(removed), type=pa.string()),
+            )
+            stale_rows = np.flatnonzero(stale.to_numpy(zero_copy_only=False))
+            tombstones = np.union1d(tombstones, stale_rows).astype(np.int64)
+        if superseded:
+            tombstones = np.union1d(tombstones, np.concatenate(superseded))
+
+        for part in new_parts:
+            metadata_store = metadata_store.append(part)
+
+        deleted = removed - set(changed)
+        hashes = indexed.drop(index=list(removed & set(indexed.index)))
+        hashes = pd.concat([hashes, pd.Series(applied, dtype=np.uint64)])
+
+        compacted = len(tombstones) > 0 and (
+            force_compact or len(tombstones) > self.compact_ratio * index.ntotal
+        )
+        if rerank_vectors is not None:
+            rerank_vectors = np.concatenate([rerank_vectors, *new_vectors])
+        if compacted:
+            print(f"Compacting {len(tombstones)} tombstoned rows...")
+            index, metadata_store = compact(index, metadata_store, tombstones, config)
+            if rerank_vectors is not None:
+                rerank_vectors = np.delete(rerank_vectors, tombstones, axis=0)
+            tombstones = np.empty(0, dtype=np.int64)
+
+        write_index(index, self.folder_path, config, rerank_vectors)
+        metadata_store.write(self.folder_path)
+        save_tombstones(self.folder_path, tombstones)
+        self._write_hashes(hashes)
+        manifest = write_manifest(
+            self.folder_path,
+            rows=index.ntotal,
+            live_rows=index.ntotal - len(tombstones),
+            tombstones=len(tombstones),
+        )
+
+        if added or changed:
+            if os.path.isdir(os.path.join(self.folder_path, SPARSE_INDEX_DIR_NAME)):
+                print(
+                    "The BM25 index does not include these changes. "
+                    "Rebuild it with scripts/build_sparse_index.py"
+                )
+
+        return {
+            "added": added,
+            "changed": len(changed),
+            "deleted": len(deleted),
+            "chunks_added": int(sum(len(part) for part in new_parts)),
+            "compacted": bool(compacted),
+            "seconds": round(time.perf_counter() - start, 3),
+            "manifest": manifest,
+        }
@@ -0,0 +1,465 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from dataclasses import asdict, dataclass
+from typing import Iterator
+from scripts.constants import (
+    FAISS_INDEX_FILE_NAME,
+    INDEX_CONFIG_FILE_NAME,
+    MANIFEST_FILE_NAME,
+    METADATA_STORE_FILE_NAME,
+    RERANK_VECTORS_FILE_NAME,
+    SPARSE_INDEX_DIR_NAME,
+    TOMBSTONES_FILE_NAME,
+    Index_Types,
+    Vector_Dtypes,
+)
+
+DEFAULT_ADD_BATCH_SIZE = 50000
+
+# FAISS warns below roughly this many training points per IVF list
+MIN_POINTS_PER_LIST = 39
+
+# FAISS scalar quantizer storing each vector component as the given type
+SCALAR_QUANTIZERS = {
+    Vector_Dtypes.FLOAT16.value: "SQfp16",
+    Vector_Dtypes.INT8.value: "SQ8",
+}
+
+
+@dataclass
+class IndexConfig:
+    """
+    Describes which FAISS index to build and how to search it.
+    Attributes:
+        index_type (str): One of Index_Types values.
+        nlist (int): Number of IVF lists (ivf_flat, ivf_pq).
+        pq_m (int): Number of PQ sub-quantizers (ivf_pq). Must divide the vector dimension.
+        pq_nbits (int): Bits per PQ code (ivf_pq).
+        hnsw_m (int): Graph degree (hnsw).
+        ef_construction (int): Build-time candidate list size (hnsw).
+        nprobe (int): IVF lists visited per query.
+        ef_search (int): Search-time candidate list size (hnsw).
+        train_size (int): Maximum number of vectors sampled to train IVF quantizers.
+        vector_dtype (str): One of Vector_Dtypes values. float16 and int8 store
+            scalar-quantized vectors (flat, ivf_flat, hnsw) at 1/2 and 1/4 of
+            the float32 size.
+        rerank_factor (int): When above 1, searches fetch k * rerank_factor
+            candidates and re-rank them by exact distance to float32 vectors
+            kept on disk next to the index. 0 disables re-ranking.
+    """
+
+    index_type: str = Index_Types.FLAT.value
+    nlist: int = 1024
+    pq_m: int = 48
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16
+    ef_search: int = 64
+    train_size: int = 100000
+    vector_dtype: str = Vector_Dtypes.FLOAT32.value
+    rerank_factor: int = 0
+
+    def factory_string(self, n_vectors: int) -> str:
+        """
+        Returns the faiss.index_factory description for this config.
+        Args:
+            n_vectors (int): Number of vectors that will be indexed, used to cap nlist.
+        """
+        nlist = max(1, min(self.nlist, n_vectors // MIN_POINTS_PER_LIST))
+        if self.vector_dtype not in [d.value for d in Vector_Dtypes]:
+            raise ValueError(
+                f"Unknown vector dtype {self.vector_dtype}. "
+                f"Choose one of {[d.value for d in Vector_Dtypes]}"
+            )
+        quantizer = SCALAR_QUANTIZERS.get(self.vector_dtype)
+
+        if self.index_type == Index_Types.FLAT.value:
+            return quantizer or "Flat"
+        if self.index_type == Index_Types.IVF_FLAT.value:
+            return f"IVF{nlist},{quantizer or 'Flat'}"
+        if self.index_type == Index_Types.IVF_PQ.value:
+            if quantizer:
+                raise ValueError("ivf_pq already compresses vectors; use float32")
+            return f"IVF{nlist},PQ{self.pq_m}x{self.pq_nbits}"
+        if self.index_type == Index_Types.HNSW.value:
+            return f"HNSW{self.hnsw_m}" + (f",{quantizer}" if quantizer else "")
+
+        raise ValueError(
+            f"Unknown index type {self.index_type}. "
+            f"Choose one of {[t.value for t in Index_Types]}"
+        )
+
+    def save(self, folder_path: str):
+        """Writes the config as JSON next to the index."""
+        with open(os.path.join(folder_path, INDEX_CONFIG_FILE_NAME), "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "IndexConfig":
+        """
+        Reads the config stored next to an index. Indexes written before
+        configs existed are exact flat indexes.
+        """
+        config_path = os.path.join(folder_path, INDEX_CONFIG_FILE_NAME)
+        if not os.path.exists(config_path):
+            return cls()
+        with open(config_path) as f:
+            return cls(**json.load(f))
+
+
+def iter_embedding_batches(
+    embeddings: pd.Series, batch_size: int = DEFAULT_ADD_BATCH_SIZE
+) -> Iterator[np.ndarray]:
+    """
+    Converts an embedding column (one list/array per row) into contiguous
+    float32 matrices of at most `batch_size` rows, one batch at a time.
+    Args:
+        embeddings (pd.Series or np.ndarray): Column holding one vector per row,
+            or an (n, dim) matrix, which is sliced without restacking.
+        batch_size (int): Number of rows per yielded matrix.
+    Yields:
+        np.ndarray: A C-contiguous float32 array of shape (rows, dim).
+    """
+    if isinstance(embeddings, np.ndarray):
+        for start in range(0, len(embeddings), batch_size):
+            yield np.ascontiguousarray(
+                embeddings[start : start + batch_size], dtype=np.float32
+            )
+        return
+
+    values = embeddings.to_numpy()
+    for start in range(0, len(values), batch_size):
+        rows = values[start : start + batch_size]
+        batch = np.empty((len(rows), len(rows[0])), dtype=np.float32)
+        np.stack(rows, out=batch)
+        yield batch
+
+
+def embeddings_to_matrix(
+    embeddings: pd.Series, batch_size: int = DEFAULT_ADD_BATCH_SIZE
+) -> np.ndarray:
+    """
+    Stacks an embedding column into a single contiguous float32 matrix.
+    Args:
+        embeddings (pd.Series): Column holding one vector per row.
+        batch_size (int): Number of rows converted at a time.
+    Returns:
+        np.ndarray: Array of shape (rows, dim).
+    """
+    if embeddings.empty:
+        raise ValueError("No embeddings to stack")
+
+    dim = len(embeddings.iloc[0])
+    matrix = np.empty((len(embeddings), dim), dtype=np.float32)
+    start = 0
+    for batch in iter_embedding_batches(embeddings, batch_size):
+        matrix[start : start + len(batch)] = batch
+        start += len(batch)
+    return matrix
+
+
+def sample_training_matrix(
+    embeddings: pd.Series, train_size: int, seed: int = 42
+) -> np.ndarray:
+    """
+    Stacks a random sample of at most `train_size` vectors for training
+    IVF/PQ quantizers.
+    """
+    if len(embeddings) > train_size:
+        rows = np.sort(
+            np.random.default_rng(seed).choice(
+                len(embeddings), train_size, replace=False
+            )
+        )
+        embeddings = (
+            embeddings[rows]
+            if isinstance(embeddings, np.ndarray)
+            else embeddings.iloc[rows]
+        )
+    if isinstance(embeddings, np.ndarray):
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    return embeddings_to_matrix(embeddings)
+
+
+def create_index(dim: int, n_vectors: int, config: IndexConfig):
+    """
+    Creates an empty, untrained FAISS index for the given config.
+    Args:
+        dim (int): Vector dimension.
+        n_vectors (int): Number of vectors that will be added.
+        config (IndexConfig): The index description.
+    Returns:
+        faiss.Index: The new index.
+    """
+    import faiss
+
+    index = faiss.index_factory(dim, config.factory_string(n_vectors))
+    if config.index_type == Index_Types.HNSW.value:
+        index.hnsw.efConstruction = config.ef_construction
+    return index
+
+
+def apply_search_params(index, config: IndexConfig):
+    """
+    Applies the config's nprobe / efSearch to an index. Parameters that do
+    not apply to the index type are ignored.
+    """
+    import faiss
+
+    params = faiss.ParameterSpace()
+    if config.index_type in (Index_Types.IVF_FLAT.value, Index_Types.IVF_PQ.value):
+        params.set_index_parameter(index, "nprobe", config.nprobe)
+    elif config.index_type == Index_Types.HNSW.value:
+        params.set_index_parameter(index, "efSearch", config.ef_search)
+    return index
+
+
+def build_index(
+    embeddings: pd.Series,
+    config: IndexConfig = None,
+    batch_size: int = DEFAULT_ADD_BATCH_SIZE,
+):
+    """
+    Builds a FAISS index from an embedding column. Quantizers are trained on
+    a sample, then vectors are added batch by batch so only one float32
+    batch is alive next to the index at any time.
+    Args:
+        embeddings (pd.Series or np.ndarray): Column holding one vector per row,
+            or an (n, dim) matrix.
+        config (IndexConfig): The index description. Defaults to an exact flat index.
+        batch_size (int): Number of vectors added per call to index.add.
+    Returns:
+        faiss.Index: The populated index with search parameters applied.
+    """
+    config = config or IndexConfig()
+
+    if len(embeddings) == 0:
+        raise ValueError("No embeddings to index")
+
+    dim = len(
+        embeddings[0] if isinstance(embeddings, np.ndarray) else embeddings.iloc[0]
+    )
+    index = create_index(dim, len(embeddings), config)
+
+    if not index.is_trained:
+        print(f"Training {config.index_type} index...")
+        index.train(sample_training_matrix(embeddings, config.train_size))
+
+    for batch in iter_embedding_batches(embeddings, batch_size):
+        index.add(batch)
+
+    return apply_search_params(index, config)
+
+
+def enable_reconstruct(index, config: IndexConfig):
+    """
+    Lets index.reconstruct_batch look up rows by id. IVF indexes need a
+    direct map from ids to list positions (8 bytes per vector) built first.
+    """
+    import faiss
+
+    if config.index_type in (Index_Types.IVF_FLAT.value, Index_Types.IVF_PQ.value):
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index
+
+
+def write_index(index, folder_path: str, config: IndexConfig, vectors=None):
+    """
+    Writes the index and its config to a folder, in the layout
+    FAISS.save_local/load_local uses for the index file.
+    The file is written aside and renamed into place, so processes that
+    memory-mapped the previous index keep reading a complete file.
+    Args:
+        index (faiss.Index): The index to write.
+        folder_path (str): The index folder.
+        config (IndexConfig): The index description.
+        vectors (pd.Series or np.ndarray, optional): float32 vectors of every row,
+            kept for re-ranking when config.rerank_factor is set.
+    """
+    import faiss
+
+    os.makedirs(folder_path, exist_ok=True)
+    path = os.path.join(folder_path, FAISS_INDEX_FILE_NAME)
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    config.save(folder_path)
+
+    vectors_path = os.path.join(folder_path, RERANK_VECTORS_FILE_NAME)
+    if config.rerank_factor and vectors is not None:
+        write_rerank_vectors(vectors, folder_path)
+    elif not config.rerank_factor and os.path.exists(vectors_path):
+        os.remove(vectors_path)
+
+
+def write_rerank_vectors(
+    embeddings, folder_path: str, batch_size: int = DEFAULT_ADD_BATCH_SIZE
+):
+    """
+    Writes the float32 vectors used to re-rank quantized search results as
+    an .npy file, batch by batch, so it can be memory-mapped when loaded.
+    Args:
+        embeddings (pd.Series or np.ndarray): One vector per index row.
+        folder_path (str): The index folder.
+        batch_size (int): Number of rows converted at a time.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    path = os.path.join(folder_path, RERANK_VECTORS_FILE_NAME)
+    dim = len(
+        embeddings[0] if isinstance(embeddings, np.ndarray) else embeddings.iloc[0]
+    )
+    out = np.lib.format.open_memmap(
+        path + ".tmp", mode="w+", dtype=np.float32, shape=(len(embeddings), dim)
+    )
+    start = 0
+    for batch in iter_embedding_batches(embeddings, batch_size):
+        out[start : start + len(batch)] = batch
+        start += len(batch)
+    out.flush()
+    del out
+    os.replace(path + ".tmp", path)
+
+
+def load_rerank_vectors(folder_path: str, n_rows: int):
+    """
+    Memory-maps the re-ranking vectors, so only the rows of each shortlist
+    are paged in.
+    Args:
+        folder_path (str): The index folder.
+        n_rows (int): Rows of the index; vectors of a different count are stale.
+    Returns:
+        np.ndarray or None: (n_rows, dim) float32 memmap, or None if missing or stale.
+    """
+    path = os.path.join(folder_path, RERANK_VECTORS_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    vectors = np.load(path, mmap_mode="r")
+    if len(vectors) != n_rows:
+        print(
+            f"Ignoring {path}: {len(vectors)} vectors for {n_rows} index rows. "
+            "Rebuild the index to re-rank again"
+        )
+        return None
+    return vectors
+
+
+def rerank(queries: np.ndarray, ids: np.ndarray, vectors: np.ndarray, k: int):
+    """
+    Re-orders shortlisted ids by exact squared L2 distance to their float32
+    vectors.
+    Args:
+        queries (np.ndarray): (n, dim) float32 queries.
+        ids (np.ndarray): (n, m) shortlisted row ids, -1 for no hit.
+        vectors (np.ndarray): float32 vectors of every index row.
+        k (int): Number of neighbours to keep.
+    Returns:
+        tuple: (distances, ids) shaped like index.search output.
+    """
+    found = ids >= 0
+    candidates = np.asarray(vectors[np.where(found, ids, 0).ravel()], np.float32)
+    candidates = candidates.reshape(ids.shape + (-1,))
+    distances = ((candidates - queries[:, None, :]) ** 2).sum(axis=2)
+    distances[~found] = np.inf
+    top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, top, 1), np.take_along_axis(ids, top, 1)
+
+
+def read_index(folder_path: str, mmap: bool = True):
+    """
+    Reads an index written by write_index or FAISS.save_local.
+    With mmap enabled, IVF inverted lists are memory-mapped from the file
+    instead of copied into RAM, so worker processes opening the same file
+    share one page-cached copy. Flat and HNSW storage is still read into
+    memory by FAISS.
+    Args:
+        folder_path (str): The folder containing the index file.
+        mmap (bool): Whether to memory-map the index file.
+    Returns:
+        tuple: (faiss.Index with search parameters applied, IndexConfig)
+    """
+    import faiss
+
+    config = IndexConfig.load(folder_path)
+    io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(os.path.join(folder_path, FAISS_INDEX_FILE_NAME), io_flags)
+    return apply_search_params(index, config), config
+
+
+def index_version(folder_path: str) -> str:
+    """
+    Identifies the on-disk index build from the size and modification time
+    of its files, so caches can tell when the index was rebuilt or updated.
+    The BM25 index is rebuilt on its own and hybrid results depend on it,
+    so its files count too.
+    """
+    file_names = [
+        FAISS_INDEX_FILE_NAME,
+        METADATA_STORE_FILE_NAME,
+        TOMBSTONES_FILE_NAME,
+        MANIFEST_FILE_NAME,
+        RERANK_VECTORS_FILE_NAME,
+    ]
+    sparse_path = os.path.join(folder_path, SPARSE_INDEX_DIR_NAME)
+    if os.path.isdir(sparse_path):
+        file_names += [
+            os.path.join(SPARSE_INDEX_DIR_NAME, name)
+            for name in sorted(os.listdir(sparse_path))
+        ]
+
+    parts = []
+    for file_name in file_names:
+        path = os.path.join(folder_path, file_name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def evaluate_index(
+    index,
+    baseline,
+    queries: np.ndarray,
+    k: int = 5,
+    rerank_vectors: np.ndarray = None,
+    rerank_factor: int = 0,
+) -> dict:
+    """
+    Measures recall@k and per-query latency of an index against an exact
+    baseline index.
+    Args:
+        index (faiss.Index): The index under test.
+        baseline (faiss.Index): An exact index over the same vectors.
+        queries (np.ndarray): float32 query matrix.
+        k (int): Number of neighbours to compare.
+        rerank_vectors (np.ndarray, optional): float32 vectors to re-rank hits with.
+        rerank_factor (int): Candidates fetched per neighbour when re-ranking.
+    Returns:
+        dict: recall_at_k, mean_ms, p50_ms, p95_ms, p99_ms
+    """
+    _, expected = baseline.search(queries, k)
+    reranking = rerank_vectors is not None and rerank_factor > 1
+
+    latencies = []
+    found = []
+    for query in queries:
+        query = query.reshape(1, -1)
+        start = time.perf_counter()
+        _, ids = index.search(query, k * rerank_factor if reranking else k)
+        if reranking:
+            _, ids = rerank(query, ids, rerank_vectors, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+
+    hits = sum(len(set(result) & set(truth)) for result, truth in zip(found, expected))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "recall_at_k": hits / (len(queries) * k),
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
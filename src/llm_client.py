@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import threading
+from typing import AsyncIterator, Optional
+from scripts.constants import (
+    LLM_API_URL,
+    LLM_MAX_TOKENS,
+    LLM_TEMPERATURE,
+    Backpressure_Policies,
+)
+
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_EXPIRY_SECONDS = 60
+
+
+class LLMOverloadedError(RuntimeError):
+    """Raised when the backpressure policy refuses an LLM request."""
+
+
+class ConcurrencyLimiter:
+    """
+    Async context manager bounding in-flight LLM requests.
+    When every slot is busy the policy decides what a new request does:
+    "wait" queues it (at most `max_waiting` deep), "reject" fails it at once,
+    and "timeout" queues it for at most `timeout` seconds.
+    Refused requests raise LLMOverloadedError so callers can shed load
+    instead of piling up behind a slow endpoint.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        policy: str = Backpressure_Policies.WAIT.value,
+        max_waiting: int = 64,
+        timeout: float = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.policy = Backpressure_Policies(policy).value
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def __aenter__(self):
+        if self.active >= self.max_concurrency:
+            if (
+                self.policy == Backpressure_Policies.REJECT.value
+                or self.waiting >= self.max_waiting
+            ):
+                self.rejected += 1
+                raise LLMOverloadedError(
+                    f"{self.active} LLM requests in flight, {self.waiting} waiting"
+                )
+
+        self.waiting += 1
+        try:
+            if self.policy == Backpressure_Policies.TIMEOUT.value:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMOverloadedError(
+                f"No LLM slot freed up within {self.timeout} s"
+            ) from None
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+
+class AsyncLLMClient:
+    """
+    Chat completions client sharing one pooled keep-alive HTTP connection
+    pool across all requests, so concurrent sessions reuse warm TLS
+    connections instead of opening one per call.
+    The pool and limiter belong to the event loop they were created on and
+    are rebuilt transparently if the client is used from a new loop, closing
+    the previous pool.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        api_url: str = LLM_API_URL,
+        api_token: Optional[str] = None,
+        max_concurrency: int = 8,
+        policy: str = Backpressure_Policies.WAIT.value,
+        max_waiting: int = 64,
+        queue_timeout: float = 30.0,
+        request_timeout: float = 120.0,
+        temperature: float = LLM_TEMPERATURE,
+        max_tokens: int = LLM_MAX_TOKENS,
+        transport=None,
+    ):
+        """
+        Args:
+            model (str): Model id sent with each request.
+            api_url (str): Chat completions endpoint.
+            api_token (str, optional): Bearer token. Defaults to HUGGINGFACEHUB_API_TOKEN.
+            max_concurrency (int): Requests allowed in flight at once; also the pool size.
+            policy (str): Backpressure_Policies value applied when all slots are busy.
+            max_waiting (int): Requests allowed to queue for a slot.
+            queue_timeout (float): Seconds a request may queue under the "timeout" policy.
+            request_timeout (float): Seconds before an HTTP request is abandoned.
+            temperature (float): Sampling temperature.
+            max_tokens (int): Maximum tokens generated per answer.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport, for tests.
+        """
+        self.model = model
+        self.api_url = api_url
+        self.api_token = api_token or os.getenv("HUGGINGFACEHUB_API_TOKEN")
+        self.max_concurrency = max_concurrency
+        self.policy = policy
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.transport = transport
+        self._loop = None
+        self._client = None
+        self.limiter = None
+
+    def _ensure_client(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._release_client()
+        self._loop = loop
+        headers = {}
+        if self.api_token:
+            headers["Authorization"] = f"Bearer {self.api_token}"
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            timeout=self.request_timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            transport=self.transport,
+        )
+        self.limiter = ConcurrencyLimiter(
+            self.max_concurrency, self.policy, self.max_waiting, self.queue_timeout
+        )
+
+    def _release_client(self):
+        """
+        Closes the pool created on a previous event loop. Its connections
+        belong to that loop, so they are closed there: scheduled on it while
+        it runs, or run on a helper thread if it is stopped. A loop that has
+        already been closed can no longer run the shutdown; its sockets are
+        closed when the dropped client is collected.
+        """
+        client, loop = self._client, self._loop
+        self._client = None
+        if client is None or loop.is_closed():
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            # The current thread is running the new loop, so the old one runs elsewhere
+            closer = threading.Thread(
+                target=loop.run_until_complete, args=(client.aclose(),)
+            )
+            closer.start()
+            closer.join()
+
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream,
+        }
+        if stream:
+            # Token usage arrives in a final chunk with no choices
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    async def achat(self, prompt: str, usage: dict = None) -> str:
+        """
+        Sends one user message and returns the generated answer.
+        Args:
+            prompt (str): The user message.
+            usage (dict, optional): Filled with the endpoint's token usage, if it reports any.
+        Raises:
+            LLMOverloadedError: If the backpressure policy refuses the request.
+            httpx.HTTPStatusError: If the endpoint answers with an error status.
+        """
+        self._ensure_client()
+        async with self.limiter:
+            response = await self._client.post(
+                self.api_url, json=self._payload(prompt, stream=False)
+            )
+        response.raise_for_status()
+        body = response.json()
+        if usage is not None and body.get("usage"):
+            usage.update(body["usage"])
+        return body["choices"][0]["message"]["content"]
+
+    async def astream(self, prompt: str, usage: dict = None) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of achat, yielding answer fragments from the
+        endpoint's server-sent events. The slot is held until the stream ends.
+        """
+        self._ensure_client()
+        async with self.limiter:
+            async with self._client.stream(
+                "POST", self.api_url, json=self._payload(prompt, stream=True)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if usage is not None and chunk.get("usage"):
+                        usage.update(chunk["usage"])
+                    if not chunk.get("choices"):
+                        continue
+                    content = chunk["choices"][0]["delta"].get("content")
+                    if content:
+                        yield content
+
+    def stats(self) -> dict:
+        return self.limiter.stats() if self.limiter is not None else {}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -0,0 +1,404 @@
+import os
+from typing import Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scripts.constants import (
+    METADATA_STORE_FILE_NAME,
+    NARRATIVE_STORE_FILE_NAME,
+    Columns,
+    Embedding_Columns,
+    Metadata_Columns,
+    metadata_source_columns,
+)
+
+TEXT_COLUMN = Embedding_Columns.DOCUMENT.value
+
+# Offset layout: a chunk is its narrative's position and a character span in it
+PARENT_COLUMN = "parent"
+START_COLUMN = "start"
+END_COLUMN = "end"
+OFFSET_COLUMNS = [PARENT_COLUMN, START_COLUMN, END_COLUMN]
+
+NARRATIVE_COLUMN = "narrative"
+
+# Rows per record batch in the Arrow file
+WRITE_BATCH_ROWS = 65536
+
+# Low-cardinality fields stored dictionary-encoded
+DICTIONARY_COLUMNS = [
+    Metadata_Columns.PRODUCT.value,
+    Metadata_Columns.SUB_PRODUCT.value,
+    Metadata_Columns.ISSUE.value,
+    Metadata_Columns.COMPANY.value,
+    Metadata_Columns.STATE.value,
+]
+
+
+def _to_arrow(field: str, values) -> pa.Array:
+    """Converts one metadata column to its typed Arrow representation."""
+    series = pd.Series(values, dtype=object)
+
+    if field == Metadata_Columns.DATE_RECEIVED.value:
+        dates = pd.to_datetime(series, errors="coerce")
+        return pa.Array.from_pandas(dates).cast(pa.date32())
+
+    strings = pa.Array.from_pandas(series.astype("string"))
+    if field in DICTIONARY_COLUMNS:
+        return strings.dictionary_encode()
+    return strings
+
+
+def _metadata_arrays(metadata: dict, n: int) -> dict:
+    arrays = {}
+    for field in Metadata_Columns:
+        values = metadata.get(field.value)
+        if values is None:
+            values = [None] * n
+        arrays[field.value] = _to_arrow(field.value, values)
+    return arrays
+
+
+def _gather_metadata(parent_rows, df: pd.DataFrame) -> dict:
+    return {
+        field: df[source_col].to_numpy()[parent_rows]
+        for field, source_col in metadata_source_columns.items()
+        if source_col in df.columns
+    }
+
+
+def _write_table(table: pa.Table, path: str):
+    """
+    Writes an uncompressed Arrow IPC file aside and renames it into place,
+    so a reader memory-mapping the previous file is never truncated under it.
+    """
+    # Appended stores carry one dictionary per part; IPC files allow one per column
+    table = table.unify_dictionaries()
+    with pa.OSFile(path + ".tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=WRITE_BATCH_ROWS)
+    os.replace(path + ".tmp", path)
+
+
+def _read_table(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+class NarrativeStore:
+    """
+    Complaint narratives stored once each, in one memory-mapped Arrow
+    string column (a single text blob plus offsets). Chunks in the offset
+    layout point into it by position instead of copying their text.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "NarrativeStore":
+        """One entry per complaint row of df, in row order."""
+        return cls(
+            pa.table(
+                {
+                    NARRATIVE_COLUMN: pa.array(
+                        df[Columns.COMPLAINT.value], pa.large_string()
+                    )
+                }
+            )
+        )
+
+    def write(self, folder_path: str):
+        _write_table(self.table, os.path.join(folder_path, NARRATIVE_STORE_FILE_NAME))
+
+    @classmethod
+    def open(cls, folder_path: str) -> Optional["NarrativeStore"]:
+        path = os.path.join(folder_path, NARRATIVE_STORE_FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        return cls(_read_table(path))
+
+    def append(self, other: "NarrativeStore") -> "NarrativeStore":
+        return NarrativeStore(pa.concat_tables([self.table, other.table]))
+
+    def take(self, positions) -> "NarrativeStore":
+        return NarrativeStore(self.table.take(pa.array(positions, type=pa.int64())))
+
+    def text(self, position: int) -> Optional[str]:
+        return self.table.column(NARRATIVE_COLUMN)[int(position)].as_py()
+
+    def texts(self, positions) -> list:
+        return self.table.column(NARRATIVE_COLUMN).take(positions).to_pylist()
+
+
+class MetadataStore:
+    """
+    Column-oriented store of chunk text and metadata, addressed by the row id
+    of the chunk's vector in the FAISS index.
+    It is written as an uncompressed Arrow IPC file and memory-mapped on open,
+    so loading it is near-instant and worker processes share the page cache.
+    Documents are only materialized for the rows a search returns.
+    Chunk text is either stored per row, or in the offset layout as
+    (parent, start, end) into a NarrativeStore holding each narrative once.
+    """
+
+    def __init__(self, table: pa.Table, narratives: NarrativeStore = None):
+        self.table = table
+        self.narratives = narratives
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def has_offsets(self) -> bool:
+        return PARENT_COLUMN in self.table.column_names
+
+    @classmethod
+    def from_columns(cls, texts: list, metadata: dict) -> "MetadataStore":
+        """
+        Builds a store from chunk texts and metadata columns.
+        Args:
+            texts (list): Chunk texts in vector row order.
+            metadata (dict): Metadata_Columns value -> column values. Missing fields are stored as nulls.
+        Returns:
+            MetadataStore: The new store.
+        """
+        arrays = {TEXT_COLUMN: pa.array(texts, type=pa.large_string())}
+        arrays.update(_metadata_arrays(metadata, len(texts)))
+        return cls(pa.table(arrays))
+
+    @classmethod
+    def from_offsets(
+        cls, parent_rows, starts, ends, df: pd.DataFrame
+    ) -> "MetadataStore":
+        """
+        Builds a store in the offset layout: df's narratives are stored once
+        and each chunk keeps only its complaint's position and character span.
+        Args:
+            parent_rows (np.ndarray): Position in df of each chunk's complaint.
+            starts (np.ndarray): Chunk start offset in its narrative.
+            ends (np.ndarray): Chunk end offset in its narrative.
+            df (pd.DataFrame): The complaints, with raw column names.
+        Returns:
+            MetadataStore: The new store.
+        """
+        parent_rows = np.asarray(parent_rows, dtype=np.int64)
+        arrays = {
+            PARENT_COLUMN: pa.array(parent_rows, pa.int32()),
+            START_COLUMN: pa.array(np.asarray(starts, dtype=np.int32), pa.int32()),
+            END_COLUMN: pa.array(np.asarray(ends, dtype=np.int32), pa.int32()),
+        }
+        arrays.update(
+            _metadata_arrays(_gather_metadata(parent_rows, df), len(parent_rows))
+        )
+        return cls(pa.table(arrays), NarrativeStore.from_frame(df))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MetadataStore":
+        """
+        Builds a store from a pre-computed embeddings DataFrame.
+        Fields are read from the per-row metadata dicts, by field name or by
+        raw complaint column name, and the chunk id from the id column.
+        Args:
+            df (pd.DataFrame): DataFrame with document, and optionally id/metadata, columns.
+        Returns:
+            MetadataStore: The new store.
+        """
+        id_col = Embedding_Columns.ID.value
+        metadata_col = Embedding_Columns.METADATA.value
+
+        if metadata_col in df.columns:
+            metadata_df = pd.DataFrame.from_records(
+                [m if isinstance(m, dict) else {} for m in df[metadata_col]],
+                index=df.index,
+            )
+        else:
+            metadata_df = pd.DataFrame(index=df.index)
+
+        metadata = {}
+        for field, source_col in metadata_source_columns.items():
+            for candidate in (field, source_col):
+                if candidate in metadata_df.columns:
+                    metadata[field] = metadata_df[candidate].tolist()
+                    break
+
+        metadata[Metadata_Columns.ID.value] = (
+            df[id_col].tolist() if id_col in df.columns else [str(i) for i in df.index]
+        )
+
+        return cls.from_columns(df[TEXT_COLUMN].tolist(), metadata)
+
+    @classmethod
+    def from_chunks(cls, texts: list, parent_rows, df: pd.DataFrame) -> "MetadataStore":
+        """
+        Builds a store from columnar chunks, gathering each metadata column
+        from the complaint rows the chunks came from.
+        Args:
+            texts (list): Chunk texts in vector row order.
+            parent_rows (np.ndarray): Position in df of each chunk's complaint.
+            df (pd.DataFrame): The complaints, with raw column names.
+        Returns:
+            MetadataStore: The new store.
+        """
+        return cls.from_columns(texts, _gather_metadata(parent_rows, df))
+
+    @classmethod
+    def from_documents(cls, documents: list) -> "MetadataStore":
+        """
+        Builds a store from langchain Documents in vector row order.
+        """
+        metadata = {
+            field.value: [doc.metadata.get(field.value) for doc in documents]
+            for field in Metadata_Columns
+        }
+        return cls.from_columns([doc.page_content for doc in documents], metadata)
+
+    def write(self, folder_path: str):
+        """
+        Writes the store next to the index as an uncompressed Arrow IPC file,
+        with its narratives alongside in the offset layout.
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        narratives_path = os.path.join(folder_path, NARRATIVE_STORE_FILE_NAME)
+        if self.has_offsets:
+            self.narratives.write(folder_path)
+        elif os.path.exists(narratives_path):
+            os.remove(narratives_path)
+        _write_table(self.table, os.path.join(folder_path, METADATA_STORE_FILE_NAME))
+
+    @classmethod
+    def open(cls, folder_path: str) -> "MetadataStore":
+        """
+        Memory-maps a store written by `write`. No row data is copied until
+        it is read.
+        Raises:
+            FileNotFoundError: If the folder has no metadata store.
+        """
+        path = os.path.join(folder_path, METADATA_STORE_FILE_NAME)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No metadata store at {path}. "
+                "Rebuild the vector store with scripts/prepare_parquet.py"
+            )
+        table = _read_table(path)
+        narratives = (
+            NarrativeStore.open(folder_path)
+            if PARENT_COLUMN in table.column_names
+            else None
+        )
+        return cls(table, narratives)
+
+    def append(self, other: "MetadataStore") -> "MetadataStore":
+        """
+        Returns a store with `other`'s rows after this store's rows.
+        Raises:
+            ValueError: If one store uses the offset layout and the other does not.
+        """
+        if self.has_offsets != other.has_offsets:
+            raise ValueError("Cannot append stores with different text layouts")
+        if not self.has_offsets:
+            return MetadataStore(pa.concat_tables([self.table, other.table]))
+
+        # other's parents point into its own narratives, which go after ours
+        parents = pa.array(
+            other.table.column(PARENT_COLUMN).to_numpy()
+            + np.int32(len(self.narratives))
+        )
+        shifted = other.table.set_column(
+            other.table.schema.get_field_index(PARENT_COLUMN), PARENT_COLUMN, parents
+        )
+        return MetadataStore(
+            pa.concat_tables([self.table, shifted]),
+            self.narratives.append(other.narratives),
+        )
+
+    def take(self, rows) -> "MetadataStore":
+        """
+        Returns a store holding only the given rows, renumbered from zero.
+        Narratives no kept chunk points to are dropped.
+        """
+        table = self.table.take(pa.array(rows, type=pa.int64()))
+        if not self.has_offsets:
+            return MetadataStore(table)
+
+        kept, parents = np.unique(
+            table.column(PARENT_COLUMN).to_numpy(), return_inverse=True
+        )
+        table = table.set_column(
+            table.schema.get_field_index(PARENT_COLUMN),
+            PARENT_COLUMN,
+            pa.array(parents.astype(np.int32)),
+        )
+        return MetadataStore(table, self.narratives.take(kept))
+
+    def texts(self, rows) -> list:
+        """Chunk texts of the given rows, sliced from their narratives in the offset layout."""
+        rows = pa.array(rows, type=pa.int64())
+        if not self.has_offsets:
+            return self.table.column(TEXT_COLUMN).take(rows).to_pylist()
+
+        spans = self.table.select(OFFSET_COLUMNS).take(rows)
+        parents = spans.column(PARENT_COLUMN).to_numpy()
+        unique, inverse = np.unique(parents, return_inverse=True)
+        narratives = self.narratives.texts(unique)
+        return [
+            narratives[i][start:end]
+            for i, start, end in zip(
+                inverse,
+                spans.column(START_COLUMN).to_pylist(),
+                spans.column(END_COLUMN).to_pylist(),
+            )
+        ]
+
+    def parent_text(self, parent: int) -> Optional[str]:
+        """The full narrative at a chunk's `parent` position (offset layout only)."""
+        if self.narratives is None:
+            return None
+        return self.narratives.text(parent)
+
+    def window_text(
+        self, parent: int, start: int, end: int, window_chars: int
+    ) -> Optional[str]:
+        """A chunk's span widened by `window_chars` on each side, within its narrative."""
+        narrative = self.parent_text(parent)
+        if narrative is None:
+            return None
+        return narrative[max(0, start - window_chars) : end + window_chars]
+
+    def column(self, field: str) -> pa.ChunkedArray:
+        """Returns one stored column without copying it."""
+        return self.table.column(field)
+
+    def get_documents(self, rows: list) -> list:
+        """
+        Materializes langchain Documents for the given vector row ids.
+        Args:
+            rows (list): Row ids as returned by the FAISS index, in result order.
+        Returns:
+            list: One Document per row, with null metadata fields left out.
+        """
+        from langchain_core.documents import Document
+
+        if len(rows) == 0:
+            return []
+
+        texts = self.texts(rows)
+        columns = [name for name in self.table.column_names if name != TEXT_COLUMN]
+        records = (
+            self.table.select(columns).take(pa.array(rows, pa.int64())).to_pylist()
+        )
+
+        documents = []
+        for text, record in zip(texts, records):
+            date = record.get(Metadata_Columns.DATE_RECEIVED.value)
+            if date is not None:
+                record[Metadata_Columns.DATE_RECEIVED.value] = date.isoformat()
+            documents.append(
+                Document(
+                    page_content=text,
+                    metadata={k: v for k, v in record.items() if v is not None},
+                )
+            )
+        return documents
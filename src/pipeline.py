@@ -0,0 +1,692 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scripts.constants import (
+    EMBEDDED_VECTOR_STORE_PATH,
+    FAISS_INDEX_FILE_NAME,
+    INDEX_CONFIG_FILE_NAME,
+    METADATA_STORE_FILE_NAME,
+    NARRATIVE_STORE_FILE_NAME,
+    PIPELINE_ARTIFACTS_PATH,
+    RERANK_VECTORS_FILE_NAME,
+    SPARSE_INDEX_DIR_NAME,
+    Columns,
+    Pipeline_Stages,
+    Processed_Columns,
+    ingestion_columns,
+    ingestion_dtypes,
+    product_categories,
+)
+from src.incremental_index import reset_incremental_state
+from src.index_builder import IndexConfig, build_index, write_index
+from src.metadata_store import MetadataStore
+from src.sharded_index import clear_shards
+from src.sparse_index import SparseIndex
+from src.text_processor import ChunkBatch
+
+# Bump when a stage's output changes for the same input, so old checkpoints are not reused
+PIPELINE_VERSION = 2
+
+# Written into a stage's folder once every part is saved
+COMPLETE_FILE_NAME = "_COMPLETE.json"
+
+# Files the index stage publishes to the vector store folder
+INDEX_FILES = [
+    FAISS_INDEX_FILE_NAME,
+    INDEX_CONFIG_FILE_NAME,
+    METADATA_STORE_FILE_NAME,
+    NARRATIVE_STORE_FILE_NAME,
+]
+
+# Vectors the index stage spills to disk while parts arrive, removed once built
+VECTORS_SPILL_FILE_NAME = "vectors.f32"
+
+# Ends a stream of parts
+_DONE = object()
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_key(upstream: str, stage: str, params: dict) -> str:
+    """
+    Content address of a stage's output: a hash of its input's address,
+    the stage and its parameters. Changing anything upstream changes every
+    key below it, so only the affected stages rerun.
+    """
+    payload = json.dumps(
+        {
+            "upstream": upstream,
+            "stage": stage,
+            "params": params,
+            "version": PIPELINE_VERSION,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass
+class Part:
+    """One input chunk of complaints as it moves down the pipeline."""
+
+    index: int
+    frame: pd.DataFrame
+    chunks: Optional[ChunkBatch] = None
+    vectors: Optional[np.ndarray] = None
+
+
+@dataclass
+class StageStats:
+    stage: str
+    key: str
+    status: str = "ran"
+    parts: int = 0
+    reused_parts: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        status = self.status
+        if status == "ran" and self.reused_parts:
+            status = "resumed"
+        return {
+            **asdict(self),
+            "status": status,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": (
+                round(self.rows / self.seconds, 1) if self.seconds else None
+            ),
+        }
+
+
+class StageArtifacts:
+    """
+    Checkpoint folder of one stage run: <root>/<stage>/<key>/, holding one
+    file per part, each written aside and renamed into place, and a marker
+    once the stage has finished.
+    """
+
+    def __init__(self, root: str, stage: str, key: str):
+        self.path = os.path.join(root, stage, key)
+
+    @property
+    def complete(self) -> bool:
+        return os.path.exists(os.path.join(self.path, COMPLETE_FILE_NAME))
+
+    def summary(self) -> dict:
+        with open(os.path.join(self.path, COMPLETE_FILE_NAME)) as f:
+            return json.load(f)
+
+    def part_path(self, index: int, extension: str) -> str:
+        return os.path.join(self.path, f"part-{index:05d}.{extension}")
+
+    def mark_complete(self, summary: dict):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, COMPLETE_FILE_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(summary, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+class PipelineStage(ABC):
+    """
+    A per-part step. `run` computes a part's output, `save` checkpoints it
+    and `restore` reloads it instead of recomputing.
+    """
+
+    name: str = ""
+    extension: str = ""
+
+    def params(self) -> dict:
+        return {}
+
+    def run(self, part: Part) -> Part:
+        return part
+
+    def rows(self, part: Part) -> int:
+        return len(part.frame)
+
+    def has(self, artifacts: StageArtifacts, index: int) -> bool:
+        return os.path.exists(artifacts.part_path(index, self.extension))
+
+    @abstractmethod
+    def save(self, artifacts: StageArtifacts, part: Part):
+        pass
+
+    @abstractmethod
+    def restore(self, artifacts: StageArtifacts, part: Part) -> Part:
+        pass
+
+
+class FrameStage(PipelineStage):
+    """Stage whose output is the complaints frame, checkpointed as Parquet."""
+
+    extension = "parquet"
+
+    def save(self, artifacts: StageArtifacts, part: Part):
+        os.makedirs(artifacts.path, exist_ok=True)
+        path = artifacts.part_path(part.index, self.extension)
+        table = pa.Table.from_pandas(part.frame, preserve_index=False)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def restore(self, artifacts: StageArtifacts, part: Part) -> Part:
+        frame = pd.read_parquet(artifacts.part_path(part.index, self.extension))
+        return Part(part.index, frame)
+
+
+class LoadStage(FrameStage):
+    """Checkpoints the raw columns the pipeline reads from the complaint dump."""
+
+    name = Pipeline_Stages.LOAD.value
+
+    def __init__(self, source_path: str, chunk_rows: int):
+        self.source_path = source_path
+        self.chunk_rows = chunk_rows
+
+    def params(self) -> dict:
+        return {
+            "source": file_digest(self.source_path),
+            "chunk_rows": self.chunk_rows,
+            "columns": ingestion_columns,
+        }
+
+    def read(self) -> Iterator[Part]:
+        from src.data.loader import DataLoader
+
+        loader = DataLoader()
+        loader.raw_complaints_file_path = self.source_path
+        loader.chunk_size = self.chunk_rows
+        chunks = loader.stream_from_csv(
+            filter_complaints=False, columns=ingestion_columns, dtypes=ingestion_dtypes
+        )
+        for i, chunk in enumerate(chunks):
+            yield Part(i, chunk.reset_index(drop=True))
+
+
+class FilterStage(FrameStage):
+    """Keeps the configured products and drops null or blank narratives."""
+
+    name = Pipeline_Stages.FILTER.value
+
+    def params(self) -> dict:
+        return {"products": product_categories}
+
+    def run(self, part: Part) -> Part:
+        from src.data.preprocessor import DataPreprocessor
+
+        frame = DataPreprocessor(part.frame).filter_chunk()
+        return Part(part.index, frame.reset_index(drop=True))
+
+
+class CleanStage(FrameStage):
+    """Adds the cleaned and normalized narrative columns."""
+
+    name = Pipeline_Stages.CLEAN.value
+
+    def __init__(self, n_jobs: int = 1):
+        from src.data.normalizer import TextNormalizer
+
+        self.normalizer = TextNormalizer(n_jobs=n_jobs)
+
+    def run(self, part: Part) -> Part:
+        frame = self.normalizer.normalize_column(
+            part.frame.copy(),
+            Columns.COMPLAINT.value,
+            Processed_Columns.CLEANED_COMPLAINT.value,
+            Processed_Columns.NORMALIZED_COMPLAINT.value,
+        )
+        return Part(part.index, frame)
+
+
+class ChunkStage(PipelineStage):
+    """
+    Splits narratives into chunks. Only the (parent, start, end) offsets are
+    checkpointed; chunk text is sliced back out of the narratives.
+    """
+
+    name = Pipeline_Stages.CHUNK.value
+    extension = "npz"
+
+    def __init__(self, text_processor=None):
+        if text_processor is None:
+            from src.text_processor import TextProcessor
+
+            text_processor = TextProcessor()
+        self.text_processor = text_processor
+
+    def params(self) -> dict:
+        return {
+            "chunk_size": self.text_processor.chunk_size,
+            "chunk_overlap": self.text_processor.chunk_overlap,
+        }
+
+    def rows(self, part: Part) -> int:
+        return len(part.chunks)
+
+    def run(self, part: Part) -> Part:
+        part.chunks = self.text_processor.chunk_texts(
+            part.frame[Columns.COMPLAINT.value]
+        )
+        return part
+
+    def save(self, artifacts: StageArtifacts, part: Part):
+        os.makedirs(artifacts.path, exist_ok=True)
+        path = artifacts.part_path(part.index, self.extension)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                parent_rows=part.chunks.parent_rows,
+                starts=part.chunks.starts,
+                ends=part.chunks.ends,
+            )
+        os.replace(path + ".tmp", path)
+
+    def restore(self, artifacts: StageArtifacts, part: Part) -> Part:
+        with np.load(artifacts.part_path(part.index, self.extension)) as arrays:
+            parent_rows, starts, ends = (
+                arrays["parent_rows"],
+                arrays["starts"],
+                arrays["ends"],
+            )
+        narratives = part.frame[Columns.COMPLAINT.value].tolist()
+        texts = [
+            narratives[row][start:end]
+            for row, start, end in zip(parent_rows, starts, ends)
+        ]
+        part.chunks = ChunkBatch(texts, parent_rows, starts, ends)
+        return part
+
+
+class EmbedStage(PipelineStage):
+    """Embeds chunk texts; each part's vectors are checkpointed as .npy."""
+
+    name = Pipeline_Stages.EMBED.value
+    extension = "npy"
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from src.embedding_engine import EmbeddingEngine
+
+            engine = EmbeddingEngine()
+        self.engine = engine
+
+    def params(self) -> dict:
+        return {"model": self.engine.model_name}
+
+    def rows(self, part: Part) -> int:
+        return len(part.chunks)
+
+    def run(self, part: Part) -> Part:
+        part.vectors = self.engine.embed(part.chunks.texts)
+        return part
+
+    def save(self, artifacts: StageArtifacts, part: Part):
+        os.makedirs(artifacts.path, exist_ok=True)
+        path = artifacts.part_path(part.index, self.extension)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, part.vectors)
+        os.replace(path + ".tmp", path)
+
+    def restore(self, artifacts: StageArtifacts, part: Part) -> Part:
+        part.vectors = np.load(artifacts.part_path(part.index, self.extension))
+        return part
+
+
+class IngestionPipeline:
+    """
+    Builds the vector store from the raw complaint dump in six stages:
+    load, filter, clean, chunk, embed and index.
+    Every stage runs in its own thread and hands parts (one CSV chunk each)
+    to the next through a bounded queue, so all stages overlap while memory
+    stays bounded. The index stage appends each part's vectors to a file
+    and builds the index from its memory map; only the metadata store is
+    kept in memory until it is written. It also builds the BM25 index of
+    hybrid search from the clean stage's normalized narratives. Each part a stage produces is
+    checkpointed under a content-addressed folder, so a rerun reuses
+    finished stages and, after a crash, the parts already done.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        artifacts_path: str = PIPELINE_ARTIFACTS_PATH,
+        output_path: str = EMBEDDED_VECTOR_STORE_PATH,
+        chunk_rows: int = 10000,
+        text_processor=None,
+        engine=None,
+        index_config: IndexConfig = None,
+        n_jobs: int = 1,
+        queue_size: int = 4,
+    ):
+        """
+        Args:
+            source_path (str): Raw complaints CSV.
+            artifacts_path (str): Root folder of the stage checkpoints.
+            output_path (str): Vector store folder the index is published to.
+            chunk_rows (int): Complaints per part.
+            text_processor (TextProcessor, optional): The chunker. Defaults to TextProcessor().
+            engine (EmbeddingEngine, optional): The embedder. Defaults to EmbeddingEngine().
+            index_config (IndexConfig, optional): The index to build. Defaults to a flat index.
+            n_jobs (int): Worker processes for text cleaning.
+            queue_size (int): Parts buffered between two stages.
+        """
+        self.artifacts_path = artifacts_path
+        self.output_path = output_path
+        self.index_config = index_config or IndexConfig()
+        self.queue_size = queue_size
+        self.loader = LoadStage(source_path, chunk_rows)
+        self.stages = [
+            self.loader,
+            FilterStage(),
+            CleanStage(n_jobs),
+            ChunkStage(text_processor),
+            EmbedStage(engine),
+        ]
+
+    def keys(self) -> dict:
+        """Content address of every stage, index included."""
+        keys, upstream = {}, ""
+        for stage in self.stages:
+            upstream = keys[stage.name] = stage_key(
+                upstream, stage.name, stage.params()
+            )
+        keys[Pipeline_Stages.INDEX.value] = stage_key(
+            upstream, Pipeline_Stages.INDEX.value, asdict(self.index_config)
+        )
+        return keys
+
+    def _source(self, artifacts: list) -> tuple:
+        """
+        Picks where parts come from: the last finished stage that outputs
+        the complaints frame, or the CSV when none has.
+        Returns:
+            tuple: (position of the first stage to run, iterator of parts)
+        """
+        for position in range(len(self.stages) - 1, -1, -1):
+            stage = self.stages[position]
+            if isinstance(stage, FrameStage) and artifacts[position].complete:
+                n_parts = artifacts[position].summary()["parts"]
+                parts = (
+                    stage.restore(artifacts[position], Part(i, None))
+                    for i in range(n_parts)
+                )
+                return position + 1, parts
+        return 0, self.loader.read()
+
+    def run(self) -> dict:
+        """
+        Runs or resumes the pipeline and publishes the index to output_path.
+        Returns:
+            dict: Stage keys and per-stage throughput.
+        Raises:
+            Exception: The first error raised by any stage.
+        """
+        keys = self.keys()
+        index_key = keys[Pipeline_Stages.INDEX.value]
+        index_artifacts = StageArtifacts(
+            self.artifacts_path, Pipeline_Stages.INDEX.value, index_key
+        )
+        artifacts = [
+            StageArtifacts(self.artifacts_path, stage.name, keys[stage.name])
+            for stage in self.stages
+        ]
+        stats = [StageStats(stage.name, keys[stage.name]) for stage in self.stages]
+        index_stats = StageStats(Pipeline_Stages.INDEX.value, index_key)
+
+        if index_artifacts.complete:
+            for stage_stats in stats + [index_stats]:
+                stage_stats.status = "skipped"
+        else:
+            first, parts = self._source(artifacts)
+            for stage_stats in stats[:first]:
+                stage_stats.status = "skipped"
+            self._run_stages(
+                first, parts, artifacts, stats, index_artifacts, index_stats
+            )
+
+        self._publish(index_artifacts)
+        report = {
+            "keys": keys,
+            "stages": [s.to_dict() for s in stats + [index_stats]],
+        }
+        print_summary(report["stages"])
+        return report
+
+    def _run_stages(
+        self,
+        first: int,
+        parts: Iterator[Part],
+        artifacts: list,
+        stats: list,
+        index_artifacts: StageArtifacts,
+        index_stats: StageStats,
+    ):
+        stop = threading.Event()
+        errors = []
+        queues = [
+            queue.Queue(self.queue_size) for _ in range(len(self.stages) - first + 1)
+        ]
+
+        # Reading the CSV counts towards the load stage
+        source_stats = stats[0] if first == 0 else None
+
+        def feed():
+            try:
+                while True:
+                    start = time.perf_counter()
+                    part = next(parts, _DONE)
+                    if source_stats is not None:
+                        source_stats.seconds += time.perf_counter() - start
+                    if not _put(queues[0], part, stop) or part is _DONE:
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for offset, position in enumerate(range(first, len(self.stages))):
+            threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(
+                        self.stages[position],
+                        artifacts[position],
+                        stats[position],
+                        queues[offset],
+                        queues[offset + 1],
+                        stop,
+                        errors,
+                    ),
+                    name=f"pipeline-{self.stages[position].name}",
+                    daemon=True,
+                )
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._build_index(queues[-1], stop, index_artifacts, index_stats)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _work(stage, artifacts, stats, inbox, outbox, stop, errors):
+        try:
+            while True:
+                part = _get(inbox, stop)
+                if part is None:
+                    return
+                if part is _DONE:
+                    artifacts.mark_complete({"parts": stats.parts, "rows": stats.rows})
+                    _put(outbox, _DONE, stop)
+                    return
+
+                start = time.perf_counter()
+                if stage.has(artifacts, part.index):
+                    part = stage.restore(artifacts, part)
+                    stats.reused_parts += 1
+                else:
+                    part = stage.run(part)
+                    stage.save(artifacts, part)
+                stats.seconds += time.perf_counter() - start
+                stats.parts += 1
+                stats.rows += stage.rows(part)
+
+                if not _put(outbox, part, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def _build_index(self, inbox, stop, artifacts: StageArtifacts, stats: StageStats):
+        os.makedirs(artifacts.path, exist_ok=True)
+        spill_path = os.path.join(artifacts.path, VECTORS_SPILL_FILE_NAME)
+        metadata_store, dim, stopped = None, None, False
+
+        def sparse_batches(spill):
+            # Yields each part's normalized narratives to SparseIndex.build
+            # while spilling its vectors and appending its metadata
+            nonlocal metadata_store, dim, stopped
+            while True:
+                part = _get(inbox, stop)
+                if part is None:
+                    stopped = True
+                    return
+                if part is _DONE:
+                    return
+                stats.parts += 1
+                yield (
+                    part.frame[Columns.COMPLAINT_ID.value].tolist(),
+                    part.frame[Processed_Columns.NORMALIZED_COMPLAINT.value].tolist(),
+                )
+                if not len(part.chunks):
+                    continue
+                store = MetadataStore.from_offsets(
+                    part.chunks.parent_rows,
+                    part.chunks.starts,
+                    part.chunks.ends,
+                    part.frame,
+                )
+                metadata_store = (
+                    store if metadata_store is None else metadata_store.append(store)
+                )
+                np.asarray(part.vectors, dtype=np.float32).tofile(spill)
+                dim = part.vectors.shape[1]
+
+        try:
+            with open(spill_path, "wb") as spill:
+                sparse_index = SparseIndex.build(sparse_batches(spill))
+            if stopped:
+                return
+            if metadata_store is None:
+                raise ValueError("No complaints left to index")
+            start = time.perf_counter()
+            vectors = np.memmap(spill_path, dtype=np.float32, mode="r").reshape(-1, dim)
+            index = build_index(vectors, self.index_config)
+            write_index(index, artifacts.path, self.index_config, vectors)
+            del vectors
+            metadata_store.write(artifacts.path)
+            sparse_index.write(artifacts.path)
+        finally:
+            if os.path.exists(spill_path):
+                os.remove(spill_path)
+        stats.seconds = time.perf_counter() - start
+        stats.rows = index.ntotal
+        artifacts.mark_complete({"parts": stats.parts, "rows": index.ntotal})
+
+    def _publish(self, artifacts: StageArtifacts):
+        """
+        Copies the index stage output, BM25 index included, into the vector
+        store folder. Shards built there before describe other rows, so
+        they are removed.
+        """
+        os.makedirs(self.output_path, exist_ok=True)
+        clear_shards(self.output_path)
+        shutil.rmtree(
+            os.path.join(self.output_path, SPARSE_INDEX_DIR_NAME), ignore_errors=True
+        )
+        for name in INDEX_FILES + [RERANK_VECTORS_FILE_NAME]:
+            source = os.path.join(artifacts.path, name)
+            path = os.path.join(self.output_path, name)
+            if not os.path.exists(source):
+                # Only re-ranking indexes keep float32 vectors
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            shutil.copyfile(source, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        shutil.copytree(
+            os.path.join(artifacts.path, SPARSE_INDEX_DIR_NAME),
+            os.path.join(self.output_path, SPARSE_INDEX_DIR_NAME),
+        )
+        reset_incremental_state(self.output_path, artifacts.summary()["rows"])
+        print(f"Published index to {self.output_path}")
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocks until there is room, unless the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Next item, or None once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def print_summary(stages: list):
+    from tabulate import tabulate
+
+    print(
+        tabulate(
+            [
+                {
+                    "stage": s["stage"],
+                    "status": s["status"],
+                    "parts": s["parts"],
+                    "reused": s["reused_parts"],
+                    "rows": s["rows"],
+                    "seconds": s["seconds"],
+                    "rows/s": s["rows_per_second"],
+                }
+                for s in stages
+            ],
+            headers="keys",
+            tablefmt="psql",
+        )
+    )
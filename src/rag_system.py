@@ -1,7 +1,15 @@
 import sys
 import os
+import time
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass, replace
+from functools import partial
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import AsyncIterator, Iterator, Optional
+import numpy as np
 
 current_file_path = Path(__file__).resolve()
 project_root = current_file_path.parent.parent
@@ -9,40 +17,415 @@ project_root = current_file_path.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings, HuggingFaceEndpoint
-from langchain_core.prompts import PromptTemplate
-from langchain_huggingface import ChatHuggingFace
-from langchain_core.messages import HumanMessage
-from scripts.constants import Embedding_Columns
+from scripts.constants import (
+    EMBEDDING_MODEL_NAME,
+    LLM_MAX_TOKENS,
+    LLM_REPO_ID,
+    LLM_TEMPERATURE,
+    Backpressure_Policies,
+    Metadata_Columns,
+)
+from src.answer_cache import SemanticAnswerCache, context_key
+from src.context_budgeter import DEFAULT_TOKEN_BUDGET, ContextBudgeter
+from src.cache import DiskCache, TTLCache, hash_vector, make_key, normalize_query
+from src.incremental_index import load_tombstones
+from src.index_builder import (
+    apply_search_params,
+    enable_reconstruct,
+    index_version,
+    load_rerank_vectors,
+    read_index,
+)
+from src.llm_client import AsyncLLMClient
+from src.metadata_store import END_COLUMN, PARENT_COLUMN, START_COLUMN, MetadataStore
+from src.search_filters import FilterIndex, SearchFilters, filtered_search
+from src.sharded_index import ShardedIndex, is_sharded
+from src.telemetry import Telemetry, Trace, activate, count, estimate_tokens, stage
+from src.sparse_index import (
+    ComplaintRows,
+    SparseIndex,
+    is_keyword_query,
+    reciprocal_rank_fusion,
+    terms,
+)
 
-load_dotenv()
+
+QUERY_CACHE_PATH = os.path.join(project_root, "vector_store", "cache", "query_cache.db")
+ANSWER_CACHE_PATH = os.path.join(
+    project_root, "vector_store", "cache", "answer_cache.db"
+)
+
+# Each hybrid stage fetches this many candidates per requested result
+HYBRID_CANDIDATE_FACTOR = 4
+
+# abatch_answer retrieves this many questions per allowed in-flight LLM request at a time
+BATCH_WINDOW_FACTOR = 4
+
+# Characters of surrounding narrative added on each side by expand_document
+EXPANSION_WINDOW_CHARS = 500
+
+
+@dataclass
+class GenerationTimings:
+    """Wall-clock timings of one streamed answer, in perf_counter seconds."""
+
+    start: float = 0.0
+    first_token: Optional[float] = None
+    end: Optional[float] = None
+    cached: bool = False
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Time to first token."""
+        if self.first_token is None:
+            return None
+        return (self.first_token - self.start) * 1000
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return (self.end - self.start) * 1000
+
+
+def record_tokens(trace: Optional[Trace], prompt: str, answer: str, usage: dict):
+    """
+    Adds token counts to a trace: the endpoint's reported usage, or an
+    estimate from text length when it reports none.
+    """
+    if trace is None:
+        return
+    trace.count("prompt_tokens", usage.get("prompt_tokens", estimate_tokens(prompt)))
+    trace.count(
+        "completion_tokens", usage.get("completion_tokens", estimate_tokens(answer))
+    )
 
 
 class RAGSystem:
-    def __init__(self):
-        print("Initializing RAG System")
-        self.vector_store_path = os.path.join(project_root, "vector_store", "embedded")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+    def __init__(
+        self,
+        nprobe: int = None,
+        ef_search: int = None,
+        mmap: bool = True,
+        cache_size: int = 1024,
+        cache_ttl: float = 3600,
+        disk_cache: bool = False,
+        answer_cache_threshold: float = 0.92,
+        answer_cache_path: str = ANSWER_CACHE_PATH,
+        search_workers: int = 4,
+        max_concurrent_llm: int = 8,
+        backpressure: str = Backpressure_Policies.WAIT.value,
+        hybrid: bool = True,
+        latency_budget_ms: float = 50,
+        telemetry_sinks: list = None,
+        context_token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+        mmr_lambda: float = 0.7,
+    ):
+        """
+        Args:
+            nprobe (int, optional): IVF lists visited per query, overriding the stored index config.
+            ef_search (int, optional): HNSW search breadth, overriding the stored index config.
+            mmap (bool): Whether to memory-map the index file so worker processes share it.
+            cache_size (int): Entries kept in memory by each query cache level.
+            cache_ttl (float): Seconds before a cached embedding or search result expires.
+            disk_cache (bool): Whether to back the query caches with an SQLite file
+                shared by every worker on the host.
+            answer_cache_threshold (float): Minimum cosine similarity between a new query
+                and a cached one for the cached answer to be reused.
+            answer_cache_path (str, optional): SQLite file persisting cached answers
+                across restarts. None keeps them in memory only.
+            search_workers (int): Threads running embedding and FAISS work for the async API.
+            max_concurrent_llm (int): LLM requests the async API keeps in flight at once.
+            backpressure (str): Backpressure_Policies value applied once that limit is reached.
+            hybrid (bool): Whether to fuse BM25 and vector results when a sparse index exists.
+            latency_budget_ms (float): How long keyword-shaped queries wait for the vector
+                stage once BM25 has answered, before returning BM25 results alone.
+            telemetry_sinks (list, optional): TelemetrySinks receiving per-stage timings
+                and token counts of every answer. None disables tracing.
+            context_token_budget (int, optional): Estimated tokens of retrieved context
+                packed into the prompt, at most what the top-k chunks would use.
+                None passes the top-k chunks through unchanged.
+            mmr_lambda (float): Relevance vs diversity trade-off when choosing context passages.
+        """
+        # Heavy backends (langchain, FAISS, HuggingFace) are only imported
+        # once a RAGSystem is actually built, keeping module import cheap
+        from dotenv import load_dotenv
+        from langchain_huggingface import (
+            ChatHuggingFace,
+            HuggingFaceEmbeddings,
+            HuggingFaceEndpoint,
         )
-        self.vector_db = FAISS.load_local(
-            self.vector_store_path,
-            self.embeddings,
-            allow_dangerous_deserialization=True,
+
+        load_dotenv()
+
+        print("Initializing RAG System")
+        self._init_parts(
+            os.path.join(project_root, "vector_store", "embedded"),
+            HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME),
+            nprobe=nprobe,
+            ef_search=ef_search,
+            mmap=mmap,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            disk_cache=disk_cache,
+            answer_cache_threshold=answer_cache_threshold,
+            answer_cache_path=answer_cache_path,
+            search_workers=search_workers,
+            max_concurrent_llm=max_concurrent_llm,
+            backpressure=backpressure,
+            hybrid=hybrid,
+            latency_budget_ms=latency_budget_ms,
+            telemetry_sinks=telemetry_sinks,
+            context_token_budget=context_token_budget,
+            mmr_lambda=mmr_lambda,
         )
 
         endpoint = HuggingFaceEndpoint(
-            repo_id="HuggingFaceH4/zephyr-7b-beta",
+            repo_id=LLM_REPO_ID,
             task="conversational",
-            temperature=0.5,
+            temperature=LLM_TEMPERATURE,
+            max_new_tokens=LLM_MAX_TOKENS,
             huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
         )
 
         self.llm = ChatHuggingFace(llm=endpoint)
 
+        # BM25 queries are lemmatized; load NLTK data before the first request
+        if self.hybrid and self.sparse_index is not None:
+            from scripts.utils import preload_nltk
+
+            preload_nltk()
+
         print("RAG System Ready!")
 
+    @classmethod
+    def from_parts(
+        cls,
+        vector_store_path: str,
+        embeddings,
+        llm_client: AsyncLLMClient = None,
+        llm=None,
+        answer_cache_path: Optional[str] = None,
+        **options,
+    ) -> "RAGSystem":
+        """
+        Builds a RAGSystem over a vector store folder from the given parts
+        instead of the HuggingFace model and endpoint, e.g. for benchmarks
+        and tests.
+        Args:
+            vector_store_path (str): Folder written by prepare_parquet or run_pipeline.
+            embeddings: Anything with embed_query/embed_documents.
+            llm_client (AsyncLLMClient, optional): Client of the async API. Defaults to
+                the pooled client RAGSystem() creates.
+            llm (optional): LangChain chat model of the sync answer path.
+            answer_cache_path (str, optional): SQLite file of the answer cache.
+                Defaults to keeping answers in memory only.
+            **options: Any other RAGSystem() keyword argument.
+        Returns:
+            RAGSystem: The wired system.
+        """
+        rag = cls.__new__(cls)
+        rag._init_parts(
+            vector_store_path,
+            embeddings,
+            answer_cache_path=answer_cache_path,
+            **options,
+        )
+        if llm_client is not None:
+            rag.llm_client = llm_client
+        rag.llm = llm
+        return rag
+
+    def _init_parts(
+        self,
+        vector_store_path: str,
+        embeddings,
+        nprobe: int = None,
+        ef_search: int = None,
+        mmap: bool = True,
+        cache_size: int = 1024,
+        cache_ttl: float = 3600,
+        disk_cache: bool = False,
+        answer_cache_threshold: float = 0.92,
+        answer_cache_path: str = ANSWER_CACHE_PATH,
+        search_workers: int = 4,
+        max_concurrent_llm: int = 8,
+        backpressure: str = Backpressure_Policies.WAIT.value,
+        hybrid: bool = True,
+        latency_budget_ms: float = 50,
+        telemetry_sinks: list = None,
+        context_token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+        mmr_lambda: float = 0.7,
+    ):
+        """Loads the vector store and creates everything but the LLM; see __init__."""
+        self.vector_store_path = vector_store_path
+        self.embeddings = embeddings
+        self.init_query_caches(cache_size, cache_ttl, disk_cache)
+        self.answer_cache = SemanticAnswerCache(
+            threshold=answer_cache_threshold, path=answer_cache_path
+        )
+        self.load_vector_db(nprobe, ef_search, mmap)
+        self.init_async(search_workers, max_concurrent_llm, backpressure)
+        self.init_hybrid(hybrid, latency_budget_ms, search_workers)
+        self.init_telemetry(telemetry_sinks)
+        self.init_context(context_token_budget, mmr_lambda)
+
+    def load_vector_db(self, nprobe: int = None, ef_search: int = None, mmap=True):
+        """
+        Loads the FAISS index saved by prepare_parquet together with its index
+        config and the memory-mapped metadata store, applying any search
+        parameter overrides. Sharded stores load every shard.
+        """
+        overrides = {
+            name: value
+            for name, value in (("nprobe", nprobe), ("ef_search", ef_search))
+            if value is not None
+        }
+
+        if getattr(self, "shards", None) is not None:
+            self.shards.close()
+        if is_sharded(self.vector_store_path):
+            # Shards are searched together; their stores read as one
+            self.shards = ShardedIndex.open(self.vector_store_path, mmap=mmap)
+            if overrides:
+                self.shards.set_search_params(**overrides)
+            self.index = self.shards
+            self.index_config = self.shards.config
+            self.metadata_store = self.shards.metadata_store
+        else:
+            self.shards = None
+            self.index, self.index_config = read_index(
+                self.vector_store_path, mmap=mmap
+            )
+            # Context assembly reads the vectors of retrieved rows back from the index
+            enable_reconstruct(self.index, self.index_config)
+            if overrides:
+                self.index_config = replace(self.index_config, **overrides)
+                apply_search_params(self.index, self.index_config)
+            self.metadata_store = MetadataStore.open(self.vector_store_path)
+        # float32 vectors re-ranking quantized hits, memory-mapped from disk
+        self.rerank_vectors = (
+            load_rerank_vectors(self.vector_store_path, self.index.ntotal)
+            if self.shards is None and self.index_config.rerank_factor
+            else None
+        )
+
+        self._filter_index = None
+        self.sparse_index = SparseIndex.open(self.vector_store_path)
+        self._complaint_rows = None
+
+        # Chunks deleted by incremental updates stay in the index until compaction
+        self.tombstones = (
+            self.shards.tombstones
+            if self.shards is not None
+            else load_tombstones(self.vector_store_path)
+        )
+        self.live_rows = (
+            np.setdiff1d(np.arange(self.index.ntotal), self.tombstones)
+            if len(self.tombstones)
+            else None
+        )
+
+        # Search results are keyed by index version; drop them from memory once
+        # it changes. Disk rows are left to expire, since workers sharing the
+        # file may still serve the previous version during a rolling update
+        version = (
+            self.shards.version
+            if self.shards is not None
+            else index_version(self.vector_store_path)
+        )
+        if getattr(self, "index_version", version) != version:
+            self.retrieval_cache.clear(include_disk=False)
+        self.index_version = version
+        self.answer_cache.invalidate(version)
+
+    def init_query_caches(
+        self, cache_size: int = 1024, cache_ttl: float = 3600, disk_cache=False
+    ):
+        """
+        Creates the two query cache levels: normalized query text -> embedding,
+        and (embedding, k, filters, index version) -> hit row ids.
+        """
+        disk = DiskCache(QUERY_CACHE_PATH, cache_ttl) if disk_cache else None
+        self.embedding_cache = TTLCache(
+            "embedding",
+            max_size=cache_size,
+            ttl_seconds=cache_ttl,
+            disk=disk,
+            encode=lambda vector: vector.astype(np.float32).tobytes(),
+            decode=lambda raw: np.frombuffer(raw, dtype=np.float32).reshape(1, -1),
+        )
+        self.retrieval_cache = TTLCache(
+            "retrieval", max_size=cache_size, ttl_seconds=cache_ttl, disk=disk
+        )
+
+    def init_async(
+        self,
+        search_workers: int = 4,
+        max_concurrent_llm: int = 8,
+        backpressure: str = Backpressure_Policies.WAIT.value,
+    ):
+        """
+        Creates the thread pool for CPU-bound search work and the pooled LLM
+        client used by the async API.
+        """
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=search_workers, thread_name_prefix="rag-search"
+        )
+        self.llm_client = AsyncLLMClient(
+            LLM_REPO_ID, max_concurrency=max_concurrent_llm, policy=backpressure
+        )
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def init_hybrid(
+        self, hybrid: bool = True, latency_budget_ms: float = 50, workers: int = 4
+    ):
+        """
+        Enables BM25 + vector retrieval. The vector stage runs on its own
+        pool, so it never waits behind the tasks that are waiting on it.
+        """
+        self.hybrid = hybrid
+        self.latency_budget_ms = latency_budget_ms
+        self._dense_pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="rag-dense"
+        )
+
+    def init_telemetry(self, sinks: list = None):
+        self.telemetry = Telemetry(sinks)
+
+    def init_context(
+        self,
+        token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+        mmr_lambda: float = 0.7,
+    ):
+        """Enables the context budgeter, or disables it when token_budget is None."""
+        self.context_budgeter = (
+            ContextBudgeter(token_budget, mmr_lambda) if token_budget else None
+        )
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of both query cache levels."""
+        return {
+            "embedding": self.embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+            "answer": self.answer_cache.stats(),
+        }
+
+    @property
+    def complaint_rows(self) -> ComplaintRows:
+        """Complaint -> chunk row lists for sparse hits, built on first use."""
+        if self._complaint_rows is None:
+            self._complaint_rows = ComplaintRows(self.sparse_index, self.metadata_store)
+        return self._complaint_rows
+
+    @property
+    def filter_index(self) -> FilterIndex:
+        """Per-value row id lists for filtered search, built on first use."""
+        if self._filter_index is None:
+            self._filter_index = FilterIndex.from_store(self.metadata_store)
+        return self._filter_index
+
     def initiate_chat(self):
         while True:
             try:
@@ -56,19 +439,14 @@ class RAGSystem:
                 # Vectorized Search
                 retrieved_docs = self.search_vector_db(user_query)
 
-                # Get Augumented Results
-                response = self.agument_result(user_query, retrieved_docs)
-
-                print("\n--- AI Response ---")
-                print(response)
-
+                # Sources are shown before generation starts
                 print("\n--- Sources ---")
 
                 for i, doc in enumerate(retrieved_docs):
                     full_metadata = doc.metadata.get(
-                        Embedding_Columns.METADATA.value, "Unknown Product"
+                        Metadata_Columns.PRODUCT.value, "Unknown Product"
                     )
-                    comp_id = doc.metadata.get(Embedding_Columns.ID.value, "N/A")
+                    comp_id = doc.metadata.get(Metadata_Columns.ID.value, "N/A")
 
                     # Print a clean summary
                     print(full_metadata)
@@ -77,17 +455,355 @@ class RAGSystem:
                     print("")  # Empty line for spacing
                     print("-----------------------")
 
+                # Get Augumented Results, printed as tokens arrive
+                print("\n--- AI Response ---")
+                timings = GenerationTimings()
+                for token in self.stream_result(user_query, retrieved_docs, timings):
+                    print(token, end="", flush=True)
+                print(
+                    f"\n\n(first token {timings.ttft_ms:.0f} ms, "
+                    f"total {timings.total_ms:.0f} ms)"
+                )
+
             except Exception as e:
                 print(f"\nError: {e}")
 
-    def search_vector_db(self, user_query: str):
-        # Search user query in vector database
-        results = self.vector_db.similarity_search(
-            user_query, k=5
-        )  # vectorization of user input is handled behind the scene
+    def embed_query(self, user_query: str) -> np.ndarray:
+        """Embeds the user query into a (1, dim) float32 matrix for FAISS."""
+        # all-MiniLM-L6-v2 is uncased, so queries differing only in case or
+        # whitespace embed identically and can share an entry
+        key = make_key(EMBEDDING_MODEL_NAME, normalize_query(user_query))
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            with stage("embed"):
+                vector = np.asarray(
+                    [self.embeddings.embed_query(user_query)], dtype=np.float32
+                )
+            self.embedding_cache.set(key, vector)
+        return vector
+
+    def embed_queries(self, user_queries: list) -> np.ndarray:
+        """
+        Embeds many queries into an (n, dim) float32 matrix. Cache misses are
+        embedded together in one batched encoder call, repeats only once.
+        """
+        keys = [
+            make_key(EMBEDDING_MODEL_NAME, normalize_query(q)) for q in user_queries
+        ]
+        vectors = [self.embedding_cache.get(key) for key in keys]
+
+        pending = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                pending.setdefault(keys[i], []).append(i)
+        if pending:
+            texts = [user_queries[positions[0]] for positions in pending.values()]
+            with stage("embed"):
+                embedded = np.asarray(
+                    self.embeddings.embed_documents(texts), np.float32
+                )
+            for (key, positions), vector in zip(pending.items(), embedded):
+                vector = vector[None, :]
+                self.embedding_cache.set(key, vector)
+                for i in positions:
+                    vectors[i] = vector
+
+        if not vectors:
+            return np.empty((0, self.index.d), dtype=np.float32)
+        return np.concatenate(vectors)
+
+    def allowed_rows(self, filters: SearchFilters = None) -> Optional[np.ndarray]:
+        """
+        Row ids a search may return: those matching the filters, minus
+        tombstoned rows. None when every row is allowed.
+        """
+        rows = self.filter_index.select(filters) if filters is not None else None
+        if self.live_rows is None:
+            return rows
+        if rows is None:
+            return self.live_rows
+        return np.setdiff1d(rows, self.tombstones, assume_unique=True)
+
+    def search_rows(
+        self, query_matrix: np.ndarray, k: int = 5, filters: SearchFilters = None
+    ) -> list:
+        """
+        Searches many query vectors at once: cached queries are answered from
+        the retrieval cache, the rest in a single multi-query FAISS search.
+        Returns:
+            list: One list of hit row ids per query row, best first.
+        """
+        if filters is not None and filters.is_empty():
+            filters = None
+
+        keys = [
+            make_key(hash_vector(vector), k, filters, self.index_version)
+            for vector in query_matrix
+        ]
+        hits = [self.retrieval_cache.get(key) for key in keys]
+
+        missing = [i for i, row_hits in enumerate(hits) if row_hits is None]
+        if missing:
+            with stage("search"):
+                rows = self.allowed_rows(filters)
+                if self.shards is not None:
+                    _, ids = self.shards.search(query_matrix[missing], k, rows)
+                else:
+                    _, ids = filtered_search(
+                        self.index,
+                        query_matrix[missing],
+                        k,
+                        rows,
+                        self.index_config,
+                        self.rerank_vectors,
+                    )
+            for i, row_ids in zip(missing, ids):
+                hits[i] = [int(row) for row in row_ids if row != -1]
+                self.retrieval_cache.set(keys[i], hits[i])
+        return hits
+
+    def search_by_vectors(
+        self, query_matrix: np.ndarray, k: int = 5, filters: SearchFilters = None
+    ) -> list:
+        """
+        search_rows, with all hits materialized by one metadata store read.
+        Returns:
+            list: One list of Documents per query row.
+        """
+        hits = self.search_rows(query_matrix, k, filters)
+        with stage("docstore"):
+            documents = self.metadata_store.get_documents(
+                [row for row_hits in hits for row in row_hits]
+            )
+        results, start = [], 0
+        for row_hits in hits:
+            results.append(documents[start : start + len(row_hits)])
+            start += len(row_hits)
         return results
 
-    def agument_result(self, user_query: str, context_docs):
+    def search_contexts(
+        self, query_matrix: np.ndarray, k: int = 5, filters: SearchFilters = None
+    ) -> list:
+        """
+        Batched search_vector_db over query vectors: one multi-query search
+        and one metadata store read, then context assembly per query.
+        Returns:
+            list: One list of context Documents per query row.
+        """
+        n = self.context_budgeter.candidates(k) if self.context_budgeter else k
+        hits = self.search_rows(query_matrix, n, filters)
+        with stage("docstore"):
+            documents = self.metadata_store.get_documents(
+                [row for row_hits in hits for row in row_hits]
+            )
+
+        contexts, start = [], 0
+        for query_vector, row_hits in zip(query_matrix, hits):
+            contexts.append(
+                self.assemble_context(
+                    row_hits,
+                    documents[start : start + len(row_hits)],
+                    k,
+                    query_vector,
+                )
+            )
+            start += len(row_hits)
+        return contexts
+
+    def search_by_vector(
+        self, query_vector: np.ndarray, k: int = 5, filters: SearchFilters = None
+    ) -> list:
+        """
+        Searches the index and materializes Documents for the top-k hits only.
+        Filters are applied inside the FAISS search, so k results are returned
+        whenever k chunks match.
+        """
+        return self.search_by_vectors(query_vector, k, filters)[0]
+
+    def search_vector_db(
+        self, user_query: str, k: int = 5, filters: SearchFilters = None
+    ):
+        """
+        Retrieves context for a question: k chunks, or with the context
+        budgeter up to k deduplicated, diversified passages within the
+        token budget.
+        """
+        n = self.context_budgeter.candidates(k) if self.context_budgeter else k
+
+        # BM25 + vector retrieval when a sparse index was built
+        if self.hybrid and self.sparse_index is not None:
+            query_vector = None
+            rows = self.hybrid_rows(user_query, n, filters)
+        else:
+            # Search user query in vector database
+            query_vector = self.embed_query(user_query)
+            rows = self.search_rows(query_vector, n, filters)[0]
+
+        with stage("docstore"):
+            documents = self.metadata_store.get_documents(rows)
+        return self.assemble_context(rows, documents, k, query_vector)
+
+    def assemble_context(
+        self, rows: list, documents: list, k: int, query_vector: np.ndarray = None
+    ) -> list:
+        """
+        Collapses, diversifies and packs retrieved chunks with the context
+        budgeter, recording the tokens saved in the active trace.
+        Returns:
+            list: Documents for the prompt.
+        """
+        if self.context_budgeter is None:
+            return documents[:k]
+
+        with stage("context"):
+            vectors = self.index.reconstruct_batch(np.asarray(rows, dtype=np.int64))
+            documents, report = self.context_budgeter.assemble(
+                documents, vectors if len(rows) else None, k, query_vector
+            )
+        for name in ("context_tokens", "context_tokens_saved"):
+            count(name, report[name])
+        return documents
+
+    def full_complaint(self, doc) -> Optional[str]:
+        """
+        The whole narrative a retrieved chunk or passage came from, one
+        lookup in the narrative store. None when the store keeps chunk text
+        only, e.g. one built from pre-embedded parquet.
+        """
+        parent = doc.metadata.get(PARENT_COLUMN)
+        if parent is None:
+            return None
+        return self.metadata_store.parent_text(parent)
+
+    def expand_document(self, doc, window_chars: int = EXPANSION_WINDOW_CHARS):
+        """
+        Widens a retrieved chunk by `window_chars` of its narrative on each
+        side, for answers that need the surrounding context.
+        Returns:
+            Document: The widened chunk, or `doc` itself when it has no offsets.
+        """
+        from langchain_core.documents import Document
+
+        if START_COLUMN not in doc.metadata or PARENT_COLUMN not in doc.metadata:
+            return doc
+        text = self.metadata_store.window_text(
+            doc.metadata[PARENT_COLUMN],
+            doc.metadata[START_COLUMN],
+            doc.metadata[END_COLUMN],
+            window_chars,
+        )
+        if text is None:
+            return doc
+        return Document(page_content=text, metadata=dict(doc.metadata))
+
+    def sparse_rows(
+        self, user_query: str, n: int, filters: SearchFilters = None
+    ) -> list:
+        """
+        BM25 search over complaints. Each matching complaint is represented
+        by its allowed chunk containing the most query term occurrences.
+        Returns:
+            list: Chunk row ids, best first.
+        """
+        with stage("search.sparse"):
+            return self._sparse_rows(user_query, n, filters)
+
+    def _sparse_rows(self, user_query: str, n: int, filters: SearchFilters) -> list:
+        from scripts.utils import tokenize_and_lemmatize
+
+        query_terms = terms(tokenize_and_lemmatize(user_query))
+        docs, _ = self.sparse_index.search(query_terms, n)
+
+        allowed = self.allowed_rows(filters)
+        candidates = []
+        for doc in docs:
+            rows = self.complaint_rows.rows(doc)
+            if allowed is not None:
+                rows = rows[np.isin(rows, allowed)]
+            if len(rows):
+                candidates.append(rows)
+        if not candidates:
+            return []
+
+        texts = self.metadata_store.texts(np.concatenate(candidates))
+        hits, start = [], 0
+        for rows in candidates:
+            counts = [
+                sum(text.lower().count(term) for term in query_terms)
+                for text in texts[start : start + len(rows)]
+            ]
+            hits.append(int(rows[int(np.argmax(counts))]))
+            start += len(rows)
+        return hits
+
+    def hybrid_search(
+        self,
+        user_query: str,
+        k: int = 5,
+        filters: SearchFilters = None,
+        latency_budget_ms: float = None,
+    ) -> list:
+        """hybrid_rows, materialized as Documents."""
+        rows = self.hybrid_rows(user_query, k, filters, latency_budget_ms)
+        with stage("docstore"):
+            return self.metadata_store.get_documents(rows)
+
+    def hybrid_rows(
+        self,
+        user_query: str,
+        k: int = 5,
+        filters: SearchFilters = None,
+        latency_budget_ms: float = None,
+    ) -> list:
+        """
+        Runs BM25 and vector search in parallel and merges them with
+        reciprocal-rank fusion. For keyword-shaped queries the vector stage
+        gets `latency_budget_ms` after BM25 finishes; if it is still running,
+        BM25 results are returned alone.
+        Returns:
+            list: Row ids, best first.
+        """
+        if filters is not None and filters.is_empty():
+            filters = None
+        if latency_budget_ms is None:
+            latency_budget_ms = self.latency_budget_ms
+        n = k * HYBRID_CANDIDATE_FACTOR
+
+        key = make_key(
+            "hybrid", normalize_query(user_query), k, filters, self.index_version
+        )
+        hits = self.retrieval_cache.get(key)
+        if hits is None:
+            # The dense stage records into the caller's trace, if any
+            dense = self._dense_pool.submit(
+                contextvars.copy_context().run,
+                lambda: self.search_rows(self.embed_query(user_query), n, filters)[0],
+            )
+            sparse_hits = self.sparse_rows(user_query, n, filters)
+
+            complete = True
+            if is_keyword_query(user_query) and len(sparse_hits) >= k:
+                try:
+                    dense_hits = dense.result(timeout=latency_budget_ms / 1000)
+                except TimeoutError:
+                    dense_hits, complete = [], False
+            else:
+                dense_hits = dense.result()
+
+            hits = reciprocal_rank_fusion([dense_hits, sparse_hits])[:k]
+            # Sparse-only answers are not cached, the next repeat can fuse both
+            if complete:
+                self.retrieval_cache.set(key, hits)
+
+        return hits
+
+    def build_prompt(self, user_query: str, context_docs) -> str:
+        with stage("prompt"):
+            return self._build_prompt(user_query, context_docs)
+
+    def _build_prompt(self, user_query: str, context_docs) -> str:
+        from langchain_core.prompts import PromptTemplate
+
         # Prepare context & prompt
         context_text = "\n\n".join([doc.page_content for doc in context_docs])
 
@@ -110,12 +826,325 @@ class RAGSystem:
             template=prompt_template, input_variables=["context", "question"]
         )
 
-        formatted_prompt = prompt.format(context=context_text, question=user_query)
+        return prompt.format(context=context_text, question=user_query)
+
+    def lookup_cached_answer(self, user_query: str, context_docs):
+        """
+        Returns a cached answer to a similar question over the same context,
+        or None. The query embedding comes from the embedding cache.
+        """
+        return self.answer_cache.lookup(
+            self.embed_query(user_query),
+            context_key(context_docs),
+            self.index_version,
+            LLM_REPO_ID,
+        )
+
+    def cache_answer(self, user_query: str, context_docs, answer: str):
+        self.answer_cache.store(
+            self.embed_query(user_query),
+            context_key(context_docs),
+            self.index_version,
+            LLM_REPO_ID,
+            answer,
+            [doc.metadata.get(Metadata_Columns.ID.value) for doc in context_docs],
+        )
+
+    def agument_result(self, user_query: str, context_docs):
+        from langchain_core.messages import HumanMessage
+
+        # Paraphrased repeats over the same context reuse the stored answer
+        cached = self.lookup_cached_answer(user_query, context_docs)
+        if cached is not None:
+            return cached.answer
+
+        formatted_prompt = self.build_prompt(user_query, context_docs)
 
         # Generate Response
         response = self.llm.invoke([HumanMessage(content=formatted_prompt)])
+        self.cache_answer(user_query, context_docs, response.content)
         return response.content
 
+    def stream_result(
+        self, user_query: str, context_docs, timings: GenerationTimings = None
+    ) -> Iterator[str]:
+        """
+        Streaming counterpart of agument_result: yields answer tokens as the
+        endpoint produces them.
+        Args:
+            user_query (str): The user question.
+            context_docs (list): Retrieved Documents.
+            timings (GenerationTimings, optional): Filled with time to first token
+                and total generation time.
+        Yields:
+            str: Answer text fragments. A cached answer is yielded in one piece.
+        """
+        from langchain_core.messages import HumanMessage
+
+        timings = timings or GenerationTimings()
+        timings.start = time.perf_counter()
+
+        cached = self.lookup_cached_answer(user_query, context_docs)
+        if cached is not None:
+            timings.cached = True
+            timings.first_token = timings.end = time.perf_counter()
+            yield cached.answer
+            return
+
+        formatted_prompt = self.build_prompt(user_query, context_docs)
+
+        parts = []
+        for chunk in self.llm.stream([HumanMessage(content=formatted_prompt)]):
+            if not chunk.content:
+                continue
+            if timings.first_token is None:
+                timings.first_token = time.perf_counter()
+            parts.append(chunk.content)
+            yield chunk.content
+
+        timings.end = time.perf_counter()
+        if timings.first_token is None:
+            timings.first_token = timings.end
+        self.cache_answer(user_query, context_docs, "".join(parts))
+
+    async def _in_pool(self, func, *args):
+        """
+        Runs blocking embedding/FAISS/cache work on the search thread pool,
+        carrying the active trace along.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._search_pool, partial(context.run, func, *args)
+        )
+
+    async def asearch(
+        self,
+        user_query: str,
+        k: int = 5,
+        filters: SearchFilters = None,
+        trace: Trace = None,
+    ) -> list:
+        """
+        Async search_vector_db. Embedding and FAISS search run on the thread
+        pool, so the event loop keeps serving other sessions meanwhile.
+        """
+        with activate(trace):
+            return await self._in_pool(self.search_vector_db, user_query, k, filters)
+
+    async def agenerate(
+        self, user_query: str, context_docs, trace: Trace = None
+    ) -> str:
+        """
+        Async agument_result. The request goes through the pooled LLM client
+        and is subject to its concurrency limit and backpressure policy.
+        Raises:
+            LLMOverloadedError: If the backpressure policy refuses the request.
+        """
+        with activate(trace):
+            cached = await self._in_pool(
+                self.lookup_cached_answer, user_query, context_docs
+            )
+            if cached is not None:
+                if trace is not None:
+                    trace.count("answer_cache_hits")
+                return cached.answer
+
+            prompt = self.build_prompt(user_query, context_docs)
+            usage = {}
+            with stage("generation"):
+                answer = await self.llm_client.achat(prompt, usage)
+            record_tokens(trace, prompt, answer, usage)
+            await self._in_pool(self.cache_answer, user_query, context_docs, answer)
+        return answer
+
+    async def aanswer(
+        self,
+        user_query: str,
+        k: int = 5,
+        filters: SearchFilters = None,
+        trace: Trace = None,
+    ) -> tuple:
+        """
+        Retrieves context and generates an answer asynchronously. Without a
+        trace, one is started and sent to the telemetry sinks, if any.
+        Returns:
+            tuple: (answer, retrieved Documents).
+        """
+        owned = trace is None
+        if owned:
+            trace = self.telemetry.start("rag.answer")
+        try:
+            context_docs = await self.asearch(user_query, k, filters, trace)
+            answer = await self.agenerate(user_query, context_docs, trace)
+        finally:
+            if owned:
+                self.telemetry.finish(trace)
+        return answer, context_docs
+
+    async def astream_result(
+        self,
+        user_query: str,
+        context_docs,
+        timings: GenerationTimings = None,
+        trace: Trace = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async stream_result, streamed through the pooled LLM client.
+        Time to first token, generation time and token counts are added to
+        `trace` directly, since a generator cannot keep a trace active
+        between the steps a caller drives.
+        """
+        timings = timings or GenerationTimings()
+        timings.start = time.perf_counter()
+
+        with activate(trace):
+            cached = await self._in_pool(
+                self.lookup_cached_answer, user_query, context_docs
+            )
+        if cached is not None:
+            timings.cached = True
+            timings.first_token = timings.end = time.perf_counter()
+            if trace is not None:
+                trace.count("answer_cache_hits")
+            yield cached.answer
+            return
+
+        with activate(trace):
+            prompt = self.build_prompt(user_query, context_docs)
+
+        parts, usage = [], {}
+        async for token in self.llm_client.astream(prompt, usage):
+            if timings.first_token is None:
+                timings.first_token = time.perf_counter()
+            parts.append(token)
+            yield token
+
+        timings.end = time.perf_counter()
+        if timings.first_token is None:
+            timings.first_token = timings.end
+        answer = "".join(parts)
+        if trace is not None:
+            trace.add_span("ttft", timings.start, timings.first_token)
+            trace.add_span("generation", timings.start, timings.end)
+            record_tokens(trace, prompt, answer, usage)
+        await self._in_pool(self.cache_answer, user_query, context_docs, answer)
+
+    async def abatch_answer(
+        self,
+        user_queries: list,
+        k: int = 5,
+        filters: SearchFilters = None,
+        concurrency: int = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Answers many questions in windows of `concurrency` * BATCH_WINDOW_FACTOR:
+        one batched embedding call and one multi-query search per window, then
+        generation with at most `concurrency` LLM requests in flight. The next
+        window is retrieved while the last answers of the current one are
+        generated, and only one window of contexts is held at a time, so
+        memory does not grow with the number of questions.
+        Results are yielded as they complete, not in input order.
+        A failed generation is reported in its record instead of stopping
+        the batch.
+        Args:
+            user_queries (list): The questions.
+            k (int): Chunks retrieved per question.
+            filters (SearchFilters, optional): Filters applied to every question.
+            concurrency (int, optional): Defaults to the LLM client's concurrency limit,
+                so the batch never trips the backpressure policy.
+        Yields:
+            dict: index, question, answer, sources, retrieval_ms, generation_ms, error.
+        """
+        concurrency = concurrency or self.llm_client.max_concurrency
+        window = concurrency * BATCH_WINDOW_FACTOR
+
+        async def answer_one(i: int, context: list, retrieval_ms: float) -> dict:
+            trace = self.telemetry.start(
+                "rag.batch_answer", question_index=i, retrieval_ms=retrieval_ms
+            )
+            generation_start = time.perf_counter()
+            answer, error = None, None
+            try:
+                answer = await self.agenerate(user_queries[i], context, trace)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            self.telemetry.finish(trace)
+            return {
+                "index": i,
+                "question": user_queries[i],
+                "answer": answer,
+                "sources": [
+                    str(doc.metadata.get(Metadata_Columns.ID.value)) for doc in context
+                ],
+                "retrieval_ms": retrieval_ms,
+                "generation_ms": (time.perf_counter() - generation_start) * 1000,
+                "error": error,
+            }
+
+        pending = set()
+        try:
+            for first in range(0, len(user_queries), window):
+                batch = user_queries[first : first + window]
+                start = time.perf_counter()
+                query_matrix = await self._in_pool(self.embed_queries, batch)
+                contexts = await self._in_pool(
+                    self.search_contexts, query_matrix, k, filters
+                )
+                # Retrieval is batched, each question is charged an equal share
+                retrieval_ms = (time.perf_counter() - start) * 1000 / len(batch)
+
+                for i, context in enumerate(contexts, start=first):
+                    if len(pending) >= concurrency:
+                        done, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for task in done:
+                            yield task.result()
+                    pending.add(
+                        asyncio.create_task(answer_one(i, context, retrieval_ms))
+                    )
+                # Released before the next window is retrieved
+                del contexts
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # The consumer stopped early
+            for task in pending:
+                task.cancel()
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Event loop owned by this instance, started on first use. Sync callers
+        such as Streamlit sessions submit to it, so all of them share one
+        connection pool and one concurrency limit.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="rag-async", daemon=True
+                ).start()
+        return self._loop
+
+    def run_async(self, coro):
+        """Runs a coroutine on the background loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._background_loop()).result()
+
+    def iter_async(self, agen) -> Iterator:
+        """Iterates an async generator on the background loop from sync code."""
+        loop = self._background_loop()
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+
 
 # rag_sys = RAGSystem()
 # rag_sys.initiate_chat()
@@ -0,0 +1,258 @@
+import numpy as np
+import pyarrow as pa
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+from scripts.constants import Index_Types, Metadata_Columns
+from src.index_builder import IndexConfig, rerank
+
+# Fields that can be filtered by value
+FILTER_FIELDS = [
+    Metadata_Columns.PRODUCT.value,
+    Metadata_Columns.SUB_PRODUCT.value,
+    Metadata_Columns.COMPANY.value,
+    Metadata_Columns.STATE.value,
+]
+
+# Below this many candidate rows the selected vectors are scored exactly,
+# so very selective filters cost the same however large the index is
+EXACT_SEARCH_MAX_ROWS = 4096
+
+# Below this selected fraction IVF indexes probe every list, otherwise the
+# few matching rows may sit outside the nprobe nearest lists
+IVF_FULL_PROBE_FRACTION = 0.05
+
+_MISSING_DAY = np.iinfo(np.int32).min
+
+
+@dataclass
+class SearchFilters:
+    """
+    Metadata constraints for a vector search. Values within a field are
+    OR-ed, fields are AND-ed. Empty fields do not filter.
+    """
+
+    products: list = field(default_factory=list)
+    sub_products: list = field(default_factory=list)
+    companies: list = field(default_factory=list)
+    states: list = field(default_factory=list)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    def field_values(self) -> dict:
+        """Maps each metadata field to the values selected for it."""
+        return {
+            Metadata_Columns.PRODUCT.value: self.products,
+            Metadata_Columns.SUB_PRODUCT.value: self.sub_products,
+            Metadata_Columns.COMPANY.value: self.companies,
+            Metadata_Columns.STATE.value: self.states,
+        }
+
+    def is_empty(self) -> bool:
+        return (
+            not any(self.field_values().values())
+            and self.date_from is None
+            and self.date_to is None
+        )
+
+
+class FilterIndex:
+    """
+    Inverted lists of vector row ids per metadata value, plus rows sorted by
+    date received. Built once from the metadata store's dictionary-encoded
+    columns and used to turn SearchFilters into the set of rows a FAISS
+    search may return.
+    """
+
+    def __init__(
+        self,
+        postings: dict,
+        date_order: np.ndarray,
+        sorted_days: np.ndarray,
+        n_rows: int,
+    ):
+        self.postings = postings
+        self.date_order = date_order
+        self.sorted_days = sorted_days
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_store(cls, metadata_store) -> "FilterIndex":
+        """
+        Builds the inverted lists from a MetadataStore without materializing
+        any row as Python objects.
+        """
+        postings = {}
+        for field_name in FILTER_FIELDS:
+            column = metadata_store.column(field_name).unify_dictionaries()
+            postings[field_name] = cls._build_postings(column)
+
+        days = (
+            metadata_store.column(Metadata_Columns.DATE_RECEIVED.value)
+            .cast(pa.int32())
+            .fill_null(_MISSING_DAY)
+            .to_numpy()
+        )
+        date_order = np.argsort(days, kind="stable").astype(np.int64)
+
+        return cls(postings, date_order, days[date_order], len(metadata_store))
+
+    @staticmethod
+    def _build_postings(column) -> dict:
+        column = column.combine_chunks()
+        if not pa.types.is_dictionary(column.type):
+            column = column.dictionary_encode()
+
+        codes = column.indices.fill_null(-1).to_numpy()
+        values = column.dictionary.to_pylist()
+
+        order = np.argsort(codes, kind="stable").astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        # Null codes sort first, skip them
+        start = len(codes) - counts.sum()
+
+        postings = {}
+        for value, count in zip(values, counts):
+            postings[value] = order[start : start + count]
+            start += count
+        return postings
+
+    def values(self, field_name: str) -> list:
+        """Returns the distinct values of a field, for building filter widgets."""
+        return sorted(
+            value for value, rows in self.postings[field_name].items() if len(rows)
+        )
+
+    def select(self, filters: SearchFilters) -> Optional[np.ndarray]:
+        """
+        Resolves filters to the sorted row ids that satisfy them.
+        Returns:
+            np.ndarray or None: Matching row ids, or None when nothing is filtered.
+        """
+        if filters is None or filters.is_empty():
+            return None
+
+        selected = None
+        for field_name, wanted in filters.field_values().items():
+            if not wanted:
+                continue
+            field_postings = self.postings[field_name]
+            rows = np.unique(
+                np.concatenate(
+                    [
+                        field_postings.get(value, np.empty(0, np.int64))
+                        for value in wanted
+                    ]
+                )
+            )
+            selected = (
+                rows
+                if selected is None
+                else np.intersect1d(selected, rows, assume_unique=True)
+            )
+
+        if filters.date_from is not None or filters.date_to is not None:
+            rows = np.sort(self._rows_in_date_range(filters.date_from, filters.date_to))
+            selected = (
+                rows
+                if selected is None
+                else np.intersect1d(selected, rows, assume_unique=True)
+            )
+
+        return selected
+
+    def _rows_in_date_range(
+        self, date_from: Optional[date], date_to: Optional[date]
+    ) -> np.ndarray:
+        epoch = date(1970, 1, 1)
+        # Rows without a date are never inside a range
+        lo = np.searchsorted(self.sorted_days, _MISSING_DAY, side="right")
+        hi = len(self.sorted_days)
+        if date_from is not None:
+            lo = max(
+                lo,
+                np.searchsorted(
+                    self.sorted_days, (date_from - epoch).days, side="left"
+                ),
+            )
+        if date_to is not None:
+            hi = np.searchsorted(self.sorted_days, (date_to - epoch).days, side="right")
+        return self.date_order[lo:hi]
+
+
+def _exact_search(index, queries: np.ndarray, k: int, rows: np.ndarray):
+    """Scores the selected vectors exactly. Raises RuntimeError if the index cannot reconstruct them."""
+    vectors = index.reconstruct_batch(rows)
+    distances = (
+        (queries**2).sum(axis=1)[:, None]
+        - 2 * queries @ vectors.T
+        + (vectors**2).sum(axis=1)[None, :]
+    )
+    top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, top, axis=1), rows[top]
+
+
+def filtered_search(
+    index,
+    query: np.ndarray,
+    k: int,
+    rows: Optional[np.ndarray],
+    config: IndexConfig,
+    vectors: Optional[np.ndarray] = None,
+):
+    """
+    Searches the index restricted to the given row ids, filtering inside
+    FAISS with an id selector instead of post-filtering over-fetched hits.
+    Very selective filters are scored exactly over the selected vectors.
+    Args:
+        index (faiss.Index): The index to search.
+        query (np.ndarray): (n, dim) float32 queries, searched together.
+        k (int): Number of neighbours.
+        rows (np.ndarray or None): Allowed row ids from FilterIndex.select, None for no filter.
+        config (IndexConfig): The index config, for its search parameters.
+        vectors (np.ndarray, optional): float32 vectors of every row. With
+            config.rerank_factor set, a shortlist of k * rerank_factor hits
+            is re-ranked by exact distance to them.
+    Returns:
+        tuple: (distances, ids) shaped like index.search output.
+    """
+    import faiss
+
+    if vectors is not None and config.rerank_factor > 1:
+        _, shortlist = filtered_search(
+            index, query, k * config.rerank_factor, rows, config
+        )
+        return rerank(query, shortlist, vectors, k)
+
+    if rows is None:
+        return index.search(query, k)
+    if len(rows) == 0:
+        n = len(query)
+        return np.empty((n, 0), np.float32), np.empty((n, 0), np.int64)
+
+    if len(rows) <= EXACT_SEARCH_MAX_ROWS:
+        try:
+            return _exact_search(index, query, k, rows)
+        except RuntimeError:
+            # IVF indexes have no direct map to reconstruct from
+            pass
+
+    mask = np.zeros(index.ntotal, dtype=bool)
+    mask[rows] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(index.ntotal, faiss.swig_ptr(bitmap))
+
+    if config.index_type in (Index_Types.IVF_FLAT.value, Index_Types.IVF_PQ.value):
+        nprobe = config.nprobe
+        if len(rows) < IVF_FULL_PROBE_FRACTION * index.ntotal:
+            nprobe = faiss.extract_index_ivf(index).nlist
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    elif config.index_type == Index_Types.HNSW.value:
+        params = faiss.SearchParametersHNSW(
+            sel=selector, efSearch=max(config.ef_search, k)
+        )
+    else:
+        params = faiss.SearchParameters(sel=selector)
+
+    # The selector only points into bitmap, which stays alive in this frame
+    return index.search(query, k, params=params)
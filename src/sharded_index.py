@@ -0,0 +1,388 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import reduce
+from typing import Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scripts.constants import (
+    SHARD_MANIFEST_FILE_NAME,
+    SHARDS_DIR_NAME,
+    Metadata_Columns,
+    Shard_Keys,
+)
+from src.incremental_index import load_tombstones, reset_incremental_state
+from src.index_builder import (
+    IndexConfig,
+    apply_search_params,
+    build_index,
+    enable_reconstruct,
+    index_version,
+    load_rerank_vectors,
+    read_index,
+    write_index,
+)
+from src.metadata_store import MetadataStore
+from src.search_filters import filtered_search
+
+# Shard name for rows whose shard key is missing
+UNKNOWN_SHARD = "unknown"
+
+
+def shard_name(value) -> str:
+    """Folder-safe shard name for a shard key value, e.g. 'Credit card' -> 'credit-card'."""
+    if value is None:
+        return UNKNOWN_SHARD
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or UNKNOWN_SHARD
+
+
+def shard_path(folder_path: str, name: str) -> str:
+    return os.path.join(folder_path, SHARDS_DIR_NAME, name)
+
+
+def read_shard_manifest(folder_path: str) -> dict:
+    """Returns the folder's shard manifest, or an empty dict if it is not sharded."""
+    path = os.path.join(folder_path, SHARD_MANIFEST_FILE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_shard_manifest(folder_path: str, shard_by: str, entries: list) -> dict:
+    manifest = {
+        "shard_by": shard_by,
+        "shards": sorted(entries, key=lambda entry: entry["name"]),
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    path = os.path.join(folder_path, SHARD_MANIFEST_FILE_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def is_sharded(folder_path: str) -> bool:
+    return os.path.exists(os.path.join(folder_path, SHARD_MANIFEST_FILE_NAME))
+
+
+def clear_shards(folder_path: str):
+    """Removes the shards of a folder, e.g. before it is rebuilt as one index."""
+    manifest_path = os.path.join(folder_path, SHARD_MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    shutil.rmtree(os.path.join(folder_path, SHARDS_DIR_NAME), ignore_errors=True)
+
+
+def shard_rows(metadata_store: MetadataStore, shard_by: str) -> dict:
+    """
+    Assigns every row of a metadata store to a shard.
+    Args:
+        metadata_store (MetadataStore): The rows to partition.
+        shard_by (str): A Shard_Keys value.
+    Returns:
+        dict: Shard name -> (shard key value, sorted row ids), ordered by name.
+    Raises:
+        ValueError: If shard_by is not a Shard_Keys value.
+    """
+    if shard_by == Shard_Keys.PRODUCT.value:
+        column = (
+            metadata_store.column(Metadata_Columns.PRODUCT.value)
+            .unify_dictionaries()
+            .combine_chunks()
+        )
+        if not pa.types.is_dictionary(column.type):
+            column = column.dictionary_encode()
+        codes = column.indices.fill_null(-1).to_numpy()
+        values = column.dictionary.to_pylist()
+    elif shard_by == Shard_Keys.YEAR.value:
+        years = pc.year(
+            metadata_store.column(Metadata_Columns.DATE_RECEIVED.value)
+        ).combine_chunks()
+        codes = years.fill_null(-1).to_numpy()
+        values = {int(year): int(year) for year in np.unique(codes[codes >= 0])}
+    else:
+        raise ValueError(
+            f"Unknown shard key {shard_by}. Choose from {[k.value for k in Shard_Keys]}"
+        )
+
+    by_name = {}
+    keys = values.items() if isinstance(values, dict) else enumerate(values)
+    for code, value in list(keys) + [(-1, None)]:
+        rows = np.flatnonzero(codes == code)
+        if len(rows) == 0:
+            continue
+        name = shard_name(value)
+        key, previous = by_name.get(name, (value, np.empty(0, np.int64)))
+        by_name[name] = (key, np.union1d(previous, rows))
+    return dict(sorted(by_name.items()))
+
+
+def _take_embeddings(embeddings, rows: np.ndarray):
+    if isinstance(embeddings, np.ndarray):
+        return embeddings[rows]
+    return embeddings.iloc[rows].reset_index(drop=True)
+
+
+def write_shards(
+    embeddings,
+    metadata_store: MetadataStore,
+    folder_path: str,
+    config: IndexConfig = None,
+    shard_by: str = Shard_Keys.PRODUCT.value,
+    only: list = None,
+) -> dict:
+    """
+    Builds one index and metadata store per shard under folder/shards/<name>,
+    and lists them in the folder's shard manifest. Each shard is a complete
+    vector store folder, sized and trained on its own rows.
+    Args:
+        embeddings (pd.Series or np.ndarray): One vector per metadata store row.
+        metadata_store (MetadataStore): Chunk text and metadata, row-aligned with embeddings.
+        folder_path (str): The vector store folder.
+        config (IndexConfig): Index description used for every shard.
+        shard_by (str): A Shard_Keys value.
+        only (list, optional): Shard names or key values to rebuild; every other
+            shard already in the manifest is kept as it is.
+    Returns:
+        dict: The new shard manifest.
+    Raises:
+        ValueError: If only is given and the folder is sharded by another key.
+    """
+    config = config or IndexConfig()
+    existing = read_shard_manifest(folder_path)
+    if only is not None and existing and existing["shard_by"] != shard_by:
+        raise ValueError(
+            f"{folder_path} is sharded by {existing['shard_by']}, not {shard_by}. "
+            "Rebuild every shard to change the shard key"
+        )
+
+    assignments = shard_rows(metadata_store, shard_by)
+    if only is None:
+        selected = set(assignments)
+        entries = []
+    else:
+        selected = {shard_name(value) for value in only}
+        entries = [
+            entry
+            for entry in existing.get("shards", [])
+            if entry["name"] not in selected
+        ]
+
+    for name in sorted(selected):
+        if name not in assignments:
+            # The shard has no rows left
+            continue
+        key, rows = assignments[name]
+        path = shard_path(folder_path, name)
+        print(f"Building shard {name} ({len(rows)} rows)...")
+        vectors = _take_embeddings(embeddings, rows)
+        index = build_index(vectors, config)
+        write_index(index, path, config, vectors)
+        metadata_store.take(rows).write(path)
+        reset_incremental_state(path, index.ntotal)
+        entries.append({"name": name, "key": key, "rows": int(index.ntotal)})
+
+    manifest = _write_shard_manifest(folder_path, shard_by, entries)
+
+    # Shards dropped from the manifest are only removed once it no longer lists them
+    shards_dir = os.path.join(folder_path, SHARDS_DIR_NAME)
+    listed = {entry["name"] for entry in manifest["shards"]}
+    for name in os.listdir(shards_dir) if os.path.isdir(shards_dir) else []:
+        if name not in listed:
+            shutil.rmtree(os.path.join(shards_dir, name), ignore_errors=True)
+    return manifest
+
+
+@dataclass
+class Shard:
+    name: str
+    key: object
+    index: object
+    config: IndexConfig
+    offset: int
+    vectors: Optional[np.ndarray] = None
+
+
+class ShardedIndex:
+    """
+    The shards of a vector store searched as one index. Global row ids run
+    through the shards in manifest order, so the merged metadata store,
+    tombstones and filters address rows exactly like a single index would.
+    Searches fan out to the shards on a thread pool and the per-shard top-k
+    lists are merged by distance. Shards without an allowed row, e.g.
+    every other product under a product filter, are not searched at all.
+    """
+
+    def __init__(
+        self,
+        shards: list,
+        metadata_store: MetadataStore,
+        tombstones: np.ndarray,
+        version: str,
+        workers: int = None,
+    ):
+        self.shards = shards
+        self.metadata_store = metadata_store
+        self.tombstones = tombstones
+        self.version = version
+        last = shards[-1]
+        # Shard i holds global rows offsets[i] up to offsets[i + 1]
+        self.offsets = np.asarray(
+            [shard.offset for shard in shards] + [last.offset + last.index.ntotal],
+            dtype=np.int64,
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or max(len(shards), 1),
+            thread_name_prefix="rag-shard",
+        )
+
+    @classmethod
+    def open(
+        cls, folder_path: str, mmap: bool = True, only: list = None
+    ) -> "ShardedIndex":
+        """
+        Loads the shards listed in the folder's shard manifest. Each shard is
+        read on its own, so a process can load just the shards it serves.
+        Args:
+            folder_path (str): The vector store folder.
+            mmap (bool): Whether to memory-map the shard index files.
+            only (list, optional): Shard names or key values to load. Defaults to all.
+        Raises:
+            FileNotFoundError: If the folder has no shard manifest.
+        """
+        manifest = read_shard_manifest(folder_path)
+        if not manifest:
+            raise FileNotFoundError(
+                f"No shard manifest in {folder_path}. "
+                "Build shards with scripts/prepare_parquet.py --shard-by"
+            )
+        entries = manifest["shards"]
+        if only is not None:
+            wanted = {shard_name(value) for value in only}
+            entries = [entry for entry in entries if entry["name"] in wanted]
+
+        shards, stores, tombstones, offset = [], [], [], 0
+        # The folder itself holds the BM25 index shared by every shard
+        versions = [index_version(folder_path)]
+        for entry in entries:
+            path = shard_path(folder_path, entry["name"])
+            index, config = read_index(path, mmap=mmap)
+            # Context assembly and exact filtered search reconstruct vectors by row
+            enable_reconstruct(index, config)
+            vectors = (
+                load_rerank_vectors(path, index.ntotal)
+                if config.rerank_factor
+                else None
+            )
+            shards.append(
+                Shard(entry["name"], entry["key"], index, config, offset, vectors)
+            )
+            stores.append(MetadataStore.open(path))
+            tombstones.append(load_tombstones(path) + offset)
+            versions.append(f"{entry['name']}:{index_version(path)}")
+            offset += index.ntotal
+
+        if not shards:
+            raise FileNotFoundError(f"No shards to load in {folder_path}")
+        version = hashlib.sha1("|".join(versions).encode()).hexdigest()[:16]
+        return cls(
+            shards,
+            reduce(MetadataStore.append, stores),
+            np.concatenate(tombstones),
+            version,
+        )
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def d(self) -> int:
+        return self.shards[0].index.d
+
+    @property
+    def config(self) -> IndexConfig:
+        return self.shards[0].config
+
+    def set_search_params(self, **overrides):
+        """Applies nprobe / efSearch overrides to every shard."""
+        for shard in self.shards:
+            shard.config = replace(shard.config, **overrides)
+            apply_search_params(shard.index, shard.config)
+
+    def reconstruct_batch(self, rows) -> np.ndarray:
+        """Looks up the vectors of global row ids, shard by shard."""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.empty((len(rows), self.d), dtype=np.float32)
+        owners = np.searchsorted(self.offsets, rows, side="right") - 1
+        for i in np.unique(owners):
+            shard = self.shards[i]
+            positions = np.flatnonzero(owners == i)
+            vectors[positions] = shard.index.reconstruct_batch(
+                rows[positions] - shard.offset
+            )
+        return vectors
+
+    def _search_shard(self, shard: Shard, queries: np.ndarray, k: int, rows):
+        distances, ids = filtered_search(
+            shard.index, queries, k, rows, shard.config, shard.vectors
+        )
+        found = ids >= 0
+        return (
+            np.where(found, distances, np.inf),
+            np.where(found, ids + shard.offset, -1),
+        )
+
+    def search(self, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None):
+        """
+        Scatter-gather search over the shards.
+        Args:
+            queries (np.ndarray): (n, dim) float32 queries, searched together.
+            k (int): Number of neighbours.
+            rows (np.ndarray or None): Sorted allowed global row ids, None for no filter.
+        Returns:
+            tuple: (distances, ids) shaped like index.search output, padded with -1.
+        """
+        tasks = []
+        for i, shard in enumerate(self.shards):
+            if rows is None:
+                tasks.append((shard, None))
+                continue
+            lo, hi = np.searchsorted(rows, self.offsets[i : i + 2])
+            if hi > lo:
+                tasks.append((shard, rows[lo:hi] - shard.offset))
+
+        n = len(queries)
+        if len(tasks) == 1:
+            results = [self._search_shard(tasks[0][0], queries, k, tasks[0][1])]
+        else:
+            futures = [
+                self._pool.submit(self._search_shard, shard, queries, k, local)
+                for shard, local in tasks
+            ]
+            results = [future.result() for future in futures]
+
+        distances = np.concatenate(
+            [np.empty((n, 0), np.float32)] + [d for d, _ in results], axis=1
+        )
+        ids = np.concatenate([np.empty((n, 0), np.int64)] + [i for _, i in results], 1)
+        top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        distances = np.take_along_axis(distances, top, axis=1)
+        ids = np.take_along_axis(ids, top, axis=1)
+        if ids.shape[1] < k:
+            missing = k - ids.shape[1]
+            distances = np.pad(
+                distances, ((0, 0), (0, missing)), constant_values=np.inf
+            )
+            ids = np.pad(ids, ((0, 0), (0, missing)), constant_values=-1)
+        return distances, ids
+
+    def close(self):
+        self._pool.shutdown(wait=False)
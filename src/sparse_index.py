@@ -0,0 +1,213 @@
+import json
+import os
+from typing import Iterable, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scripts.constants import SPARSE_INDEX_DIR_NAME, Metadata_Columns
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal-rank fusion damping constant
+RRF_K = 60
+
+# Queries of at most this many words are treated as keyword lookups
+KEYWORD_QUERY_MAX_WORDS = 4
+
+
+def terms(normalized_text) -> list:
+    """
+    Splits text produced by tokenize_and_lemmatize into index terms:
+    lowercased, punctuation-only tokens dropped. Numbers such as
+    regulation sections are kept.
+    """
+    if not isinstance(normalized_text, str):
+        return []
+    return [
+        token.lower()
+        for token in normalized_text.split()
+        if any(char.isalnum() for char in token)
+    ]
+
+
+def is_keyword_query(query: str) -> bool:
+    """Whether a query looks like a keyword lookup rather than a question."""
+    return '"' in query or len(query.split()) <= KEYWORD_QUERY_MAX_WORDS
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """
+    Merges ranked lists of row ids by summing 1 / (k + rank) per row.
+    Returns:
+        list: Row ids ordered by fused score, ties kept in first-seen order.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class SparseIndex:
+    """
+    BM25 inverted index over the Normalized Complaint column, one document
+    per complaint. Postings are stored as CSR arrays (per-term offsets into
+    document ids and term frequencies) saved as .npy files next to the FAISS
+    index and memory-mapped on load.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        keys: list,
+    ):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.keys = keys
+        self.n_docs = len(doc_lengths)
+        self.avg_length = float(np.mean(doc_lengths)) if self.n_docs else 0.0
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @classmethod
+    def build(cls, batches: Iterable) -> "SparseIndex":
+        """
+        Builds the index from (complaint ids, normalized texts) batches.
+        Args:
+            batches (Iterable): Pairs of equal-length sequences.
+        Returns:
+            SparseIndex: The new index.
+        """
+        vocabulary, keys, lengths = {}, [], []
+        term_parts, doc_parts, freq_parts = [], [], []
+
+        for batch_keys, texts in batches:
+            for key, text in zip(batch_keys, texts):
+                doc = len(keys)
+                keys.append(str(key))
+                ids = [vocabulary.setdefault(t, len(vocabulary)) for t in terms(text)]
+                lengths.append(len(ids))
+                if not ids:
+                    continue
+                unique, counts = np.unique(ids, return_counts=True)
+                term_parts.append(unique)
+                doc_parts.append(np.full(len(unique), doc, dtype=np.int32))
+                freq_parts.append(counts)
+
+        term_ids = np.concatenate(term_parts) if term_parts else np.empty(0, np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)), out=offsets[1:])
+
+        return cls(
+            vocabulary,
+            offsets,
+            np.concatenate(doc_parts)[order] if doc_parts else np.empty(0, np.int32),
+            (
+                np.concatenate(freq_parts)[order].astype(np.uint16)
+                if freq_parts
+                else np.empty(0, np.uint16)
+            ),
+            np.asarray(lengths, dtype=np.int32),
+            keys,
+        )
+
+    def write(self, folder_path: str):
+        """Writes the index to a `bm25` folder next to the FAISS index."""
+        path = os.path.join(folder_path, SPARSE_INDEX_DIR_NAME)
+        os.makedirs(path, exist_ok=True)
+        for name in ("offsets", "doc_ids", "term_freqs", "doc_lengths"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "terms.json"), "w") as f:
+            json.dump(sorted(self.vocabulary, key=self.vocabulary.get), f)
+        with open(os.path.join(path, "keys.json"), "w") as f:
+            json.dump(self.keys, f)
+
+    @classmethod
+    def open(cls, folder_path: str) -> Optional["SparseIndex"]:
+        """Memory-maps an index written by `write`, or returns None if there is none."""
+        path = os.path.join(folder_path, SPARSE_INDEX_DIR_NAME)
+        if not os.path.exists(os.path.join(path, "offsets.npy")):
+            return None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("offsets", "doc_ids", "term_freqs", "doc_lengths")
+        }
+        with open(os.path.join(path, "terms.json")) as f:
+            vocabulary = {term: i for i, term in enumerate(json.load(f))}
+        with open(os.path.join(path, "keys.json")) as f:
+            keys = json.load(f)
+        return cls(vocabulary, keys=keys, **arrays)
+
+    def search(self, query_terms: list, n: int) -> tuple:
+        """
+        Scores documents containing any query term with BM25.
+        Returns:
+            tuple: (document indexes, scores), best first, at most n.
+        """
+        term_ids = {self.vocabulary[t] for t in query_terms if t in self.vocabulary}
+        if not term_ids:
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+
+        docs, weights = [], []
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            postings = np.asarray(self.doc_ids[start:end])
+            tf = np.asarray(self.term_freqs[start:end], dtype=np.float32)
+            idf = np.log(
+                1 + (self.n_docs - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * self.doc_lengths[postings] / self.avg_length
+            )
+            docs.append(postings)
+            weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        unique, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+
+        top = np.argsort(-scores, kind="stable")[:n]
+        return unique[top].astype(np.int64), scores[top]
+
+
+class ComplaintRows:
+    """
+    Maps sparse index documents (complaints) to the vector rows of their
+    chunks, as CSR arrays built from the metadata store's id column.
+    """
+
+    def __init__(self, sparse_index: SparseIndex, metadata_store):
+        ids = (
+            metadata_store.column(Metadata_Columns.ID.value)
+            .cast(pa.string())
+            .combine_chunks()
+            .dictionary_encode()
+        )
+        codes = ids.indices.fill_null(-1).to_numpy()
+        self.order = np.argsort(codes, kind="stable").astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(ids.dictionary))
+        self.starts = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.starts[1:])
+        # Null codes sort first
+        self.starts += len(codes) - counts.sum()
+        self.doc_codes = (
+            pc.index_in(pa.array(sparse_index.keys, pa.string()), ids.dictionary)
+            .fill_null(-1)
+            .to_numpy()
+        )
+
+    def rows(self, doc: int) -> np.ndarray:
+        code = self.doc_codes[doc]
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return self.order[self.starts[code] : self.starts[code + 1]]
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from scripts.constants import Columns, product_categories
+
+# all-MiniLM-L6-v2 embedding width
+SYNTHETIC_DIM = 384
+
+SUB_PRODUCTS = {
+    "Credit card": ["General-purpose credit card", "Store credit card"],
+    "Payday loan, title loan, or personal loan": [
+        "Payday loan",
+        "Installment loan",
+        "Title loan",
+    ],
+    "Checking or Savings account": ["Checking account", "Savings account"],
+    "Money transfers": ["Domestic (US) money transfer", "Mobile or digital wallet"],
+}
+
+ISSUES = {
+    "Credit card": [
+        "Problem with a purchase shown on your statement",
+        "Fees or interest",
+        "Closing your account",
+    ],
+    "Payday loan, title loan, or personal loan": [
+        "Struggling to pay your loan",
+        "Charged fees or interest you didn't expect",
+        "Getting the loan",
+    ],
+    "Checking or Savings account": [
+        "Managing an account",
+        "Closing an account",
+        "Problem caused by your funds being low",
+    ],
+    "Money transfers": [
+        "Fraud or scam",
+        "Money was not available when promised",
+        "Other transaction problem",
+    ],
+}
+
+COMPANIES = [
+    "CAPITAL ONE FINANCIAL CORPORATION",
+    "JPMORGAN CHASE & CO.",
+    "BANK OF AMERICA, NATIONAL ASSOCIATION",
+    "WELLS FARGO & COMPANY",
+    "CITIBANK, N.A.",
+    "PAYPAL HOLDINGS, INC.",
+]
+
+STATES = ["CA", "FL", "TX", "NY", "GA", "IL", "PA", "NC", "OH", "NJ"]
+
+OPENINGS = [
+    "On XX/XX/XXXX I noticed that",
+    "I have been a customer for years and",
+    "After calling customer service several times,",
+    "I am filing this complaint because",
+]
+
+DETAILS = [
+    "a charge of {amount} appeared that I never authorized.",
+    "they added a late fee of {amount} even though I paid on time.",
+    "my {sub_product} was closed without any notice.",
+    "the transfer of {amount} never reached the recipient.",
+    "I was charged {amount} in interest I was never told about.",
+]
+
+CLOSINGS = [
+    "Nobody has been able to explain why and I want my money back.",
+    "I was told it would be fixed within 10 days but nothing happened.",
+    "This has damaged my credit and caused a lot of stress.",
+    "I would like the company to correct this and refund the fees.",
+]
+
+
+def generate_complaints(n: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates a synthetic complaint dump with every `Columns` field.
+    Narratives are short enough (under 500 characters) to make a single
+    chunk each, so `n` complaints give `n` chunks.
+    Args:
+        n (int): Number of complaints.
+        seed (int): Random seed; the same seed always gives the same corpus.
+    Returns:
+        pd.DataFrame: Complaints with raw column names.
+    """
+    rng = np.random.default_rng(seed)
+
+    products = np.asarray(product_categories)[
+        rng.integers(len(product_categories), size=n)
+    ]
+    slot = rng.integers(1_000_000, size=n)
+    sub_products = np.asarray(
+        [SUB_PRODUCTS[p][s % len(SUB_PRODUCTS[p])] for p, s in zip(products, slot)]
+    )
+    issues = np.asarray([ISSUES[p][s % len(ISSUES[p])] for p, s in zip(products, slot)])
+    amounts = rng.integers(5, 2000, size=n)
+
+    openings = rng.integers(len(OPENINGS), size=n)
+    details = rng.integers(len(DETAILS), size=n)
+    closings = rng.integers(len(CLOSINGS), size=n)
+    narratives = [
+        f"{OPENINGS[o]} {DETAILS[d].format(amount=f'${a}.00', sub_product=s.lower())} "
+        f"{CLOSINGS[c]}"
+        for o, d, c, a, s in zip(openings, details, closings, amounts, sub_products)
+    ]
+
+    received = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 5 * 365, size=n), unit="D"
+    )
+
+    def choice(values: list) -> np.ndarray:
+        return np.asarray(values)[rng.integers(len(values), size=n)]
+
+    return pd.DataFrame(
+        {
+            Columns.DATE_RECEIVED.value: received.strftime("%Y-%m-%d"),
+            Columns.PRODUCT.value: products,
+            Columns.SUB_PRODUCT.value: sub_products,
+            Columns.ISSUE.value: issues,
+            Columns.SUB_ISSUE.value: None,
+            Columns.COMPLAINT.value: narratives,
+            Columns.COMPANY_PUBLIC_RESPONSE.value: "Company has responded to the consumer and the CFPB",
+            Columns.COMPANY.value: choice(COMPANIES),
+            Columns.STATE.value: choice(STATES),
+            Columns.ZIP_CODE.value: rng.integers(10000, 99999, size=n).astype(str),
+            Columns.TAGS.value: None,
+            Columns.CONSUMER_CONSENT.value: "Consent provided",
+            Columns.SUBMITTED_VIA.value: "Web",
+            Columns.DATE_SENT_TO_COMPANY.value: (
+                received + pd.Timedelta(days=1)
+            ).strftime("%Y-%m-%d"),
+            Columns.COMPANY_RESPONSE_TO_CONSUMER.value: "Closed with explanation",
+            Columns.TIMELY_RESPONSE.value: "Yes",
+            Columns.CONSUMER_DISPUTED.value: "N/A",
+            Columns.COMPLAINT_ID.value: np.arange(1, n + 1) + 10_000_000,
+        }
+    )
+
+
+def synthetic_embeddings(
+    df: pd.DataFrame, dim: int = SYNTHETIC_DIM, noise: float = 0.5, seed: int = 42
+) -> np.ndarray:
+    """
+    Unit-norm float32 vectors clustered by (product, issue), standing in for
+    model embeddings so IVF and HNSW recall behave as on topical text.
+    Returns:
+        np.ndarray: (len(df), dim) matrix in row order.
+    """
+    rng = np.random.default_rng(seed)
+    topics = pd.factorize(
+        df[Columns.PRODUCT.value].astype(str)
+        + "|"
+        + df[Columns.ISSUE.value].astype(str)
+    )[0]
+    centers = rng.standard_normal((topics.max() + 1, dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    vectors = centers[topics]
+    # Scaled so the noise vector has norm ~noise whatever the width
+    vectors += rng.standard_normal(vectors.shape, dtype=np.float32) * (
+        noise / np.sqrt(dim)
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_queries(
+    vectors: np.ndarray, n: int, noise: float = 0.1, seed: int = 7
+) -> np.ndarray:
+    """Perturbed copies of random stored vectors, so no query is an exact match."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(len(vectors), size=n)].copy()
+    queries += rng.standard_normal(queries.shape, dtype=np.float32) * (
+        noise / np.sqrt(queries.shape[1])
+    )
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
@@ -0,0 +1,334 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+# Rough characters per token for English text, used when the endpoint does not report usage
+CHARS_PER_TOKEN = 4
+
+# Upper bounds, in seconds, of the Prometheus stage latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Trace collecting stages on the current thread or task, None when tracing is off
+_active_trace: ContextVar = ContextVar("active_trace", default=None)
+
+# Shared no-op returned by `stage` while nothing is traced
+_NO_STAGE = nullcontext()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float
+
+    @property
+    def ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+
+class Trace:
+    """
+    Timings and counters of one request. Stages are perf_counter spans, so
+    they can overlap (e.g. parallel dense and sparse search) and repeat
+    (e.g. one docstore fetch per search).
+    """
+
+    def __init__(self, name: str = "rag.answer", **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.start_unix_ns = time.time_ns()
+        self.end = None
+        self.spans = []
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append(Span(name, start, time.perf_counter()))
+
+    def add_span(self, name: str, start: float, end: float):
+        self.spans.append(Span(name, start, end))
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def stage_ms(self) -> dict:
+        """Milliseconds per stage name, summed over repeats."""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.ms
+        return totals
+
+    def unix_ns(self, perf_time: float) -> int:
+        """Converts a perf_counter reading taken during this trace to epoch nanoseconds."""
+        return self.start_unix_ns + int((perf_time - self.start) * 1e9)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            **self.attributes,
+            "total_ms": round(self.total_ms, 3),
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stage_ms().items()},
+            **self.counters,
+        }
+
+
+@contextmanager
+def activate(trace: Optional[Trace]):
+    """
+    Makes `trace` the one `stage` and `count` record into, for the current
+    thread or task. Work handed to a pool must carry the context along
+    (contextvars.copy_context().run) to be recorded.
+    """
+    if trace is None:
+        yield None
+        return
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _active_trace.get()
+
+
+def stage(name: str):
+    """Times a block into the active trace. Costs one lookup when there is none."""
+    trace = _active_trace.get()
+    if trace is None:
+        return _NO_STAGE
+    return trace.stage(name)
+
+
+def count(name: str, value: int = 1):
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+class TelemetrySink(ABC):
+    """Receives every finished trace."""
+
+    @abstractmethod
+    def emit(self, trace: Trace):
+        pass
+
+
+class LogSink(TelemetrySink):
+    """Prints one JSON line per trace."""
+
+    def emit(self, trace: Trace):
+        print(f"[telemetry] {json.dumps(trace.to_dict())}")
+
+
+class PrometheusSink(TelemetrySink):
+    """
+    Aggregates traces into Prometheus metrics: a latency histogram per stage
+    and totals per counter, rendered in the text exposition format.
+    """
+
+    def __init__(self, namespace: str = "rag", buckets: tuple = LATENCY_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._requests = 0
+
+    def _observe(self, stage_name: str, seconds: float):
+        histogram = self._histograms.setdefault(
+            stage_name, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        )
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+    def emit(self, trace: Trace):
+        with self._lock:
+            self._requests += 1
+            self._observe("total", trace.total_ms / 1000)
+            for name, ms in trace.stage_ms().items():
+                self._observe(name, ms / 1000)
+            for name, value in trace.counters.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_stage_seconds Time spent per request stage.",
+            f"# TYPE {ns}_stage_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                for bound, value in zip(self.buckets, histogram["buckets"]):
+                    lines.append(
+                        f'{ns}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {value}'
+                    )
+                lines.append(
+                    f'{ns}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram["count"]}'
+                )
+                lines.append(
+                    f'{ns}_stage_seconds_sum{{stage="{name}"}} {histogram["sum"]}'
+                )
+                lines.append(
+                    f'{ns}_stage_seconds_count{{stage="{name}"}} {histogram["count"]}'
+                )
+            lines += [
+                f"# TYPE {ns}_requests_total counter",
+                f"{ns}_requests_total {self._requests}",
+            ]
+            for name, value in sorted(self._counters.items()):
+                lines += [
+                    f"# TYPE {ns}_{name}_total counter",
+                    f"{ns}_{name}_total {value}",
+                ]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Serves `render()` at /metrics from a daemon thread. Only local
+        scrapers can reach it unless `host` opens it to other interfaces.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(
+            target=server.serve_forever, name="rag-metrics", daemon=True
+        ).start()
+        return server
+
+
+class OpenTelemetrySink(TelemetrySink):
+    """
+    Exports each trace as an OpenTelemetry span with one child span per
+    stage. Requires opentelemetry-api; spans go to whatever tracer provider
+    the application configured.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            from opentelemetry import trace as otel_trace
+
+            tracer = otel_trace.get_tracer("complaint-rag")
+        self.tracer = tracer
+
+    def emit(self, trace: Trace):
+        from opentelemetry import trace as otel_trace
+
+        attributes = {
+            **{
+                key: value
+                for key, value in trace.attributes.items()
+                if value is not None
+            },
+            **trace.counters,
+        }
+        root = self.tracer.start_span(
+            trace.name, start_time=trace.start_unix_ns, attributes=attributes
+        )
+        context = otel_trace.set_span_in_context(root)
+        for span in trace.spans:
+            child = self.tracer.start_span(
+                span.name, context=context, start_time=trace.unix_ns(span.start)
+            )
+            child.end(end_time=trace.unix_ns(span.end))
+        root.end(end_time=trace.unix_ns(trace.end or time.perf_counter()))
+
+
+def make_sinks(
+    spec: str, metrics_port: int = 9464, metrics_host: str = "127.0.0.1"
+) -> list:
+    """
+    Builds sinks from a comma-separated list of names: log, prometheus
+    (served on `metrics_host`:`metrics_port`) and otel.
+    Raises:
+        ValueError: If a name is unknown.
+    """
+    sinks = []
+    for name in filter(None, (part.strip().lower() for part in spec.split(","))):
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "prometheus":
+            sink = PrometheusSink()
+            sink.serve(metrics_port, metrics_host)
+            sinks.append(sink)
+        elif name == "otel":
+            sinks.append(OpenTelemetrySink())
+        else:
+            raise ValueError(
+                f"Unknown telemetry sink {name}. Choose from log, prometheus, otel"
+            )
+    return sinks
+
+
+class Telemetry:
+    """
+    Starts traces and hands finished ones to the configured sinks. With no
+    sinks, `start` returns None and every stage is a no-op, unless a caller
+    such as the Streamlit debug panel asks for the trace itself.
+    """
+
+    def __init__(self, sinks: list = None):
+        self.sinks = list(sinks or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def start(self, name: str = "rag.answer", force: bool = False, **attributes):
+        if not (self.sinks or force):
+            return None
+        return Trace(name, **attributes)
+
+    def finish(self, trace: Optional[Trace]):
+        if trace is None:
+            return
+        trace.finish()
+        for sink in self.sinks:
+            # A broken exporter must not fail the answer it describes
+            try:
+                sink.emit(trace)
+            except Exception as e:
+                print(f"Telemetry sink {type(sink).__name__} failed: {e}")
@@ -1,16 +1,121 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Optional, Sequence
+import numpy as np
 import pandas as pd
-from scripts.constants import Columns
-from langchain_core.documents import Document
+from scripts.constants import Columns, metadata_source_columns
 
+# Chunks per batch handed to the embedding stage
+DEFAULT_CHUNK_BATCH_SIZE = 4096
 
-class TextProcessor:
-    def __init__(self, chunk_size: int = 500, chunk_overlap=50):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+
+@lru_cache(maxsize=None)
+def _get_splitter(chunk_size: int, chunk_overlap: int):
+    """One splitter per process and configuration."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def _split_shard(texts: Sequence, chunk_size: int, chunk_overlap: int) -> tuple:
+    """
+    Splits one shard of narratives inside a worker process.
+    Returns:
+        tuple: (chunk texts, chunks per narrative, chunk start offsets, chunk end offsets)
+    """
+    splitter = _get_splitter(chunk_size, chunk_overlap)
+    chunks, counts, starts, ends = [], [], [], []
+
+    for text in texts:
+        if not isinstance(text, str):
+            counts.append(0)
+            continue
+        pieces = splitter.split_text(text)
+        # Same offset search as langchain's add_start_index: each chunk starts
+        # at most `chunk_overlap` characters before the previous one ended
+        offset = 0
+        for piece in pieces:
+            start = text.find(piece, max(0, offset))
+            if start < 0:
+                start = text.find(piece)
+            chunks.append(piece)
+            starts.append(start)
+            ends.append(start + len(piece))
+            offset = start + len(piece) - chunk_overlap
+        counts.append(len(pieces))
+
+    return (
+        chunks,
+        np.asarray(counts, dtype=np.int64),
+        np.asarray(starts, dtype=np.int64),
+        np.asarray(ends, dtype=np.int64),
+    )
+
+
+@dataclass
+class ChunkBatch:
+    """
+    Chunks as parallel arrays: the text of each chunk, the position of the
+    row it came from, and its character span within that row's narrative.
+    """
+
+    texts: list
+    parent_rows: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def slice(self, start: int, stop: int) -> "ChunkBatch":
+        return ChunkBatch(
+            self.texts[start:stop],
+            self.parent_rows[start:stop],
+            self.starts[start:stop],
+            self.ends[start:stop],
+        )
+
+    @classmethod
+    def concat(cls, batches: list) -> "ChunkBatch":
+        if not batches:
+            empty = np.empty(0, dtype=np.int64)
+            return cls([], empty, empty, empty)
+        return cls(
+            [text for batch in batches for text in batch.texts],
+            np.concatenate([batch.parent_rows for batch in batches]),
+            np.concatenate([batch.starts for batch in batches]),
+            np.concatenate([batch.ends for batch in batches]),
         )
 
+
+class TextProcessor:
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap=50,
+        n_jobs: Optional[int] = 1,
+        shard_size: int = 2000,
+    ):
+        """
+        Args:
+            chunk_size (int): Maximum characters per chunk.
+            chunk_overlap (int): Characters shared by consecutive chunks.
+            n_jobs (int, optional): Splitting processes. None uses the CPU count,
+                1 splits in the current process.
+            shard_size (int): Narratives sent to a worker at a time.
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.splitter = _get_splitter(chunk_size, chunk_overlap)
+
     def split_text(self, text) -> list:
         """
         Splits the input text into chunks of specified size.
@@ -19,19 +124,96 @@ class TextProcessor:
         """
         return self.splitter.split_text(text)
 
-    def split_documents(self, df: pd.DataFrame) -> list:
-        docs = []
-        for index, row in df.iterrows():
-            text = row[Columns.COMPLAINT.value]
-            chunks = self.split_text(text)
-            for chunk in chunks:
-                doc = Document(
-                    page_content=chunk,
-                    metadata={
-                        "id": row[Columns.COMPLAINT_ID.value],
-                        "product": row[Columns.PRODUCT.value],
-                    },
+    def _split_shards(self, texts: list) -> Iterator[ChunkBatch]:
+        """Splits shards in order, keeping at most two shards per worker in flight."""
+        shards = range(0, len(texts), self.shard_size)
+
+        def to_batch(start, result) -> ChunkBatch:
+            chunks, counts, starts, ends = result
+            rows = np.repeat(np.arange(start, start + len(counts)), counts)
+            return ChunkBatch(chunks, rows, starts, ends)
+
+        if self.n_jobs == 1 or len(texts) <= self.shard_size:
+            for start in shards:
+                shard = texts[start : start + self.shard_size]
+                yield to_batch(
+                    start, _split_shard(shard, self.chunk_size, self.chunk_overlap)
+                )
+            return
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            pending = deque()
+            for start in shards:
+                shard = texts[start : start + self.shard_size]
+                pending.append(
+                    (
+                        start,
+                        executor.submit(
+                            _split_shard, shard, self.chunk_size, self.chunk_overlap
+                        ),
+                    )
                 )
-                docs.append(doc)
+                if len(pending) >= 2 * self.n_jobs:
+                    first, future = pending.popleft()
+                    yield to_batch(first, future.result())
+            while pending:
+                first, future = pending.popleft()
+                yield to_batch(first, future.result())
+
+    def iter_chunk_batches(
+        self, texts: Sequence, batch_size: int = DEFAULT_CHUNK_BATCH_SIZE
+    ) -> Iterator[ChunkBatch]:
+        """
+        Splits narratives and yields chunks in batches of exactly `batch_size`
+        (the last may be smaller), ready to be embedded while later shards
+        are still being split.
+        Args:
+            texts (Sequence): Narratives; parent_rows are positions in this sequence.
+            batch_size (int): Chunks per yielded batch.
+        Yields:
+            ChunkBatch: The next batch of chunks, in narrative order.
+        """
+        buffered, size = [], 0
+        for shard_batch in self._split_shards(list(texts)):
+            buffered.append(shard_batch)
+            size += len(shard_batch)
+            if size < batch_size:
+                continue
+            merged = ChunkBatch.concat(buffered)
+            start = 0
+            while size - start >= batch_size:
+                yield merged.slice(start, start + batch_size)
+                start += batch_size
+            buffered = [merged.slice(start, size)]
+            size -= start
+
+        if size:
+            yield ChunkBatch.concat(buffered)
+
+    def chunk_texts(self, texts: Sequence) -> ChunkBatch:
+        """Splits narratives into a single ChunkBatch."""
+        return ChunkBatch.concat(list(self._split_shards(list(texts))))
+
+    def split_documents(self, df: pd.DataFrame) -> list:
+        from langchain_core.documents import Document
+
+        batch = self.chunk_texts(df[Columns.COMPLAINT.value].tolist())
+
+        # id and product are required, the other metadata fields are kept when present
+        columns = {
+            "id": df[Columns.COMPLAINT_ID.value].tolist(),
+            "product": df[Columns.PRODUCT.value].tolist(),
+            **{
+                field: df[source_col].tolist()
+                for field, source_col in metadata_source_columns.items()
+                if source_col in df.columns
+            },
+        }
 
-        return docs
+        return [
+            Document(
+                page_content=text,
+                metadata={field: values[row] for field, values in columns.items()},
+            )
+            for text, row in zip(batch.texts, batch.parent_rows)
+        ]
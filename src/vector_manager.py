@@ -1,14 +1,100 @@
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+import numpy as np
+import pandas as pd
+from scripts.constants import EMBEDDING_CACHE_PATH, EMBEDDING_MODEL_NAME, Columns
+from src.embedding_engine import DEFAULT_BATCH_SIZE, EmbeddingEngine
+from src.incremental_index import reset_incremental_state
+from src.index_builder import IndexConfig, build_index, write_index
+from src.metadata_store import MetadataStore
+from src.text_processor import TextProcessor
 
 
 class VectorManager:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        self.embeddings = HuggingFaceEmbeddings(model_name=model_name)
-        self.vector_store = None
+    def __init__(
+        self,
+        model_name=EMBEDDING_MODEL_NAME,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        n_workers: int = 1,
+        cache_path: str = EMBEDDING_CACHE_PATH,
+    ):
+        """
+        Args:
+            model_name (str): sentence-transformers model id.
+            batch_size (int): Chunks per encoder batch.
+            n_workers (int): Encoder processes.
+            cache_path (str, optional): On-disk embedding cache. None disables it.
+        """
+        self.model_name = model_name
+        self.engine = EmbeddingEngine(
+            model_name,
+            batch_size=batch_size,
+            n_workers=n_workers,
+            cache_path=cache_path,
+        )
+        self.index = None
+        self.metadata_store = None
+        self.config = IndexConfig()
+        # float32 vectors, kept only while the config re-ranks with them
+        self.vectors = None
 
-    def create_vector_store(self, documents):
-        self.vector_store = FAISS.from_documents(documents, self.embeddings)
+    @property
+    def embeddings(self) -> EmbeddingEngine:
+        """The embedding engine, usable wherever HuggingFaceEmbeddings is."""
+        return self.engine
+
+    def create_vector_store(self, documents, config: IndexConfig = None):
+        """
+        Embeds the documents with the batched, cached embedding engine and
+        builds the FAISS index from the resulting matrix.
+        """
+        self.config = config or IndexConfig()
+        vectors = self.engine.embed([doc.page_content for doc in documents])
+        self.index = build_index(vectors, self.config)
+        self.vectors = vectors if self.config.rerank_factor else None
+        self.metadata_store = MetadataStore.from_documents(documents)
+
+    def create_vector_store_from_frame(
+        self,
+        df: pd.DataFrame,
+        text_processor: TextProcessor = None,
+        config: IndexConfig = None,
+    ):
+        """
+        Columnar counterpart of create_vector_store: chunks the complaint
+        narratives in fixed-size batches and embeds each batch as soon as it
+        is split, without creating a Document per chunk. The store keeps each
+        narrative once and chunks as offsets into it.
+        Args:
+            df (pd.DataFrame): Complaints with raw column names.
+            text_processor (TextProcessor, optional): The chunker. Defaults to TextProcessor().
+            config (IndexConfig, optional): The index to build. Defaults to a flat index.
+        Raises:
+            ValueError: If the narratives produce no chunks.
+        """
+        self.config = config or IndexConfig()
+        text_processor = text_processor or TextProcessor()
+
+        vectors, parents, starts, ends = [], [], [], []
+        for batch in text_processor.iter_chunk_batches(df[Columns.COMPLAINT.value]):
+            vectors.append(self.engine.embed(batch.texts))
+            # Chunk text is not kept: the store slices it from the narratives
+            parents.append(batch.parent_rows)
+            starts.append(batch.starts)
+            ends.append(batch.ends)
+
+        if not vectors:
+            raise ValueError("No complaint narratives to index")
+        vectors = np.concatenate(vectors)
+        self.index = build_index(vectors, self.config)
+        self.vectors = vectors if self.config.rerank_factor else None
+        self.metadata_store = MetadataStore.from_offsets(
+            np.concatenate(parents), np.concatenate(starts), np.concatenate(ends), df
+        )
 
     def save_vector_store(self, path="vector_store/"):
-        self.vector_store.save_local(path)
+        """
+        Saves the index and a columnar metadata store, the layout RAGSystem
+        loads, instead of a pickled docstore.
+        """
+        write_index(self.index, path, self.config, self.vectors)
+        self.metadata_store.write(path)
+        reset_incremental_state(path, self.index.ntotal)
@@ -0,0 +1,78 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+DIM = 8
+
+
+class FakeEmbeddings:
+    """
+    Stands in for HuggingFaceEmbeddings: texts of the same length get the
+    same vector, and every embed_documents batch is recorded.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def embed_documents(self, texts):
+        time.sleep(self.delay)
+        self.batches.append(list(texts))
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        time.sleep(self.delay)
+        return self.vector(text)
+
+    @staticmethod
+    def vector(text):
+        return np.random.default_rng(len(text)).random(DIM).tolist()
+
+
+@pytest.fixture
+def make_rag(tmp_path):
+    """
+    Factory of RAGSystems over a small flat-index store in tmp_path, built
+    with RAGSystem.from_parts and FakeEmbeddings.
+    Args (of the factory):
+        texts (list, optional): Chunk texts, one row each.
+        ids (list, optional): Complaint ids of the rows. Defaults to the row numbers.
+        sparse_index (SparseIndex, optional): BM25 index written next to the store.
+        llm_client, llm, **options: Passed to RAGSystem.from_parts; the answer
+            cache is off unless answer_cache_threshold is given.
+    """
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_core")
+    from src.index_builder import IndexConfig, build_index, write_index
+    from src.metadata_store import MetadataStore
+    from src.rag_system import RAGSystem
+
+    def make(
+        texts=("late fee charged twice",),
+        ids=None,
+        sparse_index=None,
+        llm_client=None,
+        llm=None,
+        **options,
+    ):
+        ids = [str(i) for i in range(len(texts))] if ids is None else ids
+        vectors = np.random.default_rng(0).random((len(texts), DIM), dtype=np.float32)
+        folder = str(tmp_path / "store")
+        write_index(build_index(pd.Series(list(vectors))), folder, IndexConfig())
+        MetadataStore.from_columns(list(texts), {"id": ids}).write(folder)
+        if sparse_index is not None:
+            sparse_index.write(folder)
+
+        options.setdefault("answer_cache_threshold", 1.1)
+        return RAGSystem.from_parts(
+            folder, FakeEmbeddings(), llm_client, llm, **options
+        )
+
+    return make
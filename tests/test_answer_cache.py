@@ -0,0 +1,126 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+from src.answer_cache import SemanticAnswerCache, context_key
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+
+@pytest.fixture
+def docs():
+    return [
+        Document(page_content="late fee charged twice", metadata={"id": "1"}),
+        Document(page_content="fee not refunded", metadata={"id": "2"}),
+    ]
+
+
+@pytest.fixture
+def query():
+    return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+
+# cosine similarity ~0.995 with query
+PARAPHRASE = np.array([1.0, 0.1, 0.0], dtype=np.float32)
+# cosine similarity ~0.71 with query
+UNRELATED = np.array([1.0, 1.0, 0.0], dtype=np.float32)
+
+
+class TestContextKey:
+    def test_order_independent(self, docs):
+        assert context_key(docs) == context_key(list(reversed(docs)))
+
+    def test_depends_on_content(self, docs):
+        changed = [docs[0], Document(page_content="other", metadata={"id": "2"})]
+
+        assert context_key(docs) != context_key(changed)
+
+
+class TestSemanticAnswerCache:
+    def test_similar_query_same_context_hits(self, docs, query):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store(query, context_key(docs), "v1", "llm", "Fees were refunded.", ["1"])
+
+        entry = cache.lookup(PARAPHRASE, context_key(docs), "v1", "llm")
+
+        assert entry.answer == "Fees were refunded."
+        assert entry.sources == ["1"]
+        assert cache.stats()["hits"] == 1
+
+    def test_dissimilar_query_misses(self, docs, query):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store(query, context_key(docs), "v1", "llm", "answer", ["1"])
+
+        assert cache.lookup(UNRELATED, context_key(docs), "v1", "llm") is None
+
+    def test_other_context_version_or_model_misses(self, docs, query):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store(query, context_key(docs), "v1", "llm", "answer", ["1"])
+
+        assert cache.lookup(query, context_key(docs[:1]), "v1", "llm") is None
+        assert cache.lookup(query, context_key(docs), "v2", "llm") is None
+        assert cache.lookup(query, context_key(docs), "v1", "other-llm") is None
+
+    def test_lru_eviction(self, docs, query):
+        cache = SemanticAnswerCache(threshold=0.9, max_entries=1)
+        cache.store(query, context_key(docs), "v1", "llm", "first", ["1"])
+        cache.store(query, context_key(docs[:1]), "v1", "llm", "second", ["1"])
+
+        assert cache.lookup(query, context_key(docs), "v1", "llm") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_persists_across_restarts_and_invalidates(self, docs, query, tmp_path):
+        path = str(tmp_path / "answers.db")
+        SemanticAnswerCache(path=path).store(
+            query, context_key(docs), "v1", "llm", "persisted", ["1", "2"]
+        )
+
+        restarted = SemanticAnswerCache(path=path, index_version="v1")
+        entry = restarted.lookup(query, context_key(docs), "v1", "llm")
+        restarted.invalidate("v2")
+
+        assert entry.answer == "persisted"
+        assert restarted.stats()["size"] == 0
+
+    def test_invalidate_keeps_rows_of_other_workers(self, docs, query, tmp_path):
+        path = str(tmp_path / "answers.db")
+        old_worker = SemanticAnswerCache(path=path)
+        old_worker.store(query, context_key(docs), "v1", "llm", "old", ["1", "2"])
+
+        # A worker already on the new index must not delete the old worker's rows
+        SemanticAnswerCache(path=path).invalidate("v2")
+
+        entry = SemanticAnswerCache(path=path, index_version="v1").lookup(
+            query, context_key(docs), "v1", "llm"
+        )
+        assert entry.answer == "old"
+
+    def test_loads_only_current_version(self, docs, query, tmp_path):
+        path = str(tmp_path / "answers.db")
+        writer = SemanticAnswerCache(path=path)
+        writer.store(query, context_key(docs), "v2", "llm", "current", ["1"])
+        for i in range(3):
+            writer.store(query, context_key(docs), "v1", "llm", f"old {i}", ["1"])
+
+        cache = SemanticAnswerCache(path=path, max_entries=2)
+        cache.invalidate("v2")
+        entry = cache.lookup(query, context_key(docs), "v2", "llm")
+
+        assert entry.answer == "current"
+        assert cache.stats()["size"] == 1
+
+    def test_expired_rows_are_dropped_on_load(self, docs, query, tmp_path):
+        path = str(tmp_path / "answers.db")
+        SemanticAnswerCache(path=path).store(
+            query, context_key(docs), "v1", "llm", "expired", ["1", "2"]
+        )
+
+        expired = SemanticAnswerCache(path=path, ttl_seconds=-1, index_version="v1")
+        assert expired.stats()["size"] == 0
+        assert SemanticAnswerCache(path=path, index_version="v1").stats()["size"] == 0
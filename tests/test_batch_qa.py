@@ -0,0 +1,134 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import asyncio
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from src.incremental_index import save_tombstones
+from src.rag_system import BATCH_WINDOW_FACTOR
+from scripts.batch_qa import read_questions, run_batch
+
+N_ROWS = 50
+DIM = 8
+
+
+class FakeLLMClient:
+    max_concurrency = 4
+
+    async def achat(self, prompt, usage=None):
+        if "fail" in prompt:
+            raise RuntimeError("endpoint error")
+        await asyncio.sleep(0.01)
+        return "answer"
+
+
+@pytest.fixture
+def rag(make_rag):
+    texts = [f"chunk {i}" for i in range(N_ROWS)]
+    return make_rag(texts, llm_client=FakeLLMClient())
+
+
+QUESTIONS = ["why fees?", "card closed", "why fees?", "please fail"]
+
+
+class TestBatchRetrieval:
+    def test_single_encoder_call_for_unique_questions(self, rag):
+        matrix = rag.embed_queries(QUESTIONS)
+
+        assert matrix.shape == (4, DIM)
+        assert rag.embeddings.batches == [["why fees?", "card closed", "please fail"]]
+        np.testing.assert_array_equal(matrix[0], matrix[2])
+
+    def test_batch_search_matches_single_search(self, rag):
+        matrix = rag.embed_queries(QUESTIONS)
+        batch = rag.search_by_vectors(matrix, k=3)
+
+        rag.init_query_caches()
+        for i, docs in enumerate(batch):
+            single = rag.search_by_vector(matrix[[i]], k=3)
+            assert [d.page_content for d in docs] == [d.page_content for d in single]
+
+    def test_tombstoned_rows_are_never_returned(self, rag):
+        matrix = rag.embed_queries(QUESTIONS)
+        first_hits = [docs[0].page_content for docs in rag.search_by_vectors(matrix)]
+        tombstones = np.array(sorted({int(hit.split()[1]) for hit in first_hits}))
+
+        save_tombstones(rag.vector_store_path, tombstones)
+        rag.load_vector_db()
+        results = rag.search_by_vectors(matrix)
+
+        assert all(len(docs) == 5 for docs in results)
+        returned = {
+            int(doc.page_content.split()[1]) for docs in results for doc in docs
+        }
+        assert returned.isdisjoint(tombstones)
+
+
+class TestRunBatch:
+    @pytest.mark.parametrize("suffix", [".jsonl", ".parquet"])
+    def test_writes_every_result(self, rag, tmp_path, suffix):
+        output = tmp_path / f"results{suffix}"
+
+        summary = asyncio.run(run_batch(rag, QUESTIONS, str(output), k=3))
+
+        if suffix == ".jsonl":
+            records = [json.loads(line) for line in output.read_text().splitlines()]
+        else:
+            records = pd.read_parquet(output).to_dict("records")
+        records = sorted(records, key=lambda r: r["index"])
+
+        assert [r["question"] for r in records] == QUESTIONS
+        assert len(records[0]["sources"]) == 3
+        assert records[3]["error"] == "endpoint error"
+        assert records[0]["answer"] == "answer"
+        assert summary["questions"] == 4
+        assert summary["errors"] == 1
+
+
+class TestBatchAnswer:
+    def test_retrieves_and_generates_in_bounded_windows(self, rag):
+        in_flight, peak = 0, 0
+
+        class CountingLLMClient(FakeLLMClient):
+            async def achat(self, prompt, usage=None):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.001)
+                in_flight -= 1
+                return "answer"
+
+        rag.llm_client = CountingLLMClient()
+        questions = [f"question {i}" for i in range(40)]
+
+        async def run():
+            return [record async for record in rag.abatch_answer(questions, k=2)]
+
+        records = asyncio.run(run())
+
+        window = FakeLLMClient.max_concurrency * BATCH_WINDOW_FACTOR
+        assert sorted(r["index"] for r in records) == list(range(40))
+        assert [len(batch) for batch in rag.embeddings.batches] == [window, window, 8]
+        assert peak <= FakeLLMClient.max_concurrency
+
+
+class TestReadQuestions:
+    def test_text_and_jsonl(self, tmp_path):
+        text = tmp_path / "q.txt"
+        text.write_text("first\n\nsecond\n")
+        jsonl = tmp_path / "q.jsonl"
+        jsonl.write_text('{"question": "first"}\n{"question": "second"}\n')
+
+        assert read_questions(str(text)) == ["first", "second"]
+        assert read_questions(str(jsonl)) == ["first", "second"]
+
+    def test_csv(self, tmp_path):
+        path = tmp_path / "q.csv"
+        pd.DataFrame({"question": ["first", "second"]}).to_csv(path, index=False)
+
+        assert read_questions(str(path)) == ["first", "second"]
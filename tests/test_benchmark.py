@@ -0,0 +1,80 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import json
+import pytest
+import numpy as np
+from scripts.constants import Columns
+from src.synthetic_corpus import (
+    generate_complaints,
+    synthetic_embeddings,
+    synthetic_queries,
+)
+
+
+class TestSyntheticCorpus:
+    def test_matches_columns_schema(self):
+        df = generate_complaints(100)
+
+        assert list(df.columns) == [col.value for col in Columns]
+        assert df[Columns.COMPLAINT_ID.value].is_unique
+        assert df[Columns.COMPLAINT.value].str.len().max() < 500
+
+    def test_same_seed_same_corpus(self):
+        assert generate_complaints(50).equals(generate_complaints(50))
+        assert not generate_complaints(50).equals(generate_complaints(50, seed=1))
+
+    def test_vectors_are_unit_norm(self):
+        vectors = synthetic_embeddings(generate_complaints(100), dim=16)
+        queries = synthetic_queries(vectors, 10)
+
+        assert vectors.shape == (100, 16) and vectors.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(queries, axis=1), 1, rtol=1e-5)
+
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("langchain_core")
+
+
+class TestBenchmark:
+    def test_run_benchmark_reports_every_metric(self, tmp_path):
+        from scripts.benchmark import run_benchmark
+        from src.index_builder import IndexConfig
+
+        result = run_benchmark(
+            2000,
+            IndexConfig(index_type="ivf_flat", nlist=16),
+            dim=16,
+            n_queries=50,
+            threads=[1, 2],
+            workdir=str(tmp_path),
+        )
+
+        assert 0 < result["recall_at_k"] <= 1
+        assert result["build_seconds"] >= 0 and result["load_seconds"] >= 0
+        assert set(result["search"]) == {"mean_ms", "p50_ms", "p95_ms", "p99_ms"}
+        assert [row["threads"] for row in result["throughput"]] == [1, 2]
+        assert result["rag"]["questions_per_second"] > 0
+        assert result["peak_rss_mb"] > 0
+        json.dumps(result)
+        # The temporary vector store is removed afterwards
+        assert os.listdir(tmp_path) == []
+
+    def test_sizes_run_in_their_own_process(self, tmp_path):
+        from scripts.benchmark import run_isolated
+        from src.index_builder import IndexConfig
+
+        result = run_isolated(
+            500,
+            IndexConfig(),
+            dim=16,
+            n_queries=20,
+            threads=[1],
+            workdir=str(tmp_path),
+        )
+
+        assert result["chunks"] == 500
+        assert result["peak_rss_mb"] > 0
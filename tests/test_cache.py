@@ -0,0 +1,95 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import numpy as np
+from datetime import date
+from unittest.mock import patch
+from src.cache import DiskCache, TTLCache, hash_vector, make_key, normalize_query
+from src.search_filters import SearchFilters
+
+
+class TestKeys:
+    def test_normalize_query(self):
+        assert normalize_query("  Overdraft   FEES \n") == "overdraft fees"
+
+    def test_make_key_is_stable_for_equal_filters(self):
+        first = make_key("abc", 5, SearchFilters(products=["Credit card"]), "v1")
+        second = make_key("abc", 5, SearchFilters(products=["Credit card"]), "v1")
+        other_version = make_key(
+            "abc", 5, SearchFilters(products=["Credit card"]), "v2"
+        )
+
+        assert first == second
+        assert first != other_version
+
+    def test_make_key_handles_dates(self):
+        filters = SearchFilters(date_from=date(2023, 1, 1))
+
+        assert make_key(filters) != make_key(SearchFilters())
+
+    def test_hash_vector(self):
+        vector = np.ones((1, 4), dtype=np.float32)
+
+        assert hash_vector(vector) == hash_vector(vector.copy())
+        assert hash_vector(vector) != hash_vector(vector * 2)
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache = TTLCache("test", max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    @patch("src.cache.time.monotonic")
+    def test_ttl_expiry(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        cache = TTLCache("test", ttl_seconds=10)
+        cache.set("a", 1)
+
+        mock_monotonic.return_value = 105.0
+        assert cache.get("a") == 1
+
+        mock_monotonic.return_value = 111.0
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_tier_is_shared(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        writer = TTLCache("retrieval", disk=DiskCache(path, ttl_seconds=60))
+        reader = TTLCache("retrieval", disk=DiskCache(path, ttl_seconds=60))
+
+        writer.set("key", [3, 1, 2])
+
+        assert reader.get("key") == [3, 1, 2]
+        assert reader.stats()["disk_hits"] == 1
+        assert reader.get("key") == [3, 1, 2]
+        assert reader.stats()["hits"] == 1
+
+    def test_clear_drops_disk_entries(self, tmp_path):
+        disk = DiskCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+        cache = TTLCache("retrieval", disk=disk)
+        cache.set("key", [1])
+
+        cache.clear()
+
+        assert cache.get("key") is None
+
+    def test_clear_can_keep_disk_entries(self, tmp_path):
+        disk = DiskCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+        cache = TTLCache("retrieval", disk=disk)
+        cache.set("key", [1])
+
+        cache.clear(include_disk=False)
+
+        assert cache.stats()["size"] == 0
+        assert TTLCache("retrieval", disk=disk).get("key") == [1]
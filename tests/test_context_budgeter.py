@@ -0,0 +1,168 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+from src.context_budgeter import (
+    GAP_SEPARATOR,
+    ContextBudgeter,
+    collapse_by_parent,
+    merge_overlap,
+    mmr_order,
+)
+from src.telemetry import estimate_tokens
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+NARRATIVE = (
+    "I was charged a late fee on my credit card even though my payment was sent "
+    "on time. The bank refused to refund the fee and closed my account."
+)
+# Consecutive chunks sharing 30 characters, as the splitter's overlap produces
+FIRST, SECOND = NARRATIVE[:90], NARRATIVE[60:]
+
+
+def doc(text, parent):
+    return Document(page_content=text, metadata={"id": parent})
+
+
+class TestCollapse:
+    def test_merge_overlap(self):
+        assert merge_overlap(FIRST, SECOND) == NARRATIVE
+        assert merge_overlap(SECOND, FIRST) is None
+        assert merge_overlap(NARRATIVE, FIRST) == NARRATIVE
+        assert merge_overlap("late fee", "fee refund") is None
+
+    def test_chunks_of_one_complaint_become_one_passage(self):
+        passages = collapse_by_parent(
+            [doc(SECOND, "1"), doc("other complaint", "2"), doc(FIRST, "1")]
+        )
+
+        assert [p.text for p in passages] == [NARRATIVE, "other complaint"]
+        assert passages[0].members == [0, 2]
+
+    def test_distant_chunks_are_separated(self):
+        (passage,) = collapse_by_parent(
+            [doc("the start of the story", "1"), doc("the end of it", "1")]
+        )
+        assert passage.text == f"the start of the story{GAP_SEPARATOR}the end of it"
+
+
+class TestMMR:
+    def test_prefers_diverse_candidate(self):
+        vectors = np.asarray([[1, 0], [1, 0], [0, 1]], dtype=np.float32)
+        relevance = np.asarray([1.0, 0.99, 0.8])
+
+        assert mmr_order(relevance, vectors, 0.5) == [0, 2, 1]
+        assert mmr_order(relevance, vectors, 1.0) == [0, 1, 2]
+        assert mmr_order(relevance, None, 0.5) == [0, 1, 2]
+
+
+class TestContextBudgeter:
+    def test_packs_within_budget(self):
+        documents = [doc("x" * 400, str(i)) for i in range(5)]
+        packed, report = ContextBudgeter(token_budget=250).assemble(
+            documents, None, k=5
+        )
+
+        assert len(packed) == 2
+        assert report["context_tokens"] == 200
+        assert report["context_tokens_saved"] == 300
+
+    def test_oversized_first_passage_is_truncated(self):
+        packed, report = ContextBudgeter(token_budget=10).assemble(
+            [doc("y" * 400, "1")], None, k=5
+        )
+        assert len(packed[0].page_content) == 40
+        assert report["context_tokens"] == 10
+
+    def test_overlap_is_reported_as_saved(self):
+        documents = [doc(FIRST, "1"), doc(SECOND, "1")]
+        packed, report = ContextBudgeter().assemble(
+            documents, np.ones((2, 4), dtype=np.float32), k=2
+        )
+
+        assert [d.page_content for d in packed] == [NARRATIVE]
+        assert packed[0].metadata == {"id": "1", "chunks": 2}
+        assert report["context_tokens_saved"] > 0
+
+    @pytest.mark.parametrize("token_budget", [None, 10_000])
+    def test_never_exceeds_top_k_tokens(self, token_budget):
+        # 5 complaints x 2 overlapping chunks, twice the k=5 chunks requested
+        documents = []
+        for i in range(5):
+            narrative = f"complaint {i}: {NARRATIVE}"
+            documents += [doc(narrative[:100], str(i)), doc(narrative[70:], str(i))]
+        budgeter = (
+            ContextBudgeter() if token_budget is None else ContextBudgeter(token_budget)
+        )
+
+        packed, report = budgeter.assemble(
+            documents, np.ones((10, 4), dtype=np.float32), k=5
+        )
+
+        top_k_tokens = sum(estimate_tokens(d.page_content) for d in documents[:5])
+        assert report["context_tokens_before"] == top_k_tokens
+        assert report["context_tokens"] <= top_k_tokens
+        assert report["context_tokens_saved"] >= 0
+        assert sum(estimate_tokens(d.page_content) for d in packed) <= top_k_tokens
+
+
+@pytest.fixture
+def rag(make_rag):
+    texts = [FIRST, SECOND, "money transfer never arrived", "card closed"]
+    return make_rag(texts, ids=["1", "1", "2", "3"])
+
+
+class TestRAGContext:
+    def test_search_returns_collapsed_passages(self, rag):
+        from src.telemetry import Trace, activate
+
+        trace = Trace()
+        with activate(trace):
+            documents = rag.search_vector_db("late fee", k=4)
+
+        contents = [d.page_content for d in documents]
+        assert len(documents) == 3
+        assert NARRATIVE in contents
+        assert trace.counters["context_tokens_saved"] > 0
+        assert "context" in trace.stage_ms()
+
+    def test_disabled_budgeter_returns_chunks(self, rag):
+        rag.init_context(None)
+        assert len(rag.search_vector_db("late fee", k=4)) == 4
+
+    def test_offset_layout_passage_expands_to_full_complaint(self, rag):
+        from src.metadata_store import MetadataStore
+
+        others = ["money transfer never arrived", "card closed"]
+        complaints = pd.DataFrame(
+            {
+                "Complaint ID": [1, 2, 3],
+                "Consumer complaint narrative": [NARRATIVE, *others],
+            }
+        )
+        rag.metadata_store = MetadataStore.from_offsets(
+            [0, 0, 1, 2],
+            [0, 60, 0, 0],
+            [90, len(NARRATIVE), len(others[0]), len(others[1])],
+            complaints,
+        )
+
+        documents = rag.search_vector_db("late fee", k=4)
+        passage = next(d for d in documents if d.metadata["id"] == "1")
+        chunk = rag.metadata_store.get_documents([1])[0]
+
+        assert passage.page_content == NARRATIVE
+        assert (passage.metadata["start"], passage.metadata["end"]) == (
+            0,
+            len(NARRATIVE),
+        )
+        assert rag.full_complaint(passage) == NARRATIVE
+        assert rag.expand_document(chunk, 10).page_content == NARRATIVE[50:]
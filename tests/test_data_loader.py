@@ -4,10 +4,13 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
+import glob
 import pytest
 import pandas as pd
+import pyarrow.parquet as pq
 from unittest.mock import patch, MagicMock
 from src.data.loader import DataLoader
+from src.synthetic_corpus import generate_complaints
 
 
 @pytest.fixture
@@ -56,12 +59,130 @@ class TestDataLoader:
         with pytest.raises(ValueError, match="Dataframe is empty"):
             loader.load_from_csv()
 
-    @patch("src.data.loader.pd.read_csv")
-    def test_load_stratified_sample(self, mock_read_csv, loader, sample_df):
+    def test_load_stratified_sample(self, loader, tmp_path):
+        loader.cleaned_complaints_dataset_path = str(tmp_path / "clean")
+        loader.save_to_parquet(generate_complaints(40))
+
+        result = loader.load_stratified_sample(
+            sample_size=0.2, stratify_col="Product", columns=["Complaint ID"]
+        )
+
+        assert len(result) == 8
+        assert list(result.columns) == ["Complaint ID", "Product"]
+
+    def test_stream_from_csv_filters_chunks(self, loader, tmp_path):
+        raw_df = pd.DataFrame(
+            {
+                "Complaint ID": [1, 2, 3, 4, 5, 6],
+                "Product": [
+                    "Credit card",
+                    "Mortgage",
+                    "Credit card",
+                    "Money transfers",
+                    "Credit card",
+                    "Debt collection",
+                ],
+                "Issue": ["Fees", "Escrow", "Fees", "Fraud", "APR", "Calls"],
+                "Company": ["X", "Y", "X", "Z", "X", "Y"],
+                "State": ["CA", "NY", "CA", "TX", "WA", "NY"],
+                "Consumer complaint narrative": [
+                    "late fee",
+                    "escrow",
+                    None,
+                    "wire never arrived",
+                    "   ",
+                    "calls",
+                ],
+                "Tags": ["Older American"] * 6,
+            }
+        )
+        file_path = tmp_path / "complaints.csv"
+        raw_df.to_csv(file_path, index=False)
+        loader.raw_complaints_file_path = str(file_path)
+        loader.chunk_size = 2
+
+        chunks = list(loader.stream_from_csv())
+
+        result = pd.concat(chunks)
+        assert result["Complaint ID"].tolist() == [1, 4]
+        assert "Tags" not in result.columns
+        assert all(chunk["Product"].dtype == "category" for chunk in chunks)
+        assert all(len(chunk) <= 2 for chunk in chunks)
 
-        mock_read_csv.return_value = sample_df
+    @patch("src.data.loader.Path.exists")
+    def test_stream_from_csv_file_not_found(self, mock_exists, loader):
+        mock_exists.return_value = False
+
+        with pytest.raises(FileNotFoundError):
+            next(loader.stream_from_csv())
 
-        result = loader.load_stratified_sample(sample_size=0.2, stratify_col="Product")
 
-        assert len(result) > 1
-        assert "Product" in result.columns
+class TestParquetDataset:
+    @pytest.fixture
+    def loader(self, tmp_path):
+        loader = DataLoader()
+        loader.cleaned_complaints_dataset_path = str(tmp_path / "clean")
+        return loader
+
+    @pytest.fixture
+    def df(self):
+        df = generate_complaints(500)
+        # As saved by the EDA notebook, with the index column
+        return df.reset_index().rename(columns={"index": "Unnamed: 0"})
+
+    def test_partitioned_by_product_and_year(self, loader, df):
+        loader.save_to_parquet(df)
+
+        files = glob.glob(
+            f"{loader.cleaned_complaints_dataset_path}/**/*.parquet", recursive=True
+        )
+        partitions = {tuple(path.split(os.sep)[-3:-1]) for path in files}
+        assert ("Product=Credit%20card", "Received year=2021") in partitions
+        assert len(partitions) == df["Product"].nunique() * 5
+
+        statistics = pq.ParquetFile(files[0]).metadata.row_group(0).column(0).statistics
+        assert statistics.has_min_max
+
+    def test_round_trip_is_typed(self, loader, df):
+        loader.save_to_parquet(df)
+
+        result = loader.load_from_parquet()
+
+        assert len(result) == len(df)
+        assert "Unnamed: 0" not in result.columns
+        assert result["Product"].dtype == "category"
+        assert result["Company"].dtype == "category"
+        assert result["Date received"].dtype == "datetime64[ns]"
+        assert result["Complaint ID"].dtype == "Int64"
+        assert set(result["Complaint ID"]) == set(df["Complaint ID"])
+
+    def test_projection_and_pushdown(self, loader, df):
+        loader.save_to_parquet(df)
+        expected = df[
+            (df["Product"] == "Money transfers")
+            & (pd.to_datetime(df["Date received"]) >= "2023-01-01")
+        ]
+
+        result = loader.load_from_parquet(
+            columns=["Complaint ID", "Date received"],
+            filters=[
+                ("Product", "=", "Money transfers"),
+                ("Received year", ">=", 2023),
+            ],
+        )
+
+        assert list(result.columns) == ["Complaint ID", "Date received"]
+        assert sorted(result["Complaint ID"]) == sorted(expected["Complaint ID"])
+
+    def test_stream_from_parquet(self, loader, df):
+        loader.save_to_parquet(df)
+        loader.chunk_size = 64
+
+        chunks = list(loader.stream_from_parquet(columns=["Complaint ID"]))
+
+        assert sum(len(chunk) for chunk in chunks) == len(df)
+        assert all(len(chunk) <= 64 for chunk in chunks)
+
+    def test_missing_dataset(self, loader):
+        with pytest.raises(FileNotFoundError):
+            loader.load_from_parquet()
@@ -0,0 +1,206 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+from src.embedding_engine import EmbeddingCache, EmbeddingEngine
+from src.vector_manager import VectorManager
+
+DIM = 4
+
+
+def fake_encode(model_name, texts, batch_size):
+    """Deterministic stand-in for the sentence-transformers encoder."""
+    return np.array(
+        [[len(text), text.count("e"), ord(text[0]), 1.0] for text in texts],
+        dtype=np.float32,
+    )
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, model_name, texts, batch_size):
+        self.batches.append(list(texts))
+        return fake_encode(model_name, texts, batch_size)
+
+
+TEXTS = ["a long narrative here", "short", "medium text", "short", "tiny"]
+
+
+class TestEmbeddingEngine:
+    def test_vectors_follow_input_order(self):
+        engine = EmbeddingEngine(encode_fn=fake_encode, batch_size=2)
+
+        vectors = engine.embed(TEXTS)
+
+        np.testing.assert_array_equal(vectors, fake_encode(None, TEXTS, 2))
+
+    def test_duplicates_encoded_once_and_batches_sorted_by_length(self):
+        encoder = RecordingEncoder()
+        engine = EmbeddingEngine(encode_fn=encoder, batch_size=2)
+
+        engine.embed(TEXTS)
+
+        assert encoder.batches == [
+            ["tiny", "short"],
+            ["medium text", "a long narrative here"],
+        ]
+        assert engine.last_report["unique"] == 4
+        assert engine.last_report["encoded"] == 4
+
+    def test_disk_cache_skips_seen_texts(self, tmp_path):
+        path = str(tmp_path / "embeddings.db")
+        EmbeddingEngine(encode_fn=fake_encode, cache_path=path).embed(TEXTS)
+
+        encoder = RecordingEncoder()
+        engine = EmbeddingEngine(encode_fn=encoder, cache_path=path)
+        vectors = engine.embed(TEXTS + ["new text"])
+
+        assert encoder.batches == [["new text"]]
+        assert engine.last_report["cache_hits"] == 4
+        np.testing.assert_array_equal(vectors[:5], fake_encode(None, TEXTS, 1))
+
+    def test_cache_is_keyed_by_model(self, tmp_path):
+        path = str(tmp_path / "embeddings.db")
+        EmbeddingEngine("model-a", encode_fn=fake_encode, cache_path=path).embed(TEXTS)
+
+        encoder = RecordingEncoder()
+        EmbeddingEngine("model-b", encode_fn=encoder, cache_path=path).embed(TEXTS)
+
+        assert sum(len(batch) for batch in encoder.batches) == 4
+
+    def test_worker_pool_matches_single_process(self):
+        texts = [f"complaint {i} " + "e" * (i % 7) for i in range(50)]
+        single = EmbeddingEngine(encode_fn=fake_encode, batch_size=8).embed(texts)
+        pooled = EmbeddingEngine(encode_fn=fake_encode, batch_size=8, n_workers=2)
+
+        np.testing.assert_array_equal(pooled.embed(texts), single)
+
+    def test_empty_input_keeps_dimension(self):
+        engine = EmbeddingEngine(encode_fn=fake_encode)
+
+        assert engine.embed([]).shape == (0, DIM)
+        assert np.concatenate([engine.embed([]), engine.embed(TEXTS)]).shape == (5, DIM)
+
+    def test_summary_only_for_large_calls(self, capsys):
+        EmbeddingEngine(encode_fn=fake_encode, report_every=10).embed(TEXTS)
+        assert capsys.readouterr().out == ""
+
+        EmbeddingEngine(encode_fn=fake_encode, report_every=5).embed(TEXTS)
+        assert "Embedded 5 chunks" in capsys.readouterr().out
+
+    def test_langchain_interface(self):
+        engine = EmbeddingEngine(encode_fn=fake_encode)
+
+        assert engine.embed_query("short") == [5.0, 0.0, 115.0, 1.0]
+        assert len(engine.embed_documents(TEXTS)) == 5
+
+
+class TestEmbeddingCache:
+    def test_round_trip(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.db"))
+        cache.put_many({"a": np.ones(DIM), "b": np.zeros(DIM)})
+
+        found = cache.get_many(["a", "c"])
+
+        assert list(found) == ["a"]
+        np.testing.assert_array_equal(found["a"], np.ones(DIM, dtype=np.float32))
+        assert len(cache) == 2
+
+
+class TestVectorManager:
+    def test_create_and_save(self, tmp_path):
+        pytest.importorskip("faiss")
+        pytest.importorskip("langchain_core")
+        from langchain_core.documents import Document
+        from src.index_builder import read_index
+        from src.metadata_store import MetadataStore
+
+        manager = VectorManager(cache_path=None)
+        manager.engine.encode_fn = fake_encode
+        documents = [
+            Document(page_content=text, metadata={"id": str(i)})
+            for i, text in enumerate(TEXTS)
+        ]
+
+        manager.create_vector_store(documents)
+        manager.save_vector_store(str(tmp_path))
+
+        index, _ = read_index(str(tmp_path), mmap=False)
+        assert index.ntotal == 5
+        assert len(MetadataStore.open(str(tmp_path))) == 5
+
+    def test_create_from_frame(self, tmp_path):
+        pytest.importorskip("faiss")
+        pytest.importorskip("langchain_text_splitters")
+        import pandas as pd
+        from src.metadata_store import MetadataStore
+        from src.text_processor import TextProcessor
+
+        df = pd.DataFrame(
+            {
+                "Complaint ID": [1, 2, 3],
+                "Product": ["Credit card"] * 3,
+                "Consumer complaint narrative": TEXTS[:3],
+            }
+        )
+        manager = VectorManager(cache_path=None)
+        manager.engine.encode_fn = fake_encode
+
+        manager.create_vector_store_from_frame(
+            df, TextProcessor(chunk_size=10, chunk_overlap=2)
+        )
+        manager.save_vector_store(str(tmp_path))
+
+        store = MetadataStore.open(str(tmp_path))
+        assert manager.index.ntotal == len(store) > 3
+        assert set(store.column("id").to_pylist()) == {"1", "2", "3"}
+
+    def test_create_from_frame_in_several_batches(self, tmp_path):
+        pytest.importorskip("faiss")
+        pytest.importorskip("langchain_text_splitters")
+        from functools import partial
+        import pandas as pd
+        from src.metadata_store import MetadataStore
+        from src.text_processor import TextProcessor
+
+        df = pd.DataFrame(
+            {
+                "Complaint ID": [1, 2, 3, 4],
+                "Product": ["Credit card", "Money transfers", "Mortgage", "Checking"],
+                "Company": ["Bank A", "Bank B", "Bank C", "Bank D"],
+                "Consumer complaint narrative": TEXTS[:4],
+            }
+        )
+        text_processor = TextProcessor(chunk_size=10, chunk_overlap=2)
+        # Several embed batches, each with its own metadata values
+        text_processor.iter_chunk_batches = partial(
+            text_processor.iter_chunk_batches, batch_size=2
+        )
+        manager = VectorManager(cache_path=None)
+        manager.engine.encode_fn = fake_encode
+
+        manager.create_vector_store_from_frame(df, text_processor)
+        manager.save_vector_store(str(tmp_path))
+
+        store = MetadataStore.open(str(tmp_path))
+        assert manager.index.ntotal == len(store) > 4
+        assert set(store.column("product").to_pylist()) == set(df["Product"])
+
+    def test_create_from_empty_frame(self):
+        pytest.importorskip("langchain_text_splitters")
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {"Complaint ID": [], "Product": [], "Consumer complaint narrative": []}
+        )
+        manager = VectorManager(cache_path=None)
+        manager.engine.encode_fn = fake_encode
+
+        with pytest.raises(ValueError, match="No complaint narratives"):
+            manager.create_vector_store_from_frame(df)
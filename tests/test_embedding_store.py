@@ -0,0 +1,103 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.embedding_store import (
+    embedding_matrix,
+    load_embedding_matrix,
+    load_embeddings,
+    quantize_int8,
+    save_embeddings,
+)
+
+DIM = 16
+
+
+@pytest.fixture
+def embeddings_df():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return pd.DataFrame(
+        {
+            "id": [f"c{i}" for i in range(50)],
+            "document": [f"complaint text {i}" for i in range(50)],
+            "embedding": [list(vector) for vector in vectors],
+        }
+    )
+
+
+class TestEmbeddingStore:
+    @pytest.mark.parametrize(
+        "dtype, arrow_type, tolerance",
+        [
+            ("float32", pa.float32(), 0),
+            ("float16", pa.float16(), 1e-3),
+            ("int8", pa.int8(), 1e-2),
+        ],
+    )
+    def test_round_trip(self, dtype, arrow_type, tolerance, embeddings_df, tmp_path):
+        path = str(tmp_path / "embeddings.parquet")
+        save_embeddings(embeddings_df, path, dtype)
+
+        schema = pq.read_schema(path)
+        assert pa.types.is_fixed_size_list(schema.field("embedding").type)
+        assert schema.field("embedding").type.value_type == arrow_type
+
+        df, matrix = load_embeddings(path)
+        expected = np.stack(embeddings_df["embedding"])
+        assert list(df.columns) == ["id", "document"]
+        assert matrix.shape == (50, DIM)
+        np.testing.assert_allclose(matrix, expected, atol=tolerance)
+
+    def test_compact_file_is_smaller(self, embeddings_df, tmp_path):
+        sizes = {}
+        for dtype in ("float32", "float16", "int8"):
+            path = str(tmp_path / f"{dtype}.parquet")
+            save_embeddings(embeddings_df[["embedding"]], path, dtype)
+            sizes[dtype] = os.path.getsize(path)
+
+        assert sizes["int8"] < sizes["float16"] < sizes["float32"]
+
+    def test_float16_matrix_is_a_view_of_arrow_memory(self, embeddings_df, tmp_path):
+        path = str(tmp_path / "embeddings.parquet")
+        save_embeddings(embeddings_df, path, "float16")
+
+        matrix = load_embedding_matrix(path)
+
+        assert matrix.dtype == np.float16
+        assert not matrix.flags["WRITEABLE"]
+        assert not matrix.flags["OWNDATA"]
+
+    def test_reads_list_columns(self, embeddings_df, tmp_path):
+        path = str(tmp_path / "embeddings.parquet")
+        embeddings_df.to_parquet(path)
+
+        df, matrix = load_embeddings(path)
+
+        assert "embedding" not in df.columns
+        np.testing.assert_allclose(
+            matrix, np.stack(embeddings_df["embedding"]), rtol=1e-6
+        )
+
+    def test_ragged_embeddings(self):
+        with pytest.raises(ValueError, match="differ in length"):
+            embedding_matrix(pa.array([[1.0, 2.0], [3.0]]))
+
+    def test_int8_needs_scales(self):
+        codes, _ = quantize_int8(np.ones((2, 4), np.float32))
+        column = pa.FixedSizeListArray.from_arrays(pa.array(codes.ravel()), 4)
+        with pytest.raises(ValueError, match="embedding_scale"):
+            embedding_matrix(column)
+
+    def test_quantize_int8_zero_vector(self):
+        codes, scales = quantize_int8(np.zeros((1, 4), np.float32))
+        assert (codes == 0).all()
+        assert scales[0] == 1
@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import subprocess
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Generous enough for a cold CI runner; pandas alone accounts for most of it
+IMPORT_BUDGET_SECONDS = 3.0
+
+HEAVY_MODULES = [
+    "nltk",
+    "sklearn",
+    "langchain_core",
+    "langchain_community",
+    "langchain_huggingface",
+    "faiss",
+    "torch",
+    "sentence_transformers",
+]
+
+
+def import_in_fresh_interpreter(module: str) -> dict:
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime:
+    def test_data_loader_import_within_budget(self):
+        result = import_in_fresh_interpreter("src.data.loader")
+
+        assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+    @pytest.mark.parametrize(
+        "module",
+        [
+            "src.data.loader",
+            "scripts.utils",
+            "src.rag_system",
+            "src.vector_manager",
+            "src.text_processor",
+        ],
+    )
+    def test_import_does_not_load_heavy_backends(self, module):
+        result = import_in_fresh_interpreter(module)
+
+        assert result["heavy"] == []
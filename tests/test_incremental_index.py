@@ -0,0 +1,298 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import zlib
+import pytest
+import numpy as np
+import pandas as pd
+from src.incremental_index import (
+    IncrementalIndexer,
+    compact,
+    content_hashes,
+    load_tombstones,
+    read_manifest,
+    reset_incremental_state,
+)
+from src.index_builder import (
+    IndexConfig,
+    build_index,
+    load_rerank_vectors,
+    read_index,
+    write_index,
+)
+from src.metadata_store import MetadataStore
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("langchain_text_splitters")
+
+from src.text_processor import TextProcessor
+
+DIM = 8
+
+
+def fake_embed(texts):
+    return [
+        np.random.default_rng(zlib.crc32(text.encode())).random(DIM).tolist()
+        for text in texts
+    ]
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return fake_embed(texts)
+
+
+def complaints(n=10, edits=None):
+    narratives = [f"complaint number {i} about a late fee" for i in range(n)]
+    for i, text in (edits or {}).items():
+        narratives[i] = text
+    return pd.DataFrame(
+        {
+            "Complaint ID": list(range(100, 100 + n)),
+            "Product": ["Credit card"] * n,
+            "Consumer complaint narrative": narratives,
+        }
+    )
+
+
+def build_folder(folder, df, config=None):
+    docs = TextProcessor().split_documents(df)
+    vectors = pd.Series(fake_embed([doc.page_content for doc in docs]))
+    index = build_index(vectors, config)
+    write_index(index, folder, config or IndexConfig(), vectors)
+    MetadataStore.from_documents(docs).write(folder)
+    reset_incremental_state(folder, index.ntotal)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = str(tmp_path / "store")
+    build_folder(folder, complaints())
+    # Record hashes so later updates diff against this feed
+    IncrementalIndexer(folder, fake_embed).update(complaints())
+    return folder
+
+
+def store_ids(folder):
+    return MetadataStore.open(folder).column("id").to_pylist()
+
+
+class TestIncrementalIndexer:
+    def test_bootstrap_reembeds_once_and_compacts(self, tmp_path):
+        folder = str(tmp_path / "store")
+        build_folder(folder, complaints())
+
+        report = IncrementalIndexer(folder, fake_embed).update(complaints())
+
+        assert report["changed"] == 10
+        assert report["compacted"]
+        assert sorted(store_ids(folder)) == [str(i) for i in range(100, 110)]
+        assert len(load_tombstones(folder)) == 0
+
+    def test_unchanged_feed_embeds_nothing(self, folder):
+        embedder = CountingEmbedder()
+        version = read_manifest(folder)["version"]
+
+        report = IncrementalIndexer(folder, embedder).update(complaints())
+
+        assert embedder.texts == []
+        assert (report["added"], report["changed"], report["deleted"]) == (0, 0, 0)
+        assert read_manifest(folder)["version"] == version + 1
+
+    def test_changes_are_embedded_and_stale_rows_tombstoned(self, folder):
+        embedder = CountingEmbedder()
+        feed = complaints(edits={3: "edited complaint about a closed card"})
+        feed = pd.concat([feed.drop(index=5), complaints(11).iloc[[10]]])
+
+        report = IncrementalIndexer(folder, embedder, compact_ratio=1.0).update(
+            [feed.iloc[:5], feed.iloc[5:]]
+        )
+
+        assert (report["added"], report["changed"], report["deleted"]) == (1, 1, 1)
+        assert embedder.texts == [
+            "edited complaint about a closed card",
+            "complaint number 10 about a late fee",
+        ]
+        ids = store_ids(folder)
+        tombstoned = {ids[row] for row in load_tombstones(folder)}
+        assert tombstoned == {"103", "105"}
+        assert ids[-2:] == ["103", "110"]
+        assert read_manifest(folder)["tombstones"] == 2
+
+    def test_compaction_drops_tombstoned_rows(self, folder):
+        IncrementalIndexer(folder, fake_embed, compact_ratio=1.0).update(
+            complaints(), deleted_ids=[104]
+        )
+        report = IncrementalIndexer(folder, fake_embed).update(
+            complaints().drop(index=4), force_compact=True
+        )
+
+        index, _ = read_index(folder, mmap=False)
+        ids = store_ids(folder)
+        assert report["compacted"]
+        assert "104" not in ids
+        assert index.ntotal == len(ids) == 9
+        assert len(load_tombstones(folder)) == 0
+
+        query = np.asarray(fake_embed(["complaint number 7 about a late fee"]))
+        _, hits = index.search(query.astype(np.float32), 1)
+        assert ids[hits[0][0]] == "107"
+
+    def test_rerank_vectors_follow_updates(self, tmp_path):
+        folder = str(tmp_path / "store")
+        build_folder(
+            folder, complaints(), IndexConfig(vector_dtype="int8", rerank_factor=2)
+        )
+        indexer = IncrementalIndexer(folder, fake_embed, compact_ratio=1.0)
+        indexer.update(complaints())
+
+        indexer.update(complaints(11, edits={2: "edited complaint"}))
+        index, _ = read_index(folder, mmap=False)
+        stored = load_rerank_vectors(folder, index.ntotal)
+        texts = MetadataStore.open(folder).texts(range(index.ntotal))
+        np.testing.assert_allclose(stored, fake_embed(texts), rtol=1e-6)
+
+        indexer.update(complaints(11).drop(index=6), force_compact=True)
+        index, _ = read_index(folder, mmap=False)
+        stored = load_rerank_vectors(folder, index.ntotal)
+        texts = MetadataStore.open(folder).texts(range(index.ntotal))
+        assert index.ntotal == 10
+        np.testing.assert_allclose(stored, fake_embed(texts), rtol=1e-6)
+
+    def test_delta_feed_keeps_missing_complaints(self, folder):
+        report = IncrementalIndexer(folder, fake_embed).update(
+            complaints().iloc[:2], snapshot=False
+        )
+
+        assert report["deleted"] == 0
+        assert len(load_tombstones(folder)) == 0
+
+    def test_offset_layout_store_stays_offset_layout(self, tmp_path):
+        folder = str(tmp_path / "store")
+        df = complaints()
+        batch = TextProcessor().chunk_texts(df["Consumer complaint narrative"])
+        index = build_index(pd.Series(fake_embed(batch.texts)))
+        write_index(index, folder, IndexConfig())
+        MetadataStore.from_offsets(
+            batch.parent_rows, batch.starts, batch.ends, df
+        ).write(folder)
+        reset_incremental_state(folder, index.ntotal)
+        indexer = IncrementalIndexer(folder, fake_embed, compact_ratio=1.0)
+        indexer.update(df)
+
+        indexer.update(complaints(edits={3: "edited complaint about a closed card"}))
+
+        store = MetadataStore.open(folder)
+        assert store.has_offsets
+        assert store.texts([len(store) - 1]) == ["edited complaint about a closed card"]
+
+    def test_interrupted_update_is_detected(self, folder):
+        MetadataStore.open(folder).take([0, 1]).write(folder)
+
+        with pytest.raises(RuntimeError):
+            IncrementalIndexer(folder, fake_embed).update(complaints())
+
+    def test_new_metadata_values_are_appended(self, tmp_path):
+        def with_metadata(df):
+            return df.assign(Company="Bank A", State="CA")
+
+        folder = str(tmp_path / "store")
+        build_folder(folder, with_metadata(complaints()))
+        indexer = IncrementalIndexer(folder, fake_embed)
+        indexer.update(with_metadata(complaints()))
+
+        feed = with_metadata(complaints(12))
+        feed.loc[10:, ["Product", "Company", "State"]] = [
+            "Savings account",
+            "Bank B",
+            "NY",
+        ]
+        report = indexer.update(feed)
+
+        store = MetadataStore.open(folder)
+        index, _ = read_index(folder, mmap=False)
+        assert report["added"] == 2
+        assert index.ntotal == len(store) == read_manifest(folder)["rows"]
+        assert store.column("product").to_pylist()[-2:] == ["Savings account"] * 2
+        assert set(store.column("state").to_pylist()) == {"CA", "NY"}
+
+    def test_crash_after_index_write_is_refused(self, folder, monkeypatch):
+        def crash(store, folder_path):
+            raise OSError("disk full")
+
+        with monkeypatch.context() as patched:
+            patched.setattr(MetadataStore, "write", crash)
+            with pytest.raises(OSError):
+                IncrementalIndexer(folder, fake_embed).update(complaints(11))
+
+        index, _ = read_index(folder, mmap=False)
+        assert index.ntotal > len(MetadataStore.open(folder))
+        with pytest.raises(RuntimeError, match="index rows"):
+            IncrementalIndexer(folder, fake_embed).update(complaints(12))
+
+    def test_repeated_complaint_keeps_last_version(self, folder):
+        embedder = CountingEmbedder()
+        first = complaints(11, edits={3: "first edit"}).iloc[[3, 10]]
+        second = complaints(11, edits={3: "second edit"}).iloc[[3, 10]]
+
+        report = IncrementalIndexer(folder, embedder, compact_ratio=1.0).update(
+            [first, second], snapshot=False
+        )
+
+        store = MetadataStore.open(folder)
+        tombstones = set(load_tombstones(folder))
+        live = [row for row in range(len(store)) if row not in tombstones]
+        ids = store.column("id").to_pylist()
+        assert (report["added"], report["changed"]) == (1, 1)
+        assert embedder.texts[-1] == "second edit"
+        assert sorted(ids[row] for row in live).count("103") == 1
+        assert store.texts([row for row in live if ids[row] == "103"]) == [
+            "second edit"
+        ]
+
+
+class TestContentHashes:
+    def test_same_for_csv_and_parquet(self, tmp_path):
+        df = complaints().assign(
+            **{"Date received": "2023-05-01", "State": [None, "CA"] * 5}
+        )
+        csv_path, parquet_path = tmp_path / "feed.csv", tmp_path / "feed.parquet"
+        df.to_csv(csv_path, index=False)
+        df.assign(**{"Date received": pd.to_datetime(df["Date received"])}).to_parquet(
+            parquet_path, index=False
+        )
+
+        from_csv = content_hashes(pd.read_csv(csv_path))
+        from_parquet = content_hashes(pd.read_parquet(parquet_path))
+
+        np.testing.assert_array_equal(from_csv, from_parquet)
+
+
+class TestCompact:
+    @pytest.mark.parametrize(
+        "config",
+        [
+            IndexConfig(),
+            IndexConfig(index_type="hnsw", hnsw_m=8),
+            IndexConfig(index_type="ivf_flat", nlist=4, nprobe=4),
+        ],
+    )
+    def test_keeps_live_vectors(self, config):
+        vectors = np.random.default_rng(0).random((200, DIM), dtype=np.float32)
+        index = build_index(pd.Series(list(vectors)), config)
+        store = MetadataStore.from_columns(
+            [f"chunk {i}" for i in range(200)], {"id": [str(i) for i in range(200)]}
+        )
+
+        compacted, store = compact(index, store, np.arange(0, 200, 2), config)
+
+        assert compacted.ntotal == len(store) == 100
+        _, hits = compacted.search(vectors[[51]], 1)
+        assert store.column("id")[int(hits[0][0])].as_py() == "51"
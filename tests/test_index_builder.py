@@ -0,0 +1,147 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+from src.index_builder import (
+    IndexConfig,
+    build_index,
+    embeddings_to_matrix,
+    evaluate_index,
+    load_rerank_vectors,
+    read_index,
+    rerank,
+    write_index,
+)
+
+
+@pytest.fixture
+def embeddings_df():
+    rng = np.random.default_rng(0)
+    vectors = rng.random((10, 8))
+    return pd.DataFrame(
+        {
+            "id": [f"c{i}" for i in range(10)],
+            "document": [f"complaint text {i}" for i in range(10)],
+            "embedding": [list(vector) for vector in vectors],
+        }
+    )
+
+
+class TestIndexBuilder:
+    def test_embeddings_to_matrix_is_contiguous_float32(self, embeddings_df):
+        matrix = embeddings_to_matrix(embeddings_df["embedding"], batch_size=3)
+
+        assert matrix.shape == (10, 8)
+        assert matrix.dtype == np.float32
+        assert matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(matrix[4], embeddings_df["embedding"][4], rtol=1e-6)
+
+    def test_build_index_adds_all_batches(self, embeddings_df):
+        pytest.importorskip("faiss")
+        matrix = embeddings_to_matrix(embeddings_df["embedding"])
+
+        index = build_index(embeddings_df["embedding"], batch_size=4)
+        _, ids = index.search(matrix[[7]], 1)
+
+        assert index.ntotal == 10
+        assert ids[0][0] == 7
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            IndexConfig(index_type="ivf_flat", nlist=4, nprobe=4),
+            IndexConfig(index_type="ivf_pq", nlist=4, pq_m=4, pq_nbits=4, nprobe=4),
+            IndexConfig(index_type="hnsw", hnsw_m=8, ef_search=32),
+        ],
+    )
+    def test_build_write_and_mmap_read_index(self, config, tmp_path):
+        pytest.importorskip("faiss")
+        rng = np.random.default_rng(1)
+        embeddings = pd.Series(list(rng.random((400, 8), dtype=np.float32)))
+
+        index = build_index(embeddings, config)
+        write_index(index, str(tmp_path), config)
+        loaded, loaded_config = read_index(str(tmp_path), mmap=True)
+
+        assert loaded.ntotal == 400
+        assert loaded_config == config
+        assert evaluate_index(loaded, index, embeddings_to_matrix(embeddings[:20]), 3)[
+            "recall_at_k"
+        ] == pytest.approx(1.0)
+
+    def test_unknown_index_type(self):
+        with pytest.raises(ValueError, match="Unknown index type"):
+            IndexConfig(index_type="annoy").factory_string(1000)
+
+
+class TestScalarQuantization:
+    @pytest.mark.parametrize(
+        "index_type, dtype, factory",
+        [
+            ("flat", "float16", "SQfp16"),
+            ("flat", "int8", "SQ8"),
+            ("ivf_flat", "int8", "IVF10,SQ8"),
+            ("hnsw", "float16", "HNSW32,SQfp16"),
+        ],
+    )
+    def test_factory_string(self, index_type, dtype, factory):
+        config = IndexConfig(index_type=index_type, nlist=10, vector_dtype=dtype)
+        assert config.factory_string(1000) == factory
+
+    def test_pq_is_already_compressed(self):
+        with pytest.raises(ValueError):
+            IndexConfig(index_type="ivf_pq", vector_dtype="int8").factory_string(1000)
+
+    @pytest.mark.parametrize("dtype, bytes_per_dim", [("float16", 2), ("int8", 1)])
+    def test_quantized_index_is_smaller(self, dtype, bytes_per_dim):
+        faiss = pytest.importorskip("faiss")
+        vectors = np.random.default_rng(2).random((500, 16), dtype=np.float32)
+
+        index = build_index(vectors, IndexConfig(vector_dtype=dtype))
+        _, ids = index.search(vectors[:10], 1)
+
+        assert faiss.serialize_index(index).size < 500 * 16 * bytes_per_dim + 4096
+        assert (ids[:, 0] == np.arange(10)).mean() >= 0.9
+
+    def test_rerank_restores_exact_order(self, tmp_path):
+        pytest.importorskip("faiss")
+        rng = np.random.default_rng(3)
+        vectors = rng.random((2000, 16), dtype=np.float32)
+        queries = rng.random((50, 16), dtype=np.float32)
+        config = IndexConfig(vector_dtype="int8", rerank_factor=4)
+
+        index = build_index(vectors, config)
+        write_index(index, str(tmp_path), config, vectors)
+        stored = load_rerank_vectors(str(tmp_path), index.ntotal)
+        exact = build_index(vectors)
+
+        plain = evaluate_index(index, exact, queries, 5)
+        reranked = evaluate_index(index, exact, queries, 5, stored, 4)
+        assert reranked["recall_at_k"] == pytest.approx(1.0)
+        assert reranked["recall_at_k"] >= plain["recall_at_k"]
+
+        expected_distances, expected_ids = exact.search(queries, 5)
+        _, shortlist = index.search(queries, 20)
+        distances, ids = rerank(queries, shortlist, stored, 5)
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-4)
+
+    def test_rerank_vectors_are_memory_mapped_and_checked(self, tmp_path):
+        pytest.importorskip("faiss")
+        vectors = np.random.default_rng(4).random((100, 8), dtype=np.float32)
+        config = IndexConfig(rerank_factor=2)
+        write_index(build_index(vectors), str(tmp_path), config, vectors)
+
+        stored = load_rerank_vectors(str(tmp_path), 100)
+        assert isinstance(stored, np.memmap)
+        np.testing.assert_array_equal(stored, vectors)
+        # Vectors for another row count are stale
+        assert load_rerank_vectors(str(tmp_path), 101) is None
+
+        write_index(build_index(vectors), str(tmp_path), IndexConfig())
+        assert load_rerank_vectors(str(tmp_path), 100) is None
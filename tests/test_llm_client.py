@@ -0,0 +1,180 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import asyncio
+import json
+import threading
+import pytest
+from scripts.constants import LLM_API_URL, LLM_MAX_TOKENS, LLM_REPO_ID, LLM_TEMPERATURE
+from src.llm_client import AsyncLLMClient, ConcurrencyLimiter, LLMOverloadedError
+
+httpx = pytest.importorskip("httpx")
+
+
+async def hold(limiter, seconds):
+    async with limiter:
+        await asyncio.sleep(seconds)
+
+
+class TestConcurrencyLimiter:
+    def test_wait_policy_bounds_concurrency(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=2, policy="wait")
+            peak = 0
+
+            async def task():
+                nonlocal peak
+                async with limiter:
+                    peak = max(peak, limiter.active)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*(task() for _ in range(6)))
+            return peak, limiter.stats()
+
+        peak, stats = asyncio.run(run())
+        assert peak == 2
+        assert stats["completed"] == 6
+        assert stats["rejected"] == 0
+
+    def test_reject_policy_fails_fast(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=1, policy="reject")
+            busy = asyncio.create_task(hold(limiter, 0.05))
+            await asyncio.sleep(0)
+            with pytest.raises(LLMOverloadedError):
+                await hold(limiter, 0)
+            await busy
+            return limiter.stats()
+
+        assert asyncio.run(run())["rejected"] == 1
+
+    def test_timeout_policy_gives_up(self):
+        async def run():
+            limiter = ConcurrencyLimiter(
+                max_concurrency=1, policy="timeout", timeout=0.01
+            )
+            busy = asyncio.create_task(hold(limiter, 0.1))
+            await asyncio.sleep(0)
+            with pytest.raises(LLMOverloadedError):
+                await hold(limiter, 0)
+            await busy
+            return limiter.stats()
+
+        stats = asyncio.run(run())
+        assert stats["rejected"] == 1
+        assert stats["waiting"] == 0
+
+    def test_wait_policy_bounded_queue(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=1, max_waiting=1)
+            tasks = [asyncio.create_task(hold(limiter, 0.02)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(LLMOverloadedError):
+                await hold(limiter, 0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            ConcurrencyLimiter(policy="drop")
+
+
+def make_transport(requests):
+    def handler(request):
+        payload = json.loads(request.content)
+        requests.append(payload)
+        if payload["stream"]:
+            body = "".join(
+                f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n"
+                for t in ["Late ", "fees"]
+            )
+            return httpx.Response(200, text=body + "data: [DONE]\n\n")
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": "Late fees"}}]}
+        )
+
+    return httpx.MockTransport(handler)
+
+
+class TestAsyncLLMClient:
+    def test_achat(self):
+        requests = []
+        client = AsyncLLMClient(
+            "model", api_token="t", transport=make_transport(requests)
+        )
+
+        async def run():
+            answer = await client.achat("why?")
+            await client.aclose()
+            return answer
+
+        assert asyncio.run(run()) == "Late fees"
+        assert requests[0]["model"] == "model"
+        assert requests[0]["messages"] == [{"role": "user", "content": "why?"}]
+
+    def test_defaults_match_sync_endpoint(self):
+        client = AsyncLLMClient(LLM_REPO_ID)
+
+        assert client.api_url == LLM_API_URL
+        assert f"/hf-inference/models/{LLM_REPO_ID}/" in client.api_url
+        assert (client.temperature, client.max_tokens) == (
+            LLM_TEMPERATURE,
+            LLM_MAX_TOKENS,
+        )
+
+    def test_astream(self):
+        client = AsyncLLMClient("model", transport=make_transport([]))
+
+        async def run():
+            tokens = [token async for token in client.astream("why?")]
+            await client.aclose()
+            return tokens
+
+        assert asyncio.run(run()) == ["Late ", "fees"]
+        assert client.stats()["completed"] == 1
+
+    def test_reused_across_event_loops(self):
+        client = AsyncLLMClient("model", transport=make_transport([]))
+        assert asyncio.run(client.achat("a")) == "Late fees"
+        assert asyncio.run(client.achat("b")) == "Late fees"
+
+    def test_closes_pool_of_previous_running_loop(self):
+        client = AsyncLLMClient("model", transport=make_transport([]))
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(client.achat("a"), loop).result()
+            first = client._client
+
+            assert asyncio.run(client.achat("b")) == "Late fees"
+            # The close was scheduled on the loop that owns the pool
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()
+            assert first.is_closed
+            assert not client._client.is_closed
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def test_closes_pool_of_previous_stopped_loop(self):
+        client = AsyncLLMClient("model", transport=make_transport([]))
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(client.achat("a"))
+            first = client._client
+
+            assert asyncio.run(client.achat("b")) == "Late fees"
+            assert first.is_closed
+        finally:
+            loop.close()
+
+    def test_error_status_raises(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(503))
+        client = AsyncLLMClient("model", transport=transport)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(client.achat("why?"))
@@ -0,0 +1,191 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+from scripts.constants import METADATA_STORE_FILE_NAME, NARRATIVE_STORE_FILE_NAME
+from src.metadata_store import MetadataStore
+
+pytest.importorskip("langchain_core")
+
+
+@pytest.fixture
+def embeddings_df():
+    return pd.DataFrame(
+        {
+            "id": ["101_0", "101_1", "102_0"],
+            "document": ["late fee charged", "fee was not refunded", "wire lost"],
+            "embedding": [[0.1, 0.2]] * 3,
+            "metadata": [
+                {
+                    "product": "Credit card",
+                    "Issue": "Fees",
+                    "company": "Bank A",
+                    "date_received": "2023-05-01",
+                },
+                {"product": "Credit card", "Issue": "Fees", "company": "Bank A"},
+                None,
+            ],
+        }
+    )
+
+
+class TestMetadataStore:
+    def test_write_and_open_round_trip(self, embeddings_df, tmp_path):
+        MetadataStore.from_frame(embeddings_df).write(str(tmp_path))
+
+        store = MetadataStore.open(str(tmp_path))
+        docs = store.get_documents([2, 0])
+
+        assert len(store) == 3
+        assert docs[0].page_content == "wire lost"
+        assert docs[0].metadata == {"id": "102_0"}
+        assert docs[1].metadata == {
+            "id": "101_0",
+            "product": "Credit card",
+            "issue": "Fees",
+            "company": "Bank A",
+            "date_received": "2023-05-01",
+        }
+
+    def test_low_cardinality_columns_are_dictionary_encoded(self, embeddings_df):
+        store = MetadataStore.from_frame(embeddings_df)
+
+        assert str(store.column("product").type).startswith("dictionary")
+
+    def test_from_documents(self):
+        from langchain_core.documents import Document
+
+        docs = [
+            Document(
+                page_content="overdraft", metadata={"id": 7, "product": "Checking"}
+            )
+        ]
+
+        store = MetadataStore.from_documents(docs)
+
+        assert store.get_documents([0])[0].metadata == {
+            "id": "7",
+            "product": "Checking",
+        }
+
+    def test_write_appended_stores_with_different_dictionaries(self, tmp_path):
+        first = MetadataStore.from_columns(["a"], {"product": ["Credit card"]})
+        second = MetadataStore.from_columns(["b"], {"product": ["Money transfers"]})
+
+        first.append(second).write(str(tmp_path))
+
+        assert MetadataStore.open(str(tmp_path)).column("product").to_pylist() == [
+            "Credit card",
+            "Money transfers",
+        ]
+
+    def test_open_missing_store(self, tmp_path):
+        with pytest.raises(FileNotFoundError, match="prepare_parquet"):
+            MetadataStore.open(str(tmp_path))
+
+    def test_get_documents_empty(self, embeddings_df):
+        assert MetadataStore.from_frame(embeddings_df).get_documents([]) == []
+
+
+@pytest.fixture
+def complaints():
+    return pd.DataFrame(
+        {
+            "Complaint ID": [501, 502, 503],
+            "Product": ["Credit card", "Money transfers", "Credit card"],
+            "Consumer complaint narrative": [
+                " ".join(
+                    f"Sentence {j} about a late fee on my card." for j in range(12)
+                ),
+                "The wire transfer never arrived.",
+                " ".join(f"Line {j}: my account was closed." for j in range(9)),
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def chunks(complaints):
+    pytest.importorskip("langchain_text_splitters")
+    from src.text_processor import TextProcessor
+
+    processor = TextProcessor(chunk_size=120, chunk_overlap=40)
+    return processor.chunk_texts(complaints["Consumer complaint narrative"])
+
+
+def offset_store(chunks, complaints):
+    return MetadataStore.from_offsets(
+        chunks.parent_rows, chunks.starts, chunks.ends, complaints
+    )
+
+
+class TestOffsetLayout:
+    def test_texts_match_chunks(self, chunks, complaints, tmp_path):
+        offset_store(chunks, complaints).write(str(tmp_path))
+
+        store = MetadataStore.open(str(tmp_path))
+        docs = store.get_documents(list(range(len(chunks))))
+
+        assert store.has_offsets
+        assert [doc.page_content for doc in docs] == chunks.texts
+        assert store.texts([2, 0]) == [chunks.texts[2], chunks.texts[0]]
+        assert docs[0].metadata["parent"] == 0
+        assert docs[-1].metadata["id"] == "503"
+
+    def test_smaller_than_chunk_text(self, complaints, tmp_path):
+        pytest.importorskip("langchain_text_splitters")
+        from src.text_processor import TextProcessor
+
+        complaints = pd.concat([complaints] * 200, ignore_index=True)
+        chunks = TextProcessor(chunk_size=120, chunk_overlap=40).chunk_texts(
+            complaints["Consumer complaint narrative"]
+        )
+        offset_store(chunks, complaints).write(str(tmp_path / "offsets"))
+        MetadataStore.from_chunks(chunks.texts, chunks.parent_rows, complaints).write(
+            str(tmp_path / "text")
+        )
+
+        def size(folder, *names):
+            return sum(os.path.getsize(tmp_path / folder / name) for name in names)
+
+        offsets = size("offsets", METADATA_STORE_FILE_NAME, NARRATIVE_STORE_FILE_NAME)
+        assert offsets < 0.9 * size("text", METADATA_STORE_FILE_NAME)
+        assert not (tmp_path / "text" / NARRATIVE_STORE_FILE_NAME).exists()
+
+    def test_parent_and_window_expansion(self, chunks, complaints):
+        store = offset_store(chunks, complaints)
+        narrative = complaints["Consumer complaint narrative"][0]
+        start, end = int(chunks.starts[1]), int(chunks.ends[1])
+
+        assert store.parent_text(0) == narrative
+        assert store.window_text(0, start, end, 10) == narrative[start - 10 : end + 10]
+        assert store.window_text(0, 0, 5, 10) == narrative[:15]
+
+    def test_append_shifts_parents(self, chunks, complaints):
+        first = offset_store(chunks, complaints)
+
+        store = first.append(offset_store(chunks, complaints))
+
+        assert len(store.narratives) == 2 * len(complaints)
+        assert store.texts(list(range(len(store)))) == chunks.texts * 2
+
+    def test_take_drops_unreferenced_narratives(self, chunks, complaints):
+        rows = np.flatnonzero(chunks.parent_rows != 0)
+
+        store = offset_store(chunks, complaints).take(rows)
+
+        assert len(store.narratives) == 2
+        assert store.texts(list(range(len(store)))) == [chunks.texts[i] for i in rows]
+
+    def test_append_rejects_mixed_layouts(self, chunks, complaints):
+        text_store = MetadataStore.from_chunks(
+            chunks.texts, chunks.parent_rows, complaints
+        )
+
+        with pytest.raises(ValueError, match="layouts"):
+            offset_store(chunks, complaints).append(text_store)
@@ -0,0 +1,183 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import zlib
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_text_splitters")
+
+from src.embedding_engine import EmbeddingEngine
+from src.index_builder import IndexConfig, load_rerank_vectors, read_index
+from src.metadata_store import MetadataStore
+from src.pipeline import VECTORS_SPILL_FILE_NAME, IngestionPipeline, PipelineStage
+from src.sharded_index import is_sharded, write_shards
+from src.sparse_index import SparseIndex
+from src.synthetic_corpus import generate_complaints
+from src.text_processor import TextProcessor
+
+DIM = 8
+
+
+def fake_encode(model_name, texts, batch_size):
+    return np.stack(
+        [np.random.default_rng(zlib.crc32(text.encode())).random(DIM) for text in texts]
+    ).astype(np.float32)
+
+
+class FailingEncoder:
+    """Fails once `limit` texts have been encoded, like a crash mid-embedding."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.encoded = 0
+
+    def __call__(self, model_name, texts, batch_size):
+        self.encoded += len(texts)
+        if self.encoded > self.limit:
+            raise RuntimeError("encoder crashed")
+        return fake_encode(model_name, texts, batch_size)
+
+
+@pytest.fixture(autouse=True)
+def lemmatizer():
+    # The NLTK corpora are not needed to exercise the clean stage
+    with patch("src.data.normalizer.tokenize_and_lemmatize", side_effect=str.lower):
+        yield
+
+
+@pytest.fixture
+def source(tmp_path):
+    df = generate_complaints(120)
+    # Rows the filter stage must drop
+    df.loc[::10, "Product"] = "Mortgage"
+    df.loc[5, "Consumer complaint narrative"] = None
+    path = tmp_path / "complaints.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def make_pipeline(
+    source, tmp_path, encode_fn=fake_encode, chunk_size=120, index_config=None
+):
+    return IngestionPipeline(
+        source,
+        artifacts_path=str(tmp_path / "artifacts"),
+        output_path=str(tmp_path / "store"),
+        chunk_rows=25,
+        text_processor=TextProcessor(chunk_size=chunk_size, chunk_overlap=20),
+        engine=EmbeddingEngine(encode_fn=encode_fn, batch_size=16),
+        index_config=index_config,
+    )
+
+
+def statuses(report):
+    return {stage["stage"]: stage["status"] for stage in report["stages"]}
+
+
+class TestIngestionPipeline:
+    def test_builds_store_from_raw_dump(self, source, tmp_path):
+        report = make_pipeline(source, tmp_path).run()
+
+        folder = str(tmp_path / "store")
+        index, _ = read_index(folder, mmap=False)
+        store = MetadataStore.open(folder)
+        assert set(statuses(report).values()) == {"ran"}
+        assert index.ntotal == len(store) > 0
+        assert store.has_offsets
+        assert set(store.column("product").to_pylist()) <= {
+            "Credit card",
+            "Payday loan, title loan, or personal loan",
+            "Checking or Savings account",
+            "Money transfers",
+        }
+        load, *_ = report["stages"]
+        assert load["parts"] == 5
+        assert all(stage["rows_per_second"] for stage in report["stages"])
+
+    def test_rerun_skips_every_stage(self, source, tmp_path):
+        make_pipeline(source, tmp_path).run()
+
+        report = make_pipeline(source, tmp_path).run()
+
+        assert set(statuses(report).values()) == {"skipped"}
+        assert (tmp_path / "store" / "index.faiss").exists()
+
+    def test_changed_chunking_reruns_downstream_only(self, source, tmp_path):
+        first = make_pipeline(source, tmp_path).run()
+
+        second = make_pipeline(source, tmp_path, chunk_size=200).run()
+
+        assert statuses(second) == {
+            "load": "skipped",
+            "filter": "skipped",
+            "clean": "skipped",
+            "chunk": "ran",
+            "embed": "ran",
+            "index": "ran",
+        }
+        assert first["keys"]["clean"] == second["keys"]["clean"]
+        assert first["keys"]["chunk"] != second["keys"]["chunk"]
+
+    def test_resumes_after_crash_in_embedding(self, source, tmp_path):
+        with pytest.raises(RuntimeError, match="encoder crashed"):
+            make_pipeline(source, tmp_path, FailingEncoder(limit=60)).run()
+
+        report = make_pipeline(source, tmp_path).run()
+
+        embed = next(s for s in report["stages"] if s["stage"] == "embed")
+        assert embed["status"] == "resumed"
+        assert 0 < embed["reused_parts"] < embed["parts"]
+        reference = make_pipeline(source, tmp_path / "fresh").run()
+        assert report["keys"] == reference["keys"]
+        assert len(MetadataStore.open(str(tmp_path / "store"))) == len(
+            MetadataStore.open(str(tmp_path / "fresh" / "store"))
+        )
+
+    def test_index_is_built_from_spilled_vectors(self, source, tmp_path):
+        config = IndexConfig(vector_dtype="int8", rerank_factor=2)
+        make_pipeline(source, tmp_path, index_config=config).run()
+
+        folder = str(tmp_path / "store")
+        index, _ = read_index(folder, mmap=False)
+        texts = MetadataStore.open(folder).texts(range(index.ntotal))
+        np.testing.assert_allclose(
+            load_rerank_vectors(folder, index.ntotal), fake_encode(None, texts, 16)
+        )
+        assert not list((tmp_path / "artifacts").rglob(VECTORS_SPILL_FILE_NAME))
+
+    def test_publish_replaces_shards_and_sparse_index(self, source, tmp_path):
+        folder = str(tmp_path / "store")
+        vectors = np.random.default_rng(0).random((4, DIM), dtype=np.float32)
+        store = MetadataStore.from_columns(
+            ["a", "b", "c", "d"],
+            {"id": ["1", "2", "3", "4"], "product": ["Credit card"] * 4},
+        )
+        write_shards(vectors, store, folder, IndexConfig(), "product")
+        SparseIndex.build([(["1", "2"], ["late fee", "closed card"])]).write(folder)
+
+        make_pipeline(source, tmp_path).run()
+
+        index, _ = read_index(folder, mmap=False)
+        assert not is_sharded(folder)
+        assert not (tmp_path / "store" / "shards").exists()
+        assert index.ntotal == len(MetadataStore.open(folder)) > 4
+        sparse_index = SparseIndex.open(folder)
+        ids = set(MetadataStore.open(folder).column("id").to_pylist())
+        assert set(sparse_index.keys) == ids
+        assert len(sparse_index.search(["fee"], 5)[0]) > 0
+
+
+class TestPipelineStage:
+    def test_stage_must_implement_checkpoints(self):
+        class Incomplete(PipelineStage):
+            def save(self, artifacts, part):
+                pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
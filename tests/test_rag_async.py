@@ -0,0 +1,133 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import asyncio
+import time
+import pytest
+from src.llm_client import LLMOverloadedError
+from src.rag_system import GenerationTimings
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+LLM_LATENCY = 0.05
+
+
+class FakeLLMClient:
+    """Sleeps like a remote endpoint, tracking peak concurrency."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def achat(self, prompt, usage=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(LLM_LATENCY)
+        self.active -= 1
+        return "answer"
+
+    async def astream(self, prompt, usage=None):
+        for token in ["an", "swer"]:
+            yield token
+        if usage is not None:
+            usage.update(prompt_tokens=120, completion_tokens=2)
+
+
+@pytest.fixture
+def rag(make_rag):
+    rag = make_rag(llm_client=FakeLLMClient(), search_workers=2)
+    docs = [Document(page_content="late fee", metadata={"id": "1"})]
+    rag.search_vector_db = lambda query, k=5, filters=None: docs
+    return rag
+
+
+class TestAsyncAPI:
+    def test_aanswer(self, rag):
+        answer, docs = asyncio.run(rag.aanswer("why fees?"))
+        assert answer == "answer"
+        assert docs[0].metadata["id"] == "1"
+
+    def test_generation_overlaps_across_sessions(self, rag):
+        async def run():
+            return await asyncio.gather(
+                *(rag.aanswer(f"question {i}") for i in range(8))
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 8
+        assert rag.llm_client.peak == 8
+        assert elapsed < 8 * LLM_LATENCY
+
+    def test_astream_result_timings(self, rag):
+        async def run():
+            timings = GenerationTimings()
+            docs = await rag.asearch("why fees?")
+            tokens = [t async for t in rag.astream_result("why fees?", docs, timings)]
+            return tokens, timings
+
+        tokens, timings = asyncio.run(run())
+        assert tokens == ["an", "swer"]
+        assert 0 <= timings.ttft_ms <= timings.total_ms
+
+
+class TestBackgroundLoop:
+    def test_run_async_from_sync_code(self, rag):
+        answer, _ = rag.run_async(rag.aanswer("why fees?"))
+        assert answer == "answer"
+
+    def test_iter_async(self, rag):
+        docs = rag.run_async(rag.asearch("why fees?"))
+        assert list(rag.iter_async(rag.astream_result("why", docs))) == ["an", "swer"]
+
+    def test_overload_propagates(self, rag):
+        async def overloaded(prompt, usage=None):
+            raise LLMOverloadedError("busy")
+
+        rag.llm_client.achat = overloaded
+        with pytest.raises(LLMOverloadedError):
+            rag.run_async(rag.aanswer("why fees?"))
+
+
+class RecordingSink:
+    def __init__(self):
+        self.traces = []
+
+    def emit(self, trace):
+        self.traces.append(trace)
+
+
+class TestTracing:
+    def test_aanswer_emits_stage_breakdown(self, rag):
+        sink = RecordingSink()
+        rag.init_telemetry([sink])
+        asyncio.run(rag.aanswer("why fees?"))
+
+        (trace,) = sink.traces
+        assert {"prompt", "generation"} <= set(trace.stage_ms())
+        assert trace.stage_ms()["generation"] >= LLM_LATENCY * 1000 * 0.9
+        # The fake endpoint reports no usage, so counts are estimated
+        assert trace.counters["prompt_tokens"] > 0
+        assert trace.counters["completion_tokens"] == 1
+
+    def test_no_trace_without_sinks(self, rag):
+        assert rag.telemetry.start() is None
+        asyncio.run(rag.aanswer("why fees?"))
+
+    def test_astream_result_records_ttft_and_usage(self, rag):
+        trace = rag.telemetry.start("chat", force=True)
+        docs = rag.run_async(rag.asearch("why fees?", trace=trace))
+        list(rag.iter_async(rag.astream_result("why fees?", docs, trace=trace)))
+        rag.telemetry.finish(trace)
+
+        stages = trace.stage_ms()
+        assert {"prompt", "ttft", "generation"} <= set(stages)
+        assert stages["ttft"] <= stages["generation"]
+        assert trace.counters == {"prompt_tokens": 120, "completion_tokens": 2}
@@ -0,0 +1,60 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+from types import SimpleNamespace
+import pytest
+from src.rag_system import GenerationTimings
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+
+class FakeLLM:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        for token in self.tokens:
+            yield SimpleNamespace(content=token)
+
+
+@pytest.fixture
+def rag(make_rag):
+    llm = FakeLLM(["Late ", "", "fees ", "were charged."])
+    return make_rag(llm=llm, answer_cache_threshold=0.92)
+
+
+@pytest.fixture
+def docs():
+    return [Document(page_content="late fee charged twice", metadata={"id": "1"})]
+
+
+class TestStreamResult:
+    def test_yields_tokens_in_order(self, rag, docs):
+        tokens = list(rag.stream_result("why fees?", docs))
+        assert tokens == ["Late ", "fees ", "were charged."]
+
+    def test_records_timings(self, rag, docs):
+        timings = GenerationTimings()
+        list(rag.stream_result("why fees?", docs, timings))
+        assert not timings.cached
+        assert 0 <= timings.ttft_ms <= timings.total_ms
+
+    def test_caches_full_answer(self, rag, docs):
+        list(rag.stream_result("why fees?", docs))
+        timings = GenerationTimings()
+        tokens = list(rag.stream_result("Why fees?", docs, timings))
+        assert tokens == ["Late fees were charged."]
+        assert timings.cached
+        assert rag.llm.calls == 1
+
+    def test_timings_unset_before_generation(self):
+        timings = GenerationTimings()
+        assert timings.ttft_ms is None
+        assert timings.total_ms is None
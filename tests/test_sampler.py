@@ -0,0 +1,90 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+from src.data.sampler import StratifiedSampler, allocate_quotas
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "Complaint ID": np.arange(10_000),
+            "Product": rng.choice(["A", "B", "C"], size=10_000, p=[0.6, 0.3, 0.1]),
+        }
+    )
+
+
+def chunks(df, size):
+    return [df.iloc[start : start + size] for start in range(0, len(df), size)]
+
+
+class TestAllocateQuotas:
+    def test_sums_to_n(self):
+        assert allocate_quotas({"A": 5, "B": 3, "C": 2}, 5) == {"A": 3, "B": 1, "C": 1}
+
+    def test_capped_at_total(self):
+        assert allocate_quotas({"A": 2, "B": 1}, 10) == {"A": 2, "B": 1}
+
+
+class TestStratifiedSampler:
+    def test_fraction_gives_exact_quotas(self, df):
+        sample = StratifiedSampler("Product", fraction=0.2).sample(chunks(df, 700))
+
+        counts = df["Product"].value_counts()
+        assert sample["Product"].value_counts().to_dict() == {
+            product: round(0.2 * count) for product, count in counts.items()
+        }
+        assert sample["Complaint ID"].is_unique
+        assert sample["Complaint ID"].is_monotonic_increasing
+
+    def test_independent_of_chunking_and_seeded(self, df):
+        first = StratifiedSampler("Product", fraction=0.1).sample(chunks(df, 500))
+        second = StratifiedSampler("Product", fraction=0.1).sample(chunks(df, 3333))
+        other_seed = StratifiedSampler("Product", fraction=0.1, random_state=7).sample(
+            chunks(df, 500)
+        )
+
+        pd.testing.assert_frame_equal(first, second)
+        assert not first.equals(other_seed)
+
+    def test_n_samples_split_by_stratum_size(self, df):
+        sampler = StratifiedSampler("Product", n_samples=100)
+
+        sample = sampler.sample(chunks(df, 1000))
+
+        assert len(sample) == 100
+        assert sample["Product"].value_counts().to_dict() == allocate_quotas(
+            df["Product"].value_counts().to_dict(), 100
+        )
+        assert all(len(pool[0]) <= 100 for pool in sampler.pools.values())
+
+    def test_quotas(self, df):
+        sample = StratifiedSampler("Product", quotas={"A": 5, "C": 3}).sample(
+            chunks(df, 1000)
+        )
+
+        assert sample["Product"].value_counts().to_dict() == {"A": 5, "C": 3}
+
+    def test_categories_survive_chunks(self, df):
+        df = df.assign(Product=df["Product"].astype("category"))
+        parts = [
+            chunk.assign(Product=chunk["Product"].cat.remove_unused_categories())
+            for chunk in chunks(df, 1000)
+        ]
+
+        sample = StratifiedSampler("Product", fraction=0.05).sample(parts)
+
+        assert sample["Product"].dtype == "category"
+
+    def test_requires_one_mode(self):
+        with pytest.raises(ValueError):
+            StratifiedSampler("Product", fraction=0.2, n_samples=10)
+        with pytest.raises(ValueError):
+            StratifiedSampler("Product")
@@ -0,0 +1,129 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from unittest.mock import patch
+from src.index_builder import IndexConfig, build_index
+from src.metadata_store import MetadataStore
+from src.search_filters import FilterIndex, SearchFilters, filtered_search
+
+faiss = pytest.importorskip("faiss")
+
+N_ROWS = 600
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(3).random((N_ROWS, 8), dtype=np.float32)
+
+
+@pytest.fixture
+def store():
+    products = ["Credit card", "Money transfers", "Checking or Savings account"]
+    return MetadataStore.from_columns(
+        [f"chunk {i}" for i in range(N_ROWS)],
+        {
+            "id": [str(i) for i in range(N_ROWS)],
+            "product": [products[i % 3] for i in range(N_ROWS)],
+            "state": ["CA" if i < 10 else "NY" for i in range(N_ROWS)],
+            "company": [None if i % 5 == 0 else "Bank A" for i in range(N_ROWS)],
+            "date_received": [f"2023-01-{1 + i % 28:02d}" for i in range(N_ROWS)],
+        },
+    )
+
+
+def expected_rows(predicate):
+    return np.array([i for i in range(N_ROWS) if predicate(i)])
+
+
+class TestFilterIndex:
+    def test_select_by_value_and_date(self, store):
+        filter_index = FilterIndex.from_store(store)
+        filters = SearchFilters(
+            products=["Credit card", "Money transfers"],
+            date_from=date(2023, 1, 3),
+            date_to=date(2023, 1, 5),
+        )
+
+        rows = filter_index.select(filters)
+
+        np.testing.assert_array_equal(
+            rows, expected_rows(lambda i: i % 3 != 2 and 2 <= i % 28 <= 4)
+        )
+
+    def test_null_values_are_not_selected(self, store):
+        rows = FilterIndex.from_store(store).select(SearchFilters(companies=["Bank A"]))
+
+        np.testing.assert_array_equal(rows, expected_rows(lambda i: i % 5 != 0))
+
+    def test_empty_filters_select_nothing(self, store):
+        assert FilterIndex.from_store(store).select(SearchFilters()) is None
+
+    def test_values(self, store):
+        assert FilterIndex.from_store(store).values("state") == ["CA", "NY"]
+
+
+class TestFilteredSearch:
+    @pytest.mark.parametrize(
+        "config",
+        [
+            IndexConfig(),
+            IndexConfig(index_type="hnsw", hnsw_m=8),
+            IndexConfig(index_type="ivf_flat", nlist=8, nprobe=1),
+        ],
+    )
+    @pytest.mark.parametrize("exact_limit", [0, 4096])
+    def test_selective_filter_returns_k_matching_rows(
+        self, config, exact_limit, vectors, store
+    ):
+        index = build_index(pd.Series(list(vectors)), config)
+        rows = FilterIndex.from_store(store).select(SearchFilters(states=["CA"]))
+
+        with patch("src.search_filters.EXACT_SEARCH_MAX_ROWS", exact_limit):
+            _, ids = filtered_search(index, vectors[[500]], 5, rows, config)
+
+        assert len(ids[0]) == 5
+        assert set(ids[0]) <= set(range(10))
+
+    def test_no_matching_rows(self, vectors):
+        index = build_index(pd.Series(list(vectors)))
+
+        _, ids = filtered_search(
+            index, vectors[[0]], 5, np.empty(0, np.int64), IndexConfig()
+        )
+
+        assert ids.shape == (1, 0)
+
+    def test_multi_query_exact_search_matches_brute_force(self, vectors, store):
+        index = build_index(pd.Series(list(vectors)))
+        rows = FilterIndex.from_store(store).select(SearchFilters(states=["CA"]))
+        queries = vectors[[100, 200]]
+
+        _, ids = filtered_search(index, queries, 3, rows, IndexConfig())
+
+        for query, row_ids in zip(queries, ids):
+            distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+            np.testing.assert_array_equal(row_ids, rows[np.argsort(distances)[:3]])
+
+    @pytest.mark.parametrize("exact_limit", [0, 4096])
+    def test_rerank_quantized_filtered_search(self, exact_limit, vectors, store):
+        config = IndexConfig(vector_dtype="int8", rerank_factor=4)
+        index = build_index(vectors, config)
+        rows = FilterIndex.from_store(store).select(
+            SearchFilters(products=["Credit card"])
+        )
+        queries = vectors[[1, 2]]
+
+        with patch("src.search_filters.EXACT_SEARCH_MAX_ROWS", exact_limit):
+            distances, ids = filtered_search(index, queries, 3, rows, config, vectors)
+
+        for query, row_ids, row_distances in zip(queries, ids, distances):
+            exact = ((vectors[rows] - query) ** 2).sum(axis=1)
+            np.testing.assert_array_equal(row_ids, rows[np.argsort(exact)[:3]])
+            np.testing.assert_allclose(row_distances, np.sort(exact)[:3], rtol=1e-4)
@@ -0,0 +1,218 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+from src.index_builder import IndexConfig, build_index
+from src.metadata_store import MetadataStore
+from src.search_filters import SearchFilters
+
+faiss = pytest.importorskip("faiss")
+
+from src.sharded_index import (
+    ShardedIndex,
+    read_shard_manifest,
+    shard_name,
+    shard_path,
+    shard_rows,
+    write_shards,
+)
+
+DIM = 8
+PRODUCTS = ["Credit card", "Savings account", "Money transfers", None]
+
+
+def make_store(n: int = 60) -> tuple:
+    rng = np.random.default_rng(0)
+    products = [PRODUCTS[i % len(PRODUCTS)] for i in range(n)]
+    dates = [f"{2020 + i % 3}-05-0{1 + i % 9}" for i in range(n)]
+    store = MetadataStore.from_columns(
+        [f"complaint {i}" for i in range(n)],
+        {"id": [str(i) for i in range(n)], "product": products, "date_received": dates},
+    )
+    return rng.random((n, DIM), dtype=np.float32), store
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    vectors, store = make_store()
+    folder = str(tmp_path / "store")
+    write_shards(vectors, store, folder, IndexConfig(), "product")
+    return folder, vectors
+
+
+class TestShardRows:
+    def test_by_product(self):
+        _, store = make_store(8)
+        assignments = shard_rows(store, "product")
+
+        assert list(assignments) == [
+            "credit-card",
+            "money-transfers",
+            "savings-account",
+            "unknown",
+        ]
+        key, rows = assignments["credit-card"]
+        assert key == "Credit card"
+        assert rows.tolist() == [0, 4]
+        assert assignments["unknown"][1].tolist() == [3, 7]
+
+    def test_by_year(self):
+        _, store = make_store(6)
+        assignments = shard_rows(store, "year")
+
+        assert list(assignments) == ["2020", "2021", "2022"]
+        key, rows = assignments["2021"]
+        assert key == 2021
+        assert rows.tolist() == [1, 4]
+
+    def test_unknown_key(self):
+        _, store = make_store(4)
+        with pytest.raises(ValueError):
+            shard_rows(store, "state")
+
+    def test_shard_name(self):
+        assert (
+            shard_name("Credit card or prepaid card") == "credit-card-or-prepaid-card"
+        )
+        assert shard_name(None) == "unknown"
+
+
+class TestShardedIndex:
+    def test_matches_single_index(self, sharded):
+        folder, vectors = sharded
+        shards = ShardedIndex.open(folder)
+        queries = np.random.default_rng(1).random((4, DIM), dtype=np.float32)
+
+        distances, ids = shards.search(queries, 5)
+        expected_distances, expected_ids = build_index(vectors).search(queries, 5)
+
+        # Global rows follow shard order; map them back to the input rows
+        texts = shards.metadata_store.texts(ids.ravel())
+        original = np.asarray([int(text.split()[1]) for text in texts])
+        assert shards.ntotal == len(vectors)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+        assert (original.reshape(ids.shape) == expected_ids).all()
+
+    def test_documents_follow_global_rows(self, sharded):
+        folder, vectors = sharded
+        shards = ShardedIndex.open(folder)
+        row = shards.search(vectors[:1], 1)[1][0, 0]
+
+        assert shards.metadata_store.get_documents([row])[0].page_content == (
+            "complaint 0"
+        )
+        np.testing.assert_allclose(shards.reconstruct_batch([row])[0], vectors[0])
+
+    def test_skips_shards_without_allowed_rows(self, sharded, monkeypatch):
+        folder, vectors = sharded
+        shards = ShardedIndex.open(folder)
+        searched = []
+        search_shard = shards._search_shard
+
+        def spy(shard, *args):
+            searched.append(shard.name)
+            return search_shard(shard, *args)
+
+        monkeypatch.setattr(shards, "_search_shard", spy)
+        rows = np.flatnonzero(
+            np.asarray(shards.metadata_store.column("product").to_pylist())
+            == "Savings account"
+        )
+        _, ids = shards.search(vectors[:2], 3, rows)
+
+        assert searched == ["savings-account"]
+        assert set(ids.ravel()) <= set(rows)
+
+    def test_pads_when_fewer_rows_than_k(self, sharded):
+        folder, vectors = sharded
+        shards = ShardedIndex.open(folder)
+        distances, ids = shards.search(vectors[:1], 4, np.array([0, 20]))
+
+        assert ids[0].tolist()[2:] == [-1, -1]
+        assert sorted(ids[0].tolist()[:2]) == [0, 20]
+        assert np.isinf(distances[0, 2:]).all()
+
+    def test_quantized_shards_rerank_exactly(self, tmp_path):
+        vectors, store = make_store()
+        folder = str(tmp_path / "store")
+        config = IndexConfig(vector_dtype="int8", rerank_factor=4)
+        write_shards(vectors, store, folder, config, "product")
+        shards = ShardedIndex.open(folder)
+        queries = np.random.default_rng(1).random((4, DIM), dtype=np.float32)
+
+        distances, _ = shards.search(queries, 5)
+        expected, _ = build_index(vectors).search(queries, 5)
+
+        assert all(shard.vectors is not None for shard in shards.shards)
+        np.testing.assert_allclose(distances, expected, rtol=1e-5)
+
+    def test_open_subset(self, sharded):
+        folder, _ = sharded
+        shards = ShardedIndex.open(folder, only=["Credit card"])
+
+        assert [shard.name for shard in shards.shards] == ["credit-card"]
+        assert shards.ntotal == 15
+        assert len(shards.metadata_store) == 15
+
+
+class TestRebuild:
+    def test_rebuilds_one_shard(self, sharded):
+        folder, vectors = sharded
+        untouched = os.path.join(shard_path(folder, "credit-card"), "index.faiss")
+        mtime = os.stat(untouched).st_mtime_ns
+        version = ShardedIndex.open(folder).version
+
+        # Savings account complaints gained rows since the first build
+        more_vectors, store = make_store(80)
+        manifest = write_shards(
+            more_vectors,
+            store,
+            folder,
+            IndexConfig(),
+            "product",
+            only=["Savings account"],
+        )
+
+        rows = {entry["name"]: entry["rows"] for entry in manifest["shards"]}
+        assert rows["savings-account"] == 20
+        assert rows["credit-card"] == 15
+        assert os.stat(untouched).st_mtime_ns == mtime
+        assert ShardedIndex.open(folder).version != version
+
+    def test_full_rebuild_removes_stale_shards(self, sharded):
+        folder, _ = sharded
+        vectors, store = make_store(6)
+        write_shards(vectors, store, folder, IndexConfig(), "year")
+
+        assert [e["name"] for e in read_shard_manifest(folder)["shards"]] == [
+            "2020",
+            "2021",
+            "2022",
+        ]
+        assert not os.path.exists(shard_path(folder, "credit-card"))
+
+    def test_partial_rebuild_needs_same_key(self, sharded):
+        folder, vectors = sharded
+        _, store = make_store()
+        with pytest.raises(ValueError):
+            write_shards(vectors, store, folder, IndexConfig(), "year", only=["2020"])
+
+
+class TestRAGSystem:
+    def test_filtered_search_over_shards(self, sharded):
+        from src.rag_system import RAGSystem
+
+        folder, vectors = sharded
+        rag = RAGSystem.from_parts(folder, None, answer_cache_threshold=1.1)
+
+        documents = rag.search_by_vectors(
+            vectors[:1], 3, SearchFilters(products=["Money transfers"])
+        )[0]
+
+        assert len(documents) == 3
+        assert {doc.metadata["product"] for doc in documents} == {"Money transfers"}
+        assert rag.index_version == rag.shards.version
@@ -0,0 +1,139 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import time
+import pytest
+import numpy as np
+from unittest.mock import patch
+from src.metadata_store import MetadataStore
+from src.sparse_index import (
+    ComplaintRows,
+    SparseIndex,
+    is_keyword_query,
+    reciprocal_rank_fusion,
+    terms,
+)
+
+COMPLAINTS = {
+    "10": "late fee charged on my credit card",
+    "11": "bank closed my savings account without notice",
+    "12": "fee fee fee overdraft fee",
+    "13": "money transfer never arrived",
+}
+
+
+def build(complaints=COMPLAINTS):
+    return SparseIndex.build([(list(complaints), list(complaints.values()))])
+
+
+class TestSparseIndex:
+    def test_terms_drop_punctuation(self):
+        assert terms("Late , fee 1024.4 .") == ["late", "fee", "1024.4"]
+        assert terms(None) == []
+
+    def test_bm25_ranks_by_term_frequency(self):
+        index = build()
+        docs, scores = index.search(["fee"], n=5)
+
+        assert [index.keys[doc] for doc in docs] == ["12", "10"]
+        assert scores[0] > scores[1]
+
+    def test_unknown_terms_match_nothing(self):
+        docs, _ = build().search(["mortgage"], n=5)
+        assert len(docs) == 0
+
+    def test_write_open_roundtrip(self, tmp_path):
+        index = build()
+        index.write(str(tmp_path))
+        loaded = SparseIndex.open(str(tmp_path))
+
+        assert loaded.keys == index.keys
+        for query in (["fee"], ["account", "transfer"]):
+            np.testing.assert_array_equal(
+                loaded.search(query, 5)[0], index.search(query, 5)[0]
+            )
+
+    def test_rebuild_changes_index_version(self, tmp_path):
+        from src.index_builder import index_version
+
+        build().write(str(tmp_path))
+        before = index_version(str(tmp_path))
+        build({**COMPLAINTS, "14": "mortgage payment lost"}).write(str(tmp_path))
+
+        assert index_version(str(tmp_path)) != before
+
+    def test_open_missing(self, tmp_path):
+        assert SparseIndex.open(str(tmp_path)) is None
+
+
+class TestFusion:
+    def test_rows_in_both_lists_rank_first(self):
+        assert reciprocal_rank_fusion([[1, 2, 3], [3, 4]])[0] == 3
+
+    def test_keyword_query(self):
+        assert is_keyword_query("overdraft fee")
+        assert is_keyword_query('complaints about "zelle"')
+        assert not is_keyword_query("why are customers unhappy with their credit cards")
+
+
+class TestComplaintRows:
+    def test_maps_complaints_to_chunk_rows(self):
+        store = MetadataStore.from_columns(
+            ["a", "b", "c", "d", "e"], {"id": ["11", "10", "11", None, "13"]}
+        )
+        mapping = ComplaintRows(build(), store)
+
+        assert mapping.rows(0).tolist() == [1]
+        assert mapping.rows(1).tolist() == [0, 2]
+        assert mapping.rows(2).tolist() == []
+        assert mapping.rows(3).tolist() == [4]
+
+
+@pytest.fixture
+def rag(make_rag):
+    # Two chunks per complaint, rows 0-7
+    texts = [f"{text} part {part}" for text in COMPLAINTS.values() for part in (1, 2)]
+    texts[4], texts[5] = "statement part 1", "fee fee fee overdraft fee"
+    ids = [key for key in COMPLAINTS for _ in (1, 2)]
+    return make_rag(texts, ids, sparse_index=build(), context_token_budget=None)
+
+
+@patch("scripts.utils.tokenize_and_lemmatize", side_effect=str.lower)
+class TestHybridSearch:
+    def test_sparse_picks_best_chunk(self, _, rag):
+        assert rag.sparse_rows("overdraft fee", n=5) == [5, 0]
+
+    def test_fuses_dense_and_sparse(self, _, rag):
+        rows = rag.search_rows(rag.embed_query("overdraft fee"), 3)[0]
+        documents = rag.search_vector_db("overdraft fee", k=3)
+
+        assert len(documents) == 3
+        contents = [doc.page_content for doc in documents]
+        assert "fee fee fee overdraft fee" in contents
+        assert rag.metadata_store.get_documents(rows[:1])[0].page_content in contents
+
+    def test_rebuilt_sparse_index_is_not_served_from_cache(self, _, rag):
+        stale = rag.hybrid_rows("overdraft fee", 4)
+        build({**COMPLAINTS, "12": "statement", "13": "overdraft overdraft"}).write(
+            rag.vector_store_path
+        )
+        rag.load_vector_db()
+
+        fresh = rag.hybrid_rows("overdraft fee", 4)
+
+        assert rag.sparse_rows("overdraft fee", n=1)[0] in fresh
+        assert fresh != stale
+
+    def test_keyword_query_skips_slow_dense_stage(self, _, rag):
+        rag.embeddings.delay = 0.5
+        start = time.perf_counter()
+        documents = rag.hybrid_search("fee", k=2, latency_budget_ms=10)
+
+        assert time.perf_counter() - start < 0.4
+        assert [doc.page_content for doc in documents] == [
+            "fee fee fee overdraft fee",
+            "late fee charged on my credit card part 1",
+        ]
@@ -0,0 +1,137 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import contextvars
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.telemetry import (
+    LogSink,
+    PrometheusSink,
+    Telemetry,
+    TelemetrySink,
+    Trace,
+    activate,
+    count,
+    current_trace,
+    make_sinks,
+    stage,
+)
+
+
+class FailingSink:
+    def emit(self, trace):
+        raise RuntimeError("exporter down")
+
+
+class TestTrace:
+    def test_stages_sum_repeats(self):
+        trace = Trace("chat")
+        with activate(trace):
+            for _ in range(2):
+                with stage("docstore"):
+                    time.sleep(0.01)
+            count("prompt_tokens", 10)
+        trace.finish()
+
+        assert trace.stage_ms()["docstore"] >= 20
+        assert trace.counters == {"prompt_tokens": 10}
+        assert trace.to_dict()["total_ms"] >= trace.stage_ms()["docstore"]
+
+    def test_stage_is_noop_without_active_trace(self):
+        assert current_trace() is None
+        with stage("search"):
+            count("prompt_tokens")
+        assert stage("search") is stage("embed")
+
+    def test_trace_follows_copied_context_into_pool(self):
+        trace = Trace()
+        with activate(trace), ThreadPoolExecutor(1) as pool:
+            context = contextvars.copy_context()
+            pool.submit(context.run, count, "carried").result()
+            pool.submit(count, "lost").result()
+
+        assert trace.counters == {"carried": 1}
+        assert current_trace() is None
+
+
+class TestSinks:
+    def test_log_sink_prints_json_line(self, capsys):
+        trace = Trace("chat", question_index=3)
+        trace.count("completion_tokens", 5)
+        trace.finish()
+        LogSink().emit(trace)
+
+        line = capsys.readouterr().out
+        assert line.startswith("[telemetry] ")
+        assert '"question_index": 3' in line and '"completion_tokens": 5' in line
+
+    def test_prometheus_render(self):
+        sink = PrometheusSink()
+        trace = Trace()
+        trace.add_span("search", 0.0, 0.02)
+        trace.count("prompt_tokens", 100)
+        trace.finish()
+        sink.emit(trace)
+        sink.emit(trace)
+
+        text = sink.render()
+        assert 'rag_stage_seconds_bucket{stage="search",le="0.01"} 0' in text
+        assert 'rag_stage_seconds_bucket{stage="search",le="0.025"} 2' in text
+        assert 'rag_stage_seconds_count{stage="search"} 2' in text
+        assert "rag_requests_total 2" in text
+        assert "rag_prompt_tokens_total 200" in text
+
+    def test_prometheus_endpoint(self):
+        sink = PrometheusSink()
+        server = sink.serve(port=0)
+        try:
+            host, port = server.server_address[:2]
+            url = f"http://{host}:{port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                assert b"rag_requests_total 0" in response.read()
+        finally:
+            server.shutdown()
+
+        # Only local scrapers by default
+        assert host == "127.0.0.1"
+
+    def test_failing_sink_does_not_raise(self, capsys):
+        Telemetry([FailingSink()]).finish(Trace())
+        assert "exporter down" in capsys.readouterr().out
+
+    def test_sink_must_implement_emit(self):
+        with pytest.raises(TypeError):
+            TelemetrySink()
+
+    def test_make_sinks(self):
+        assert make_sinks("") == []
+        assert isinstance(make_sinks("log")[0], LogSink)
+        with pytest.raises(ValueError):
+            make_sinks("statsd")
+
+    def test_opentelemetry_spans(self):
+        pytest.importorskip("opentelemetry.sdk")
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter,
+        )
+        from src.telemetry import OpenTelemetrySink
+
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+        trace = Trace("chat")
+        with trace.stage("search"):
+            pass
+        trace.finish()
+        OpenTelemetrySink(provider.get_tracer("test")).emit(trace)
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert spans["search"].parent.span_id == spans["chat"].context.span_id
@@ -0,0 +1,161 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import random
+import re
+import string
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from scripts.utils import clean_text
+from src.data.normalizer import TextNormalizer
+
+
+def nltk_data_installed() -> bool:
+    import nltk
+
+    try:
+        for resource_path in [
+            "tokenizers/punkt_tab",
+            "corpora/wordnet",
+            "corpora/stopwords",
+        ]:
+            nltk.data.find(resource_path)
+    except LookupError:
+        return False
+    return True
+
+
+def baseline_clean_text(text: str) -> str:
+    """The original row-wise clean_text, kept as the reference output."""
+    text = str(text).lower()
+    text = re.sub(r"https?://\S+|www\.\S+", "", text)
+    text = re.sub(r"<.*?>", "", text)
+    boilerplate = [
+        r"i am writing to file a complaint regarding",
+        r"to whom it may concern",
+        r"please find attached",
+        r"thank you for your time",
+        r"i want to start out this complaint by stating",
+        r"i had a friend help me write this complaint",
+        r"i m writing to complain about",
+    ]
+    for pattern in boilerplate:
+        text = re.sub(pattern, "", text)
+    text = re.sub(f"[{re.escape(string.punctuation)}]", " ", text)
+    return " ".join(text.split())
+
+
+def baseline_tokenize_and_lemmatize(text: str) -> str:
+    """The original row-wise tokenize_and_lemmatize, kept as the reference output."""
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+
+    lemmatizer = WordNetLemmatizer()
+    stop_words = set(stopwords.words("english"))
+    tokens = word_tokenize(text)
+    return " ".join(
+        lemmatizer.lemmatize(token) for token in tokens if token not in stop_words
+    )
+
+
+@pytest.fixture
+def narratives():
+    return [
+        "To whom it may concern, I was charged a $35 <b>late</b> fee! https://bank.com/x",
+        "Thank you for your time. My account was closed without notice...",
+        "I M WRITING TO COMPLAIN ABOUT overdraft fees & charges",
+        "No boilerplate here, just www.example.com and a fee.",
+    ]
+
+
+class TestCleanText:
+    def test_removes_urls_html_boilerplate_and_punctuation(self):
+        text = "To whom it may concern, I was charged a $35 <b>late</b> fee! https://x.com/y"
+
+        assert clean_text(text) == "i was charged a 35 late fee"
+
+    def test_matches_original_clean_text(self):
+        # Fragments that exercise each step: URLs, tags, boilerplate (also
+        # nested, so a removal can form a new match), punctuation, unicode
+        fragments = [
+            "To whom it may concern",
+            "to whom it mthank you for your timeay concern",
+            "I M writing to complain about",
+            "i am writing to file a complaint regarding",
+            "please find attached",
+            "https://bank.com/a?b=1&c=2",
+            "www.example.org/x",
+            "<b>",
+            "</p>",
+            "<a href='x'>link</a>",
+            "<",
+            ">",
+            "$35.00",
+            "don't",
+            "fee",
+            "Late",
+            "\t",
+            "\n",
+            "  ",
+            "é",
+            "—",
+            "XX/XX/2020",
+            *string.punctuation,
+        ]
+        rng = random.Random(0)
+        texts = [
+            "".join(rng.choice(fragments) + rng.choice(["", " "]) for _ in range(12))
+            for _ in range(2000)
+        ]
+        texts += [None, 12.5, "", *string.punctuation]
+
+        for text in texts:
+            assert clean_text(text) == baseline_clean_text(text), text
+
+    def test_keeps_text_without_boilerplate(self):
+        assert (
+            clean_text("Overdraft   fee,\tcharged twice")
+            == "overdraft fee charged twice"
+        )
+
+
+class TestTextNormalizer:
+    @patch("src.data.normalizer.tokenize_and_lemmatize", side_effect=str.upper)
+    def test_normalize_matches_row_wise_functions(self, mock_tokenize, narratives):
+        normalizer = TextNormalizer(n_jobs=1, shard_size=3)
+
+        cleaned, normalized = normalizer.normalize(narratives)
+
+        assert cleaned == [clean_text(text) for text in narratives]
+        assert normalized == [text.upper() for text in narratives]
+
+    @patch("src.data.normalizer.tokenize_and_lemmatize", side_effect=str.upper)
+    def test_normalize_column_keeps_index(self, mock_tokenize, narratives):
+        df = pd.DataFrame({"text": narratives}, index=[10, 20, 30, 40])
+
+        result = TextNormalizer(n_jobs=1).normalize_column(
+            df, "text", "cleaned", "normalized"
+        )
+
+        assert result.loc[30, "cleaned"] == "overdraft fees charges"
+        assert result.loc[10, "normalized"] == narratives[0].upper()
+
+    @pytest.mark.skipif(not nltk_data_installed(), reason="NLTK data not installed")
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_matches_original_row_wise_output(self, narratives, n_jobs):
+        texts = narratives + [
+            "The banks were charging fees on accounts; my cards were declined twice.",
+            "Companies keep calling about debts I don't owe!!",
+        ]
+
+        cleaned, normalized = TextNormalizer(n_jobs=n_jobs, shard_size=2).normalize(
+            texts
+        )
+
+        assert cleaned == [baseline_clean_text(text) for text in texts]
+        assert normalized == [baseline_tokenize_and_lemmatize(text) for text in texts]
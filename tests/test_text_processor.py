@@ -0,0 +1,127 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+import pytest
+import numpy as np
+import pandas as pd
+
+pytest.importorskip("langchain_text_splitters")
+pytest.importorskip("langchain_core")
+
+from src.metadata_store import MetadataStore
+from src.text_processor import TextProcessor
+
+
+def narrative(i):
+    sentences = [
+        f"Complaint {i} sentence {j} about fees and a closed account."
+        for j in range(i % 9)
+    ]
+    return " ".join(sentences)
+
+
+@pytest.fixture
+def df():
+    n = 40
+    return pd.DataFrame(
+        {
+            "Complaint ID": list(range(1000, 1000 + n)),
+            "Product": ["Credit card", "Money transfers"] * (n // 2),
+            "State": ["CA"] * n,
+            "Consumer complaint narrative": [narrative(i) for i in range(n)],
+        },
+        index=range(500, 500 + n),
+    )
+
+
+def row_wise_chunks(processor, df):
+    """Chunks produced by splitting each narrative on its own."""
+    return [
+        (position, chunk)
+        for position, text in enumerate(df["Consumer complaint narrative"])
+        for chunk in processor.split_text(text)
+    ]
+
+
+class TestChunking:
+    def test_matches_row_wise_split(self, df):
+        processor = TextProcessor(chunk_size=120, chunk_overlap=20, shard_size=7)
+
+        batch = processor.chunk_texts(df["Consumer complaint narrative"])
+
+        assert list(zip(batch.parent_rows, batch.texts)) == row_wise_chunks(
+            processor, df
+        )
+
+    def test_offsets_locate_chunks(self, df):
+        processor = TextProcessor(chunk_size=120, chunk_overlap=20)
+        texts = df["Consumer complaint narrative"].tolist()
+
+        batch = processor.chunk_texts(texts)
+
+        for text, row, start, end in zip(
+            batch.texts, batch.parent_rows, batch.starts, batch.ends
+        ):
+            assert texts[row][start:end] == text
+
+    def test_fixed_size_batches(self, df):
+        processor = TextProcessor(chunk_size=120, chunk_overlap=20, shard_size=5)
+        total = len(processor.chunk_texts(df["Consumer complaint narrative"]))
+
+        sizes = [
+            len(batch)
+            for batch in processor.iter_chunk_batches(
+                df["Consumer complaint narrative"], batch_size=16
+            )
+        ]
+
+        assert sum(sizes) == total
+        assert all(size == 16 for size in sizes[:-1])
+        assert 0 < sizes[-1] <= 16
+
+    def test_worker_pool_matches_single_process(self, df):
+        texts = df["Consumer complaint narrative"]
+        single = TextProcessor(chunk_size=120, chunk_overlap=20).chunk_texts(texts)
+        pooled = TextProcessor(
+            chunk_size=120, chunk_overlap=20, n_jobs=2, shard_size=4
+        ).chunk_texts(texts)
+
+        assert pooled.texts == single.texts
+        np.testing.assert_array_equal(pooled.parent_rows, single.parent_rows)
+        np.testing.assert_array_equal(pooled.starts, single.starts)
+
+    def test_missing_narratives_have_no_chunks(self):
+        batch = TextProcessor().chunk_texts([None, "short complaint"])
+
+        assert batch.texts == ["short complaint"]
+        assert batch.parent_rows.tolist() == [1]
+
+
+class TestSplitDocuments:
+    def test_metadata_from_parent_row(self, df):
+        processor = TextProcessor(chunk_size=120, chunk_overlap=20)
+
+        docs = processor.split_documents(df)
+
+        assert [doc.page_content for doc in docs] == [
+            chunk for _, chunk in row_wise_chunks(processor, df)
+        ]
+        first = docs[0]
+        row = df.iloc[
+            [i for i, t in enumerate(df["Consumer complaint narrative"]) if t][0]
+        ]
+        assert first.metadata["id"] == row["Complaint ID"]
+        assert first.metadata["product"] == row["Product"]
+        assert first.metadata["state"] == "CA"
+
+    def test_store_from_chunks_matches_documents(self, df):
+        processor = TextProcessor(chunk_size=120, chunk_overlap=20)
+        batch = processor.chunk_texts(df["Consumer complaint narrative"])
+
+        columnar = MetadataStore.from_chunks(batch.texts, batch.parent_rows, df)
+        documents = MetadataStore.from_documents(processor.split_documents(df))
+
+        assert columnar.table.equals(documents.table)